@@ -36,8 +36,10 @@ PROGRAM_START_YEAR = 2023
 #
 
 class AboutApp(Entity):
+    __slots__ = ()
+
     def __init__(self):
-        self.reachable = True
+        super().__init__('About', True, False)
 
         print('Loading About')
 
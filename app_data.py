@@ -17,12 +17,9 @@
 #set expandtab
 #set tabstop=4
 
-import gettext
 from enum import Enum
 from common_data import *
 
-_ = gettext.gettext
-
 dev_images = {
     'unknown': 'resources/devices/unknown_app.png',
     'ios': 'resources/devices/ios_app.png',
@@ -0,0 +1,277 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Synthetic debug data exports for the benchmarks
+    Exports are random but repeatable for the same seed: all hardware revisions
+    of the dish and router images, application platforms, random alerts and wedges.
+    Both 'status' and 'rawStatus' export formats are generated.
+'''
+
+import os
+import sys
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common_data import *
+import dishy_data
+import router_data
+import app_data
+from dishy_data import *
+from router_data import ROUTER_KEY, ROUTER_REACHABLE_KEY, ROUTER_CLOUD_ACCESS_KEY, ROUTER_BOOT_KEY, \
+                    ROUTER_BOOT_LAST_REASON, ROUTER_BOOT_LAST_COUNT, ROUTER_BOOT_COUNT_BY_REASON_MAP_KEY, \
+                    ROUTER_WAN_IPV4_ADDRESS_KEY, ROUTER_WAN_IPV6_ADRESSES_KEY, ROUTER_WAN_DHPS_SERVERS_LIST_KEY, ROUTER_PING_DROP_RATE_KEY, ROUTER_DISH_PING_DROP_RATE_KEY, \
+                    ROUTER_DISH_PING_LATENCY_MS_KEY, ROUTER_POP_PING_DROP_RATE_KEY, ROUTER_POP_PING_LATENCY_MS_KEY, \
+                    ROUTER_IS_AVIATION_KEY
+from app_data import DEVICE_KEY, DEVICE_APP_KEY, DEVICE_APP_VERSION_KEY, DEVICE_APP_ENVIRONMENT_KEY, \
+                    DEVICE_APP_BUILD_KEY, DEVICE_APP_TIMESTAMP_KEY, DEVICE_PLATFORM_KEY, DEVICE_PLATFORM_OS_KEY, \
+                    DEVICE_PLATFORM_VERSION_KEY, DEVICE_WIFI_KEY, DEVICE_WIFI_IP_ADDR_KEY, DEVICE_SENSORS_KEY, \
+                    DEVICE_NAME_KEY, DEVICE_MODEL_KEY, DEVICE_ID_KEY, DEVICE_NETWORK_KEY, DEVICE_NETWORK_VPN_KEY, \
+                    DEVICE_NETWORK_NETINFO_KEY, DEVICE_NETWORK_NETINFO_TYPE_KEY, DEVICE_NETWORK_NETINFO_IS_CONNECTED_KEY, \
+                    DEVICE_NETWORK_NETINFO_DETAILS_KEY, DEVICE_NETWORK_NETINFO_DETAILS_IP_ADDR_KEY, \
+                    DEVICE_NETWORK_NETINFO_DETAILS_FREQ_KEY, DEVICE_NETWORK_NETINFO_DETAILS_SSID_KEY, \
+                    DEVICE_NETWORK_NETINFO_DTAILS_SIGNAL_LEVEL_KEY, DEVICE_NETWORK_PUBLIC_IP_KEY, DEVICE_NETWORK_IS_STARLINK_KEY
+
+EXPORT_FORMATS = (STATUS_KEY, RAW_STATUS_KEY)
+
+''' Every revision with an image, 'hp_flat' and 'unknown' are not real hardware versions '''
+DISH_HW_VERSIONS = tuple(hw for hw in dishy_data.dev_images if hw not in ('hp_flat', 'unknown'))
+ROUTER_HW_VERSIONS = tuple(router_data.dev_images)
+APP_PLATFORMS = tuple(platform for platform in app_data.dev_images if platform != 'unknown')
+
+DISH_ALERTS = (DEVICE_ALERTS_MOTORS_STUCK_KEY, DEVICE_ALERTS_THERMAL_THROTTLE_KEY, DEVICE_ALERTS_THERMAL_SHUTDOWN_KEY,
+                DEVICE_ALERTS_UNEXPECTED_LOCATION_KEY, DEVICE_ALERTS_SLOW_ETHERNET_SPEED_KEY, DEVICE_ALERTS_ROAMING_KEY,
+                DEVICE_ALERTS_INSTALL_PENDING_KEY, DEVICE_ALERTS_IS_HEATING_KEY, DEVICE_ALERTS_PS_THERMAL_THROTTLE_KEY,
+                DEVICE_ALERTS_POWER_SAVE_IDLE_KEY, DEVICE_ALERTS_MOVING_WHILE_NOT_MOBILE_KEY,
+                DEVICE_ALERTS_MOVING_FAST_WHILE_NOT_AVIATION_KEY)
+
+''' Some of the alerts are set, active with the given probability '''
+def random_alerts(rng, alert_keys, active_probability=0.2):
+    return { key: rng.random() < active_probability for key in alert_keys if rng.random() < 0.5 }
+
+''' Fractions of 12 wedges, most of them are clear '''
+def random_wedges(rng):
+    return [ round(rng.random(), 3) if rng.random() < 0.3 else 0 for i in range(12) ]
+
+def wrap_section(section, json_format, outer=None):
+    result = dict(outer) if outer is not None else {}
+    result[json_format] = section
+
+    return result
+
+def generate_dish(rng, json_format, index, timestamp):
+    hw_version = DISH_HW_VERSIONS[index % len(DISH_HW_VERSIONS)]
+    wedges = random_wedges(rng)
+
+    status = {
+        DEVICE_INFO_KEY: {
+            DEVICE_INFO_ID_KEY: 'ut%08x-%08x-%08x' % (index, rng.getrandbits(32), rng.getrandbits(32)),
+            DEVICE_INFO_HW_VER_KEY: hw_version,
+            DEVICE_INFO_HW_BOARD_REV_KEY: rng.randint(1, 6),
+            DEVICE_INFO_SW_VER_KEY: '%08x-%08x.uterm.release' % (rng.randrange(8), rng.randrange(8)),
+            DEVICE_INFO_SW_BUILD_ID_KEY: '%08x' % rng.getrandbits(32),
+            DEVICE_INFO_MF_VER_KEY: '',
+            DEVICE_INFO_GEN_NUMBER: str(1690000000 + rng.randrange(1000)),
+            DEVICE_INFO_CC_KEY: rng.choice(('US', 'UA', 'DE', 'GB', 'JP', 'AU')),
+            DEVICE_INFO_UTC_OFF_KEY: rng.choice((0, 3600, 7200, -18000)),
+            DEVICE_INFO_SW_PARTS_EQ_KEY: rng.random() < 0.5,
+            DEVICE_INFO_IS_DEV_KEY: False,
+            DEVICE_INFO_BOOT_COUNT_KEY: rng.randint(1, 500),
+            DEVICE_INFO_ANTI_ROLLBACK_KEY: 0,
+            DEVICE_DISH_COHOUSED_KEY: False
+        },
+        DEVICE_STATE_KEY: { DEVICE_UPTIME_KEY: str(rng.randint(60, 10000000)) },
+        DEVICE_TIMESTAMP_KEY: timestamp,
+        DEVICE_HAS_ACTUATORS_KEY: rng.randint(0, 2),
+        DEVICE_MOBILITY_CLASS_KEY: rng.randint(0, 2),
+        DEVICE_CLASS_OF_SERVICE_KEY: rng.randint(0, 3),
+        DEVICE_SOFTWARE_UPDATE_ST_KEY: rng.randint(0, 5),
+        DEVICE_DISABLEMENT_CODE_KEY: rng.randint(0, 2),
+        DEVICE_ETHER_SPEED_KEY: rng.choice((100, 1000)),
+        NET_DOWNLINK_TPUT_BPS_KEY: rng.uniform(0, 3e8),
+        NET_UPLINK_TPUT_BPS_KEY: rng.uniform(0, 3e7),
+        NET_POP_PING_LATENCY_MS_KEY: rng.uniform(15, 120),
+        NET_POP_PING_DROP_RATE_KEY: rng.choice((0, 0, 0, rng.random())),
+        NET_SECONDS_TO_FIRST_NON_EMPTY_SLOT_KEY: rng.random(),
+        DEVICE_IS_SNR_ABOVE_NOISE_FLOOR_KEY: True,
+        DEVICE_IS_SNR_PERSISTENTLY_LOW_KEY: rng.random() < 0.1,
+        DEVICE_BORESIGHT_AZIMUTH_DEG_KEY: rng.uniform(-180, 180),
+        DEVICE_BORESIGHT_ELEVATION_DEG_KEY: rng.uniform(20, 90),
+        DEVICE_GPS_STATS_KEY: {
+            DEVICE_GPS_STATS_GPS_VALID_KEY: rng.random() < 0.9,
+            DEVICE_GPS_STATS_GPS_SATS_KEY: rng.randint(0, 20)
+        },
+        DEVICE_ALIGNMENT_STATS_KEY: {
+            DEVICE_HAS_ACTUATORS_KEY: rng.randint(0, 2),
+            DEVICE_ALIGNMENT_STATS_ACTUATOR_STATE_KEY: rng.randint(0, 2),
+            DEVICE_ALIGNMENT_STATS_TILT_ANGLE_DEG_KEY: rng.uniform(0, 30),
+            DEVICE_BORESIGHT_AZIMUTH_DEG_KEY: rng.uniform(-180, 180),
+            DEVICE_BORESIGHT_ELEVATION_DEG_KEY: rng.uniform(20, 90),
+            DEVICE_DESIRED_BORESIGHT_AZ_DEG_KEY: rng.uniform(-180, 180),
+            DEVICE_DESIRED_BORESIGHT_EL_DEG_KEY: rng.uniform(20, 90),
+            DEVICE_ALIGNMENT_STATS_ATTITUDE_ESTIMATION_STATE_KEY: rng.randint(0, 3),
+            DEVICE_ALIGNMENT_STATS_ATTITUDE_UNCERTANITY_DEG_KEY: rng.uniform(0, 5)
+        },
+        DEVICE_READY_STATES_KEY: {
+            DEVICE_READY_STATES_CADY_KEY: True,
+            DEVICE_READY_STATES_SCP_KEY: True,
+            DEVICE_READY_STATES_L1L2_KEY: True,
+            DEVICE_READY_STATES_XPHY_KEY: True,
+            DEVICE_READY_STATES_AAP_KEY: True,
+            DEVICE_READY_STATES_RF_KEY: rng.random() < 0.95
+        },
+        DEVICE_INIT_DURATION_SEC_KEY: {
+            DEVICE_INIT_RF_READY_KEY: rng.randint(1, 60),
+            DEVICE_INIT_GPS_VALID_KEY: rng.randint(1, 120),
+            DEVICE_INIT_FIRST_POP_PING_KEY: rng.randint(10, 300),
+            DEVICE_INIT_STABLE_CONNECTION_KEY: rng.randint(10, 300)
+        },
+        DEVICE_OUTAGE_KEY: {
+            DEVICE_OUTAGE_CAUSE_KEY: rng.randint(0, 9),
+            DEVICE_OUTAGE_START_TIMESTAMP_NS_KEY: str((timestamp - rng.randint(0, 86400)) * 1000000000),
+            DEVICE_OUTAGE_DURATION_NS_KEY: str(rng.randint(0, 60000000000)),
+            DEVICE_OUTAGE_DID_SWITCH_KEY: rng.random() < 0.5
+        },
+        DEVICE_OBSTRUCTION_STATS_KEY: {
+            DEVICE_OBSTRUCTION_STATS_CURRENTLY_OBSTRUCTED_KEY: rng.random() < 0.1,
+            DEVICE_OBSTRUCTION_STATS_FRACTION_OBSTRUCTED_KEY: sum(wedges) / len(wedges) / 10,
+            DEVICE_OBSTRUCTION_STATS_VALID_SEC_KEY: rng.randint(0, 100000),
+            DEVICE_OBSTRUCTION_STATS_WEDGE_FRAC_OBSTRUCTED_LIST_KEY: wedges,
+            DEVICE_OBSTRUCTION_STATS_WEDGE_ABS_OBSTRUCTED_LIST_KEY: [ w / 10 for w in wedges ],
+            DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_DURATION_SEC_KEY: rng.uniform(0, 10),
+            DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_INTERVAL_SEC_KEY: rng.uniform(0, 1000)
+        },
+        DEVICE_ALERTS_KEY: random_alerts(rng, DISH_ALERTS),
+        DEVICE_CONFIG_KEY: { 'snowMeltMode': rng.randint(0, 2), 'locationRequestMode': rng.randint(0, 2) },
+        DEVICE_FEATURES_KEY: { 'energySaving': rng.random() < 0.5, 'dynamicPowerSave': rng.random() < 0.5 }
+    }
+
+    ''' The new exports have the hardware version next to the status '''
+    outer = { DISH_REACHABLE_KEY: True, DISH_CLOUD_ACCESS_KEY: rng.random() < 0.3 }
+
+    if json_format == RAW_STATUS_KEY:
+        outer[DEVICE_HARDWARE_VERSION_KEY] = hw_version
+
+    return wrap_section(status, json_format, outer)
+
+def generate_router(rng, json_format, index, timestamp):
+    status = {
+        DEVICE_INFO_KEY: {
+            DEVICE_INFO_ID_KEY: 'Router-%012X' % rng.getrandbits(48),
+            DEVICE_INFO_HW_VER_KEY: ROUTER_HW_VERSIONS[index % len(ROUTER_HW_VERSIONS)],
+            DEVICE_INFO_SW_VER_KEY: '%08x-%08x' % (rng.randrange(8), rng.randrange(8)),
+            DEVICE_INFO_CC_KEY: rng.choice(('US', 'UA', 'DE', 'GB', 'JP', 'AU')),
+            DEVICE_INFO_BOOT_COUNT_KEY: rng.randint(1, 200),
+            ROUTER_BOOT_KEY: {
+                ROUTER_BOOT_LAST_REASON: rng.randint(0, 5),
+                ROUTER_BOOT_LAST_COUNT: rng.randint(1, 20),
+                ROUTER_BOOT_COUNT_BY_REASON_MAP_KEY: [ [reason, rng.randint(1, 30)] for reason in range(rng.randint(0, 4)) ]
+            }
+        },
+        DEVICE_STATE_KEY: { DEVICE_UPTIME_KEY: str(rng.randint(60, 10000000)) },
+        DEVICE_TIMESTAMP_KEY: timestamp,
+        ROUTER_WAN_IPV4_ADDRESS_KEY: '100.%d.%d.%d' % (rng.randint(64, 127), rng.randrange(256), rng.randrange(256)),
+        ROUTER_WAN_IPV6_ADRESSES_KEY: [ '2605:59c8::%x' % rng.getrandbits(16) for i in range(rng.randint(0, 3)) ],
+        ROUTER_WAN_DHPS_SERVERS_LIST_KEY: [ '192.168.100.1' ],
+        ROUTER_PING_DROP_RATE_KEY: rng.random() / 10,
+        ROUTER_DISH_PING_DROP_RATE_KEY: rng.random() / 10,
+        ROUTER_DISH_PING_LATENCY_MS_KEY: rng.uniform(0.5, 5),
+        ROUTER_POP_PING_DROP_RATE_KEY: rng.random() / 10,
+        ROUTER_POP_PING_LATENCY_MS_KEY: rng.uniform(15, 120),
+        ROUTER_IS_AVIATION_KEY: False,
+        DEVICE_ALERTS_KEY: random_alerts(rng, ('radarDetected', 'wanEthPoorConnection', 'lanEthSlowLink100')),
+        DEVICE_FEATURES_KEY: { 'mesh': rng.random() < 0.5 }
+    }
+
+    return wrap_section(status, json_format, { ROUTER_REACHABLE_KEY: True, ROUTER_CLOUD_ACCESS_KEY: False })
+
+def generate_device(rng, json_format, index, timestamp):
+    platform = APP_PLATFORMS[index % len(APP_PLATFORMS)]
+    ip_addr = '192.168.1.%d' % rng.randint(2, 254)
+
+    status = {
+        DEVICE_APP_KEY: {
+            DEVICE_APP_VERSION_KEY: '2023.%d.%d' % (rng.randint(1, 50), rng.randint(0, 9)),
+            DEVICE_APP_ENVIRONMENT_KEY: 'production',
+            DEVICE_APP_BUILD_KEY: str(rng.randint(1000, 9999)),
+            DEVICE_APP_TIMESTAMP_KEY: timestamp - rng.randint(0, 10000000)
+        },
+        DEVICE_PLATFORM_KEY: { DEVICE_PLATFORM_OS_KEY: platform, DEVICE_PLATFORM_VERSION_KEY: str(rng.randint(10, 17)) },
+        DEVICE_TIMESTAMP_KEY: timestamp,
+        app_data.DEVICE_UPTIME_KEY: rng.randint(1, 100000),
+        DEVICE_NAME_KEY: 'device-%d' % index,
+        DEVICE_MODEL_KEY: rng.choice(('Pixel 7', 'iPhone14,5', 'SM-G991B', 'Chrome')),
+        DEVICE_ID_KEY: '%016x' % rng.getrandbits(64),
+        DEVICE_WIFI_KEY: { DEVICE_WIFI_IP_ADDR_KEY: ip_addr, DEVICE_NETWORK_NETINFO_DETAILS_SSID_KEY: 'STARLINK' },
+        DEVICE_NETWORK_KEY: {
+            DEVICE_NETWORK_VPN_KEY: rng.random() < 0.1,
+            DEVICE_NETWORK_PUBLIC_IP_KEY: '98.97.%d.%d' % (rng.randrange(256), rng.randrange(256)),
+            DEVICE_NETWORK_IS_STARLINK_KEY: True,
+            DEVICE_NETWORK_NETINFO_KEY: {
+                DEVICE_NETWORK_NETINFO_TYPE_KEY: 'wifi',
+                DEVICE_NETWORK_NETINFO_IS_CONNECTED_KEY: True,
+                DEVICE_NETWORK_NETINFO_DETAILS_KEY: {
+                    DEVICE_NETWORK_NETINFO_DETAILS_IP_ADDR_KEY: ip_addr,
+                    DEVICE_NETWORK_NETINFO_DETAILS_SSID_KEY: 'STARLINK',
+                    DEVICE_NETWORK_NETINFO_DETAILS_FREQ_KEY: rng.choice((2437, 5180, 5745)),
+                    DEVICE_NETWORK_NETINFO_DTAILS_SIGNAL_LEVEL_KEY: rng.randint(10, 100)
+                }
+            }
+        },
+        DEVICE_SENSORS_KEY: { sensor: { 'available': True, 'active': rng.random() < 0.5 } \
+                                for sensor in ('accelerometer', 'gyroscope', 'magnetometer') }
+    }
+
+    return wrap_section(status, json_format)
+
+''' One export with the dish, router and application sections '''
+def generate_export(rng, json_format, index, timestamp=1690000000):
+    return {
+        DISH_KEY: generate_dish(rng, json_format, index, timestamp),
+        ROUTER_KEY: generate_router(rng, json_format, index, timestamp),
+        DEVICE_KEY: generate_device(rng, json_format, index, timestamp)
+    }
+
+''' Exports of all formats, formats and hardware revisions alternate '''
+def generate_exports(count, seed=0, json_formats=EXPORT_FORMATS):
+    rng = random.Random(seed)
+
+    return [ generate_export(rng, json_formats[i % len(json_formats)], i, 1690000000 + i * 60) for i in range(count) ]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic Starlink debug data exports')
+    parser.add_argument('output', help='Output directory')
+    parser.add_argument('-n', '--count', type=int, default=100, help='Number of exports')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('-f', '--format', choices=EXPORT_FORMATS, default=None, help='Export format, both by default')
+
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+
+    json_formats = EXPORT_FORMATS if args.format is None else (args.format,)
+
+    for i, export in enumerate(generate_exports(args.count, args.seed, json_formats)):
+        with open(os.path.join(args.output, 'export_%06d.json' % i), 'w', encoding='utf8') as json_file:
+            json.dump(export, json_file, indent=2)
+
+    print('Generated ' + str(args.count) + ' exports in ' + args.output, file=sys.stderr)
@@ -0,0 +1,223 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Benchmarks of the parsing and rendering steps on the synthetic exports
+    Every benchmark is repeated, the best time is used for the comparison (like timeit),
+    garbage collector is disabled during the measurement.
+    Results are written as JSON, a previous results file can be used as the baseline:
+    benchmarks slower than the baseline by more than the threshold are reported as regressions.
+'''
+
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import statistics
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gen_debug_json import generate_exports
+from json_loader import read_entities, load_json_text
+from obstruction_img_gen import generate_img_from_list, obstruction_img_cache
+from dishy import DishyObstructions
+
+RESULTS_VERSION = 1
+
+''' 10% slower than the baseline is a regression '''
+DEFAULT_THRESHOLD = 0.1
+
+''' Obstruction images are rendered like for the sub-tabs of the viewer (space_dbg.SUBTAB_IMG_SIZE) '''
+FORMAT_IMG_SIZE = 170
+
+''' Benchmark data: exports as text and parsed JSON, created once
+    Entities print loading messages, stdout should be redirected
+'''
+class BenchmarkData:
+    def __init__(self, count, seed):
+        self.exports = generate_exports(count, seed)
+        self.texts = [ json.dumps(export) for export in self.exports ]
+        self.wedge_lists = []
+
+        for export in self.exports:
+            for entity in read_entities(export).values():
+                plugin = entity.get_plugin(DishyObstructions.plugin_name)
+
+                if plugin is not None and plugin.is_data_ready():
+                    self.wedge_lists.append(plugin.frac_obstr_list)
+
+''' Loader of the tools: only the entity sections are parsed, the rest is skipped '''
+def bench_json_load(data):
+    for text in data.texts:
+        load_json_text(text)
+
+def bench_entities(data):
+    for export in data.exports:
+        read_entities(export)
+
+''' Images cached by the previous repeats or benchmarks would be reused, so the cache is cleared '''
+def setup_format(data):
+    obstruction_img_cache.clear()
+
+    return [ read_entities(export) for export in data.exports ]
+
+''' Plugins are parsed lazily, so the first get_additional_data also parses them '''
+def bench_format(entities_list):
+    for entities in entities_list:
+        for entity in entities.values():
+            params = {}
+            entity.get_readable_params(params)
+
+            additional_data = {}
+            entity.get_additional_data(additional_data, img_size=FORMAT_IMG_SIZE)
+
+def bench_render(data):
+    for wedge_list in data.wedge_lists:
+        generate_img_from_list(wedge_list)
+
+''' Benchmarks: name -> (setup, run), setup result is passed to run and not measured '''
+BENCHMARKS = {
+    'json_load': (None, bench_json_load),
+    'entities': (None, bench_entities),
+    'format': (setup_format, bench_format),
+    'render': (None, bench_render)
+}
+
+''' Run the benchmark, returns times of all repeats in seconds '''
+def measure(setup, run, data, repeat):
+    times = []
+
+    for i in range(repeat):
+        arg = setup(data) if setup is not None else data
+
+        gc_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            start_time = time.perf_counter()
+            run(arg)
+            times.append(time.perf_counter() - start_time)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return times
+
+def run_benchmarks(names, count, seed, repeat):
+    results = {}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        data = BenchmarkData(count, seed)
+        times_by_name = { name: measure(*BENCHMARKS[name], data, repeat) for name in names }
+
+    for name, times in times_by_name.items():
+        items = len(data.wedge_lists) if name == 'render' else count
+
+        results[name] = {
+            'min': min(times),
+            'median': statistics.median(times),
+            'items': items,
+            'per_item_us': min(times) / max(1, items) * 1e6
+        }
+
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'count': count,
+        'seed': seed,
+        'repeat': repeat,
+        'results': results
+    }
+
+''' Benchmarks slower than the baseline: (name, baseline, current, ratio) '''
+def compare_results(baseline, current, threshold):
+    regressions = []
+
+    for name, result in current['results'].items():
+        baseline_result = baseline['results'].get(name)
+
+        if baseline_result is None:
+            continue
+
+        ratio = result['per_item_us'] / baseline_result['per_item_us']
+
+        if ratio > 1 + threshold:
+            regressions.append((name, baseline_result['per_item_us'], result['per_item_us'], ratio))
+
+    return regressions
+
+def print_results(results, baseline, out):
+    for name, result in results['results'].items():
+        line = '%-12s %10.1f us/item  min %8.3f s  median %8.3f s' % \
+                    (name, result['per_item_us'], result['min'], result['median'])
+
+        if baseline is not None and name in baseline['results']:
+            line = line + '  %+6.1f%%' % ((result['per_item_us'] / baseline['results'][name]['per_item_us'] - 1) * 100)
+
+        print(line, file=out)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Space Debugger benchmarks')
+    parser.add_argument('benchmarks', nargs='*', help='Benchmarks to run: ' + ', '.join(BENCHMARKS) + '. All by default')
+    parser.add_argument('-n', '--count', type=int, default=200, help='Number of synthetic exports')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed of the exports')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of repeats')
+    parser.add_argument('-o', '--output', default=None, help='Write results to the JSON file')
+    parser.add_argument('-b', '--baseline', default=None, help='Compare with results from the JSON file')
+    parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD, help='Allowed slowdown, 0.1 is 10%%')
+
+    args = parser.parse_args()
+
+    names = args.benchmarks if len(args.benchmarks) else list(BENCHMARKS)
+
+    for name in names:
+        if name not in BENCHMARKS:
+            print('Unknown benchmark: ' + name, file=sys.stderr)
+            sys.exit(1)
+
+    baseline = None
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf8') as baseline_file:
+            baseline = json.load(baseline_file)
+
+        if baseline.get('count') != args.count or baseline.get('seed') != args.seed:
+            print('Baseline was created with different count or seed', file=sys.stderr)
+
+    results = run_benchmarks(names, args.count, args.seed, max(1, args.repeat))
+
+    print_results(results, baseline, sys.stdout)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if baseline is not None:
+        regressions = compare_results(baseline, results, args.threshold)
+
+        for name, baseline_us, current_us, ratio in regressions:
+            print('Regression: %s %.1f -> %.1f us/item (x%.2f)' % (name, baseline_us, current_us, ratio), file=sys.stderr)
+
+        if len(regressions):
+            sys.exit(2)
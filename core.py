@@ -0,0 +1,38 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Parsing core: entities, plugins and key tables
+    Nothing here imports Tk, sv_ttk or PIL, PIL is loaded only when
+    an obstruction image is requested. Use this module from the batch
+    tools and workers instead of the GUI modules.
+'''
+
+from entity import Entity, EntityModule, LazyPlugin, ModuleAlerts, ModuleConfig, Features
+from dishy import Dishy, DishyNetwork, DishyGPS, DishyAlignmentStats, DishyAntenna, \
+                    DishyReadyStates, DishyOutage, DishyObstructions
+from router import Router, RouterNetwork, BootInfo
+from device_app import DeviceApp, DeviceNetwork, DeviceSensors
+from json_loader import load_json_file, read_entities
+from field_extract import FieldExtractor, extract
+from schema import Schema, Field, detect_format
+import common_data
+import dishy_data
+import router_data
+import app_data
@@ -17,50 +17,49 @@
 #set expandtab
 #set tabstop=4
 
+import sys
 import json
 import gettext
 import datetime
 from entity import * 
 from app_data import *
+from schema import Schema, Field, Text, FORMAT_FLAT, detect_format, unwrap
 
 _ = gettext.gettext
 
+''' Fields of the local device section '''
+APP_SCHEMA = Schema('App', [
+    Field('device_app_version', (DEVICE_APP_KEY, DEVICE_APP_VERSION_KEY), Text('Unknown'), intern=True),
+    Field('device_app_environment', (DEVICE_APP_KEY, DEVICE_APP_ENVIRONMENT_KEY), Text('Unknown')),
+    Field('device_app_build', (DEVICE_APP_KEY, DEVICE_APP_BUILD_KEY), ''),
+    Field('device_app_hash', (DEVICE_APP_KEY, DEVICE_APP_HASH_KEY), ''),
+    Field('device_app_timestamp', (DEVICE_APP_KEY, DEVICE_APP_TIMESTAMP_KEY), 0),
+    Field('platform_os', (DEVICE_PLATFORM_KEY, DEVICE_PLATFORM_OS_KEY), 'unknown', intern=True),
+    Field('platform_os_version', (DEVICE_PLATFORM_KEY, DEVICE_PLATFORM_VERSION_KEY), '', intern=True),
+    Field('timestamp', DEVICE_TIMESTAMP_KEY, 0),
+    Field('uptime', DEVICE_UPTIME_KEY, 0),
+    Field('device', DEVICE_NAME_KEY, ''),
+    Field('device_model', DEVICE_MODEL_KEY, '', intern=True),
+    Field('device_id', DEVICE_ID_KEY, '')
+])
+
 class DeviceApp(Entity):
+    __slots__ = APP_SCHEMA.get_attributes() + ('wifi_ip', 'wifi_ssid')
+
     def __init__(self, json_object):
         print('Loading Local device')
 
         super().__init__('App', True, False)
 
-        app_object = json_object
-
-        if STATUS_KEY in json_object:
-          app_object = json_object[STATUS_KEY]
+        json_format = detect_format(json_object)
+        app_object = unwrap(json_object, json_format)
 
         if DEVICE_APP_KEY not in app_object:
             raise Exception(_('Failed to load device app info'))
 
-        device_app = app_object[DEVICE_APP_KEY]
-
-        self.device_app_version = device_app.get(DEVICE_APP_VERSION_KEY, _('Unknown'))
-        self.device_app_environment = device_app.get(DEVICE_APP_ENVIRONMENT_KEY, _('Unknown'))
-        self.device_app_build = device_app.get(DEVICE_APP_BUILD_KEY, '')
-        self.device_app_hash = device_app.get(DEVICE_APP_HASH_KEY, '')
-        self.device_app_timestamp = device_app.get(DEVICE_APP_TIMESTAMP_KEY, 0)        
-
-        self.platform_os = 'unknown'
-
-        if DEVICE_PLATFORM_KEY in app_object:
-            self.platform_os = app_object[DEVICE_PLATFORM_KEY].get(DEVICE_PLATFORM_OS_KEY, 'unknown')
-
-        self.plugins = []
+        APP_SCHEMA.load(self, json_object, json_format)
 
         if self.platform_os != 'web' and self.platform_os != 'unknown':
-            self.platform_os_version = app_object[DEVICE_PLATFORM_KEY].get(DEVICE_PLATFORM_VERSION_KEY, '')
-            self.timestamp = app_object.get(DEVICE_TIMESTAMP_KEY, 0)
-            self.uptime = app_object.get(DEVICE_UPTIME_KEY, 0)
-            self.device = app_object.get(DEVICE_NAME_KEY, '')
-            self.device_model = app_object.get(DEVICE_MODEL_KEY, '')
-            self.device_id = app_object.get(DEVICE_ID_KEY, '')
             wifi_section = app_object.get(DEVICE_WIFI_KEY)
             if wifi_section:
                 self.wifi_ip = wifi_section.get(DEVICE_WIFI_IP_ADDR_KEY, '0.0.0.0')
@@ -69,8 +68,8 @@ class DeviceApp(Entity):
                 self.wifi_ip = _('unknown')
                 self.wifi_ssid = _('unknown')
 
-            self.plugins.append(DeviceNetwork(app_object))
-            self.plugins.append(DeviceSensors(app_object))
+            self.add_plugin(DeviceNetwork, app_object)
+            self.add_plugin(DeviceSensors, app_object)
 
     def get_device_image_file(self):
         if self.platform_os not in dev_images:
@@ -109,32 +108,30 @@ class DeviceApp(Entity):
             result[_('WiFi SSID')] = self.wifi_ssid
             
 
-    def get_additional_data(self, result):
-        for plugin in self.plugins:
-            if plugin.is_data_ready():
-                result[plugin.get_name()] = plugin.get_data() 
-
 '' ''
 
+DEVICE_NETWORK_SCHEMA = Schema('Device network', [
+    Field('is_vpn', (DEVICE_NETWORK_KEY, DEVICE_NETWORK_VPN_KEY), False),
+    Field('gateway_ip', (DEVICE_NETWORK_KEY, DEVICE_NETWORK_GATEWAY_IP_ADDR_KEY), '0.0.0.0'),
+    Field('public_ip', (DEVICE_NETWORK_KEY, DEVICE_NETWORK_PUBLIC_IP_KEY), '0.0.0.0'),
+    Field('is_starlink_conn', (DEVICE_NETWORK_KEY, DEVICE_NETWORK_IS_STARLINK_KEY), False)
+])
+
 class DeviceNetwork(EntityModule):
+    __slots__ = DEVICE_NETWORK_SCHEMA.get_attributes() + ('net_type', 'is_bypass_mode', 'is_connected', 'is_internet_available',
+                    'ip_addr', 'local_link_speed', 'wifi_link_freq', 'wifi_ssid', 'wifi_bssid', 'wifi_signal_level')
+    plugin_name = 'DeviceNetwork'
+
     def __init__(self, json_object):
         super().__init__()
 
-        app_object = json_object
-
-        if STATUS_KEY in json_object:
-          app_object = json_object[STATUS_KEY]
-
-        if DEVICE_NETWORK_KEY not in app_object:
+        if DEVICE_NETWORK_KEY not in json_object:
             return None
 
-        network = app_object[DEVICE_NETWORK_KEY]
-        network_info = network.get(DEVICE_NETWORK_NETINFO_KEY, None)
+        DEVICE_NETWORK_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
-        self.is_vpn = network.get(DEVICE_NETWORK_VPN_KEY, False)
-        self.gateway_ip = network.get(DEVICE_NETWORK_GATEWAY_IP_ADDR_KEY, '0.0.0.0')
-        self.public_ip = network.get(DEVICE_NETWORK_PUBLIC_IP_KEY, '0.0.0.0')
-        self.is_starlink_conn = network.get(DEVICE_NETWORK_IS_STARLINK_KEY, False)
+        network = json_object[DEVICE_NETWORK_KEY]
+        network_info = network.get(DEVICE_NETWORK_NETINFO_KEY, None)
 
         if network_info is not None:
             network_info_details = network_info.get(DEVICE_NETWORK_NETINFO_DETAILS_KEY, None)
@@ -176,9 +173,6 @@ class DeviceNetwork(EntityModule):
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'DeviceNetwork'
-
     def get_data(self):
         data = [
             [ _('Local connection type'), self.net_type ],
@@ -206,32 +200,27 @@ class DeviceNetwork(EntityModule):
         return [ _('Network'), data ]
 
 class DeviceSensors(EntityModule):
+    __slots__ = ('sensors',)
+    plugin_name = 'DeviceSensors'
+
     def __init__(self, json_object):
         super().__init__()
 
-        app_object = json_object
-
-        if STATUS_KEY in json_object:
-          app_object = json_object[STATUS_KEY]
-
-        if DEVICE_SENSORS_KEY not in app_object:
+        if DEVICE_SENSORS_KEY not in json_object:
             return None
 
-        self.sensors_data = app_object[DEVICE_SENSORS_KEY]
+        ''' Only the flags are kept, not the source JSON: (name, available, active) '''
+        sensors_data = json_object[DEVICE_SENSORS_KEY]
 
-        self.data_ready = True
+        self.sensors = tuple((sys.intern(sensor), sensors_data[sensor]['available'], sensors_data[sensor]['active']) \
+                                for sensor in sensors_data)
 
-    def get_name(self):
-        return 'DeviceSensors'
+        self.data_ready = True
 
     def get_data(self):
         data = []
 
-        for sensor in self.sensors_data:
-            sensor_info = self.sensors_data[sensor]
-            sensor_active = sensor_info['active']
-            sensor_available = sensor_info['available']
-
+        for sensor, sensor_available, sensor_active in self.sensors:
             sensor_str = _('Available') + ': ' + self.yes_or_no(sensor_available) + \
                             '  ' + _('Active') + ': ' + self.yes_or_no(sensor_active)
 
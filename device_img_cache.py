@@ -0,0 +1,180 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+import os
+import time
+import hashlib
+import tempfile
+from PIL import Image
+from startup_profiler import profiler
+
+''' Per-user cache directory of the application '''
+def get_cache_root():
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+
+    if not cache_dir:
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(cache_dir, 'space-debugger')
+
+''' Per-user directory for the resized images '''
+def get_default_store_dir():
+    return os.path.join(get_cache_root(), 'thumbnails')
+
+THUMBNAIL_SUFFIX = '.png'
+
+DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+''' Remove cache files older than max_age, then the oldest ones while the total size is above max_size
+    Modification time is the last use of the file. dirs is a list of (directory, suffix) pairs,
+    paths of the remaining files are returned
+'''
+def evict_cache_files(dirs, max_size, max_age):
+    files = []
+    now = time.time()
+
+    for cache_dir, suffix in dirs:
+        for name in os.listdir(cache_dir):
+            if not name.endswith(suffix):
+                continue
+
+            file_path = os.path.join(cache_dir, name)
+
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+
+            if now - st.st_mtime > max_age:
+                remove_cache_file(file_path)
+            else:
+                files.append((st.st_mtime, st.st_size, file_path))
+
+    files.sort()
+    total_size = sum(item[1] for item in files)
+
+    while total_size > max_size and len(files):
+        mtime, size, file_path = files.pop(0)
+        remove_cache_file(file_path)
+        total_size = total_size - size
+
+    return [item[2] for item in files]
+
+def remove_cache_file(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+''' Device images service
+    Many hardware revisions share the same picture, so every resource file
+    is decoded only once per process and memoized by (path, size).
+    Resized thumbnails are also stored on disk, the name of the stored file
+    contains the mtime of the source file, so changed resources are picked up.
+    Thumbnails of the old versions are evicted by age and size like the parse cache entries.
+    Images are shared, callers must not modify them.
+'''
+class DeviceImgCache:
+    def __init__(self, store_dir=None, max_size=DEFAULT_MAX_SIZE, max_age=DEFAULT_MAX_AGE):
+        self.store_dir = store_dir
+        self.max_size = max_size
+        self.max_age = max_age
+        self.images = {}
+
+    def get_store_path(self, img_path, size):
+        mtime = os.stat(img_path).st_mtime_ns
+        key_str = img_path + ':' + str(mtime) + ':' + str(size[0]) + 'x' + str(size[1])
+
+        return os.path.join(self.store_dir, hashlib.sha1(key_str.encode()).hexdigest() + THUMBNAIL_SUFFIX)
+
+    def decode(self, img_path):
+        with profiler.phase('image decoding'):
+            with Image.open(img_path) as img:
+                img.load()
+                return img.copy()
+
+    ''' Load thumbnail from disk or make it from the full size image '''
+    def load_thumbnail(self, img_path, size):
+        store_path = None
+
+        if self.store_dir is not None:
+            try:
+                store_path = self.get_store_path(img_path, size)
+
+                if os.path.exists(store_path):
+                    img = self.decode(store_path)
+
+                    ''' Modification time is the last use for the eviction '''
+                    os.utime(store_path)
+
+                    return img
+            except OSError:
+                store_path = None
+
+        img = self.get(img_path).resize(size)
+
+        if store_path is not None:
+            self.save_to_store(store_path, img)
+
+        return img
+
+    ''' Disk cache is optional, write errors are ignored
+        New thumbnails are rare (new or changed resources), the old ones are evicted then
+    '''
+    def save_to_store(self, store_path, img):
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(suffix=THUMBNAIL_SUFFIX, dir=self.store_dir)
+
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, format='PNG')
+
+            os.replace(tmp_path, store_path)
+
+            evict_cache_files([(self.store_dir, THUMBNAIL_SUFFIX)], self.max_size, self.max_age)
+        except OSError:
+            pass
+
+    ''' Get image, full size if size is None '''
+    def get(self, img_path, size=None):
+        img_path = os.path.abspath(img_path)
+
+        if size is not None:
+            size = tuple(size)
+
+        key = (img_path, size)
+        img = self.images.get(key)
+
+        if img is None:
+            if size is None:
+                img = self.decode(img_path)
+            else:
+                img = self.load_thumbnail(img_path, size)
+
+            self.images[key] = img
+
+        return img
+
+device_img_cache = DeviceImgCache(get_default_store_dir())
+
+def get_device_img(img_path, size=None):
+    return device_img_cache.get(img_path, size)
@@ -24,61 +24,71 @@ import gettext
 import datetime
 from entity import *
 from dishy_data import *
-from obstruction_img_gen import generate_img_from_list
+from schema import Schema, Field, Text, FORMAT_FLAT
+from obstruction_img_gen import get_obstruction_img, obstruction_img_cache
 
 _ = gettext.gettext
 
 ###
 
+''' Fields of the dish section, reachability is stored next to the status wrapper in the new exports '''
+DISH_SCHEMA = Schema('Dish', [
+    Field('reachable', DISH_REACHABLE_KEY, False, outer=True),
+    Field('cloud_access', DISH_CLOUD_ACCESS_KEY, False, outer=True),
+    Field('hardware_version', DEVICE_HARDWARE_VERSION_KEY, None, outer=True, intern=True)
+])
+
+DISH_DEVICE_INFO_SCHEMA = Schema('Dish device info', [
+    Field('device_id', (DEVICE_INFO_KEY, DEVICE_INFO_ID_KEY), Text('Unknown')),
+    Field('sw_version', (DEVICE_INFO_KEY, DEVICE_INFO_SW_VER_KEY), Text('Unknown'), intern=True),
+    Field('sw_build_id', (DEVICE_INFO_KEY, DEVICE_INFO_SW_BUILD_ID_KEY), Text('-')),
+    Field('hw_version', (DEVICE_INFO_KEY, DEVICE_INFO_HW_VER_KEY), Text('Unknown'), intern=True),
+    Field('hw_board_rev', (DEVICE_INFO_KEY, DEVICE_INFO_HW_BOARD_REV_KEY), 0),
+    Field('mf_version', (DEVICE_INFO_KEY, DEVICE_INFO_MF_VER_KEY), Text('Unknown'), intern=True),
+    Field('gen_number', (DEVICE_INFO_KEY, DEVICE_INFO_GEN_NUMBER), 0),
+    Field('country_code', (DEVICE_INFO_KEY, DEVICE_INFO_CC_KEY), Text('Unknown'), intern=True),
+    Field('utc_off_hours', (DEVICE_INFO_KEY, DEVICE_INFO_UTC_OFF_KEY), 0),
+    Field('sw_parts_eq', (DEVICE_INFO_KEY, DEVICE_INFO_SW_PARTS_EQ_KEY), False),
+    Field('is_developer', (DEVICE_INFO_KEY, DEVICE_INFO_IS_DEV_KEY), False),
+    Field('boot_count', (DEVICE_INFO_KEY, DEVICE_INFO_BOOT_COUNT_KEY), 0),
+    Field('anti_rollback_version', (DEVICE_INFO_KEY, DEVICE_INFO_ANTI_ROLLBACK_KEY), 0),
+    Field('dishy_cohoused', (DEVICE_INFO_KEY, DEVICE_DISH_COHOUSED_KEY), False),
+    Field('timestamp', DEVICE_TIMESTAMP_KEY, 0),
+    Field('uptime', (DEVICE_STATE_KEY, DEVICE_UPTIME_KEY), 0),
+    Field('has_actuators', DEVICE_HAS_ACTUATORS_KEY, 0, ActuatorStatus),
+    Field('stow_requested', DEVICE_STOW_REQUESTED_KEY, False),
+    Field('mobility_class', DEVICE_MOBILITY_CLASS_KEY, 0, MobylityClass),
+    Field('class_of_serivce', DEVICE_CLASS_OF_SERVICE_KEY, 0, ServiceClass),
+    Field('disablement_code', DEVICE_DISABLEMENT_CODE_KEY, 0, DisablementCode),
+    Field('software_upd_state', DEVICE_SOFTWARE_UPDATE_ST_KEY, 0, SoftwareUpdateState)
+])
+
 ''' Starlink Dishy info parser and formatter '''
 class Dishy(Entity):
+    __slots__ = ('hardware_version',) + DISH_DEVICE_INFO_SCHEMA.get_attributes()
+
     def __init__(self, json_object):
         print("Loading Dish")
 
-        dish_object = json_object
-
-        if STATUS_KEY in json_object:
-          dish_object = json_object[STATUS_KEY]
-        elif RAW_STATUS_KEY in json_object:
-          dish_object = json_object[RAW_STATUS_KEY]
-
-        dish_reachable = False
-        dish_cloud_access = False
-
-        if DISH_REACHABLE_KEY in json_object:
-          dish_reachable = json_object[DISH_REACHABLE_KEY]
-        elif DISH_REACHABLE_KEY in dish_object:
-          dish_reachable = dish_object[DISH_REACHABLE_KEY]
-
-        if DISH_CLOUD_ACCESS_KEY in json_object:
-          dish_cloud_access = json_object[DISH_CLOUD_ACCESS_KEY]
-        elif DISH_CLOUD_ACCESS_KEY in dish_object:
-          dish_cloud_access = dish_object[DISH_CLOUD_ACCESS_KEY]
+        dish_object = DISH_SCHEMA.load(self, json_object)
 
-        if DEVICE_HARDWARE_VERSION_KEY in json_object:
-          self.hardware_version = json_object[DEVICE_HARDWARE_VERSION_KEY]
-        elif DEVICE_HARDWARE_VERSION_KEY in dish_object:
-          self.hardware_version = dish_object[DEVICE_HARDWARE_VERSION_KEY]
-
-        super().__init__('Dish', dish_reachable, dish_cloud_access)
+        super().__init__('Dish', self.reachable, self.cloud_access)
 
         if self.reachable and not self.parse_device_info(dish_object):
             raise Exception(_('Failed to load Dish Device Info'))
 
-        self.plugins = []
-
         ''' Load additional data plugins '''
         if self.reachable:
-            self.plugins.append(DishyNetwork(dish_object))
-            self.plugins.append(DishyGPS(dish_object))
-            self.plugins.append(DishyAntenna(dish_object))
-            self.plugins.append(DishyAlignmentStats(dish_object))
-            self.plugins.append(ModuleAlerts(dish_object))
-            self.plugins.append(ModuleConfig(dish_object))
-            self.plugins.append(Features(dish_object))
-            self.plugins.append(DishyReadyStates(dish_object))
-            self.plugins.append(DishyOutage(dish_object))
-            self.plugins.append(DishyObstructions(dish_object))
+            self.add_plugin(DishyNetwork, dish_object)
+            self.add_plugin(DishyGPS, dish_object)
+            self.add_plugin(DishyAntenna, dish_object)
+            self.add_plugin(DishyAlignmentStats, dish_object)
+            self.add_plugin(ModuleAlerts, dish_object)
+            self.add_plugin(ModuleConfig, dish_object)
+            self.add_plugin(Features, dish_object)
+            self.add_plugin(DishyReadyStates, dish_object)
+            self.add_plugin(DishyOutage, dish_object)
+            self.add_plugin(DishyObstructions, dish_object)
 
     '''  This is SpaceX device '''
     def is_sx_device(self):
@@ -105,18 +115,18 @@ class Dishy(Entity):
 
             result[_('Hardware revision')] = self.hw_version
 
-            if hasattr(self, 'hardware_version'):
+            if self.hardware_version is not None:
               result[_('Hardware Version')] = self.hardware_version
 
             result[_('Board revision')] = self.hw_board_rev
             result[_('Software version')] = self.sw_version
             result[_('Software Build ID')] = self.sw_build_id
             result[_('Software build date (UTC)')] = firmware_unix_time.strftime('%Y %B %d  %H:%M:%S')
-            result[_('Software update state')] = software_update_state_str[self.software_upd_state]
+            result[_('Software update state')] = _(software_update_state_str[self.software_upd_state])
             result[_('User terminal ID')] = self.device_id
             result[_('Development hardware')] = self.yes_or_no(self.is_developer)
 #            result[_('Starlink cohoused')] = self.yes_or_no(self.dishy_cohoused)
-            result[_('Actuators')] = actuator_status_str[self.has_actuators]
+            result[_('Actuators')] = _(actuator_status_str[self.has_actuators])
             result[_('Stow requested')] = self.yes_or_no(self.stow_requested)
 
             if self.mf_version != '':
@@ -138,77 +148,43 @@ class Dishy(Entity):
 
             result['  '] = ''
 
-            result[_('Class of service')] = service_class_str[self.class_of_serivce]
-            result[_('Mobility class')] = mobility_class_str[self.mobility_class]
-            result[_('Service state')] = disablement_code_str[self.disablement_code]
+            result[_('Class of service')] = _(service_class_str[self.class_of_serivce])
+            result[_('Mobility class')] = _(mobility_class_str[self.mobility_class])
+            result[_('Service state')] = _(disablement_code_str[self.disablement_code])
 
     ''' Parse JSON data '''
     def parse_device_info(self, json_object):
-            dish_object = json_object
-
-            if STATUS_KEY in json_object:
-                dish_object = json_object[STATUS_KEY]
-
-            if DEVICE_INFO_KEY not in dish_object:
+            if DEVICE_INFO_KEY not in json_object:
                 return False
 
-            device_info = dish_object[DEVICE_INFO_KEY]
-            device_state = dish_object[DEVICE_STATE_KEY]
-
-            self.device_id = device_info.get(DEVICE_INFO_ID_KEY, _('Unknown'))
-            self.sw_version = device_info.get(DEVICE_INFO_SW_VER_KEY, _('Unknown'))
-            self.sw_build_id = device_info.get(DEVICE_INFO_SW_BUILD_ID_KEY, _('-'))
-            self.hw_version = device_info.get(DEVICE_INFO_HW_VER_KEY, _('Unknown'))
-            self.hw_board_rev = device_info.get(DEVICE_INFO_HW_BOARD_REV_KEY, 0)
-            self.mf_version = device_info.get(DEVICE_INFO_MF_VER_KEY, _('Unknown'))
-            self.gen_number = device_info.get(DEVICE_INFO_GEN_NUMBER , 0)
-            self.country_code = device_info.get(DEVICE_INFO_CC_KEY, _('Unknown'))
-            self.utc_off_hours = device_info.get(DEVICE_INFO_UTC_OFF_KEY, 0)
-            self.sw_parts_eq = device_info.get(DEVICE_INFO_SW_PARTS_EQ_KEY, False)
-            self.is_developer = device_info.get(DEVICE_INFO_IS_DEV_KEY, False)
-            self.boot_count = device_info.get(DEVICE_INFO_BOOT_COUNT_KEY, 0)
-            self.anti_rollback_version = device_info.get(DEVICE_INFO_ANTI_ROLLBACK_KEY, 0)
-            self.dishy_cohoused = device_info.get(DEVICE_DISH_COHOUSED_KEY, False)
-
-            self.timestamp = dish_object.get(DEVICE_TIMESTAMP_KEY, 0)
-            self.uptime = device_state.get(DEVICE_UPTIME_KEY, 0)
-
-            self.has_actuators = ActuatorStatus(dish_object.get(DEVICE_HAS_ACTUATORS_KEY, 0))
-            self.stow_requested = dish_object.get(DEVICE_STOW_REQUESTED_KEY, False)
-            self.mobility_class = MobylityClass(dish_object.get(DEVICE_MOBILITY_CLASS_KEY, 0))
-            self.class_of_serivce = ServiceClass(dish_object.get(DEVICE_CLASS_OF_SERVICE_KEY, 0))
-            self.disablement_code = DisablementCode(dish_object.get(DEVICE_DISABLEMENT_CODE_KEY, 0))
-
-            self.software_upd_state = SoftwareUpdateState(dish_object.get(DEVICE_SOFTWARE_UPDATE_ST_KEY, 0))
+            DISH_DEVICE_INFO_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
             return True
 
-    ''' Return additional data '''
-    def get_additional_data(self, result):
-        for plugin in self.plugins:
-            if plugin.is_data_ready():
-                result[plugin.get_name()] = plugin.get_data()
-
 
 ''' Additional data plugins '''
 
 ''' Network info '''
+DISH_NETWORK_SCHEMA = Schema('Dish network', [
+    Field('ether_speed', DEVICE_ETHER_SPEED_KEY, 100),
+    Field('downlink_tput_bps', NET_DOWNLINK_TPUT_BPS_KEY, 0),
+    Field('uplink_tput_bps', NET_UPLINK_TPUT_BPS_KEY, 0),
+    Field('pop_ping_latency', NET_POP_PING_LATENCY_MS_KEY, 0),
+    Field('pop_ping_drop_rate', NET_POP_PING_DROP_RATE_KEY, 0),
+    Field('senconds_to_first_non_empty_slot', NET_SECONDS_TO_FIRST_NON_EMPTY_SLOT_KEY, 0)
+])
+
 class DishyNetwork(EntityModule):
+    __slots__ = DISH_NETWORK_SCHEMA.get_attributes()
+    plugin_name = 'Network'
+
     def __init__(self, json_object):
         super().__init__()
 
-        self.ether_speed = json_object.get(DEVICE_ETHER_SPEED_KEY, 100)
-        self.downlink_tput_bps = json_object.get(NET_DOWNLINK_TPUT_BPS_KEY, 0)
-        self.uplink_tput_bps = json_object.get(NET_UPLINK_TPUT_BPS_KEY, 0)
-        self.pop_ping_latency = json_object.get(NET_POP_PING_LATENCY_MS_KEY, 0)
-        self.pop_ping_drop_rate = json_object.get(NET_POP_PING_DROP_RATE_KEY, 0)
-        self.senconds_to_first_non_empty_slot = json_object.get(NET_SECONDS_TO_FIRST_NON_EMPTY_SLOT_KEY, 0)
+        DISH_NETWORK_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'Network'
-
     def get_data(self):
         eht_text = str(self.ether_speed) + ' Mbps ' + ('(slow, check your cable or device)' \
                     if self.ether_speed < 1000 else '(nominal)')
@@ -225,25 +201,27 @@ class DishyNetwork(EntityModule):
         return [ _('Network'), data ]
 
 ''' GPS info '''
+DISH_GPS_SCHEMA = Schema('Dish GPS', [
+    Field('gps_valid', (DEVICE_GPS_STATS_KEY, DEVICE_GPS_STATS_GPS_VALID_KEY), False),
+    Field('gps_sats', (DEVICE_GPS_STATS_KEY, DEVICE_GPS_STATS_GPS_SATS_KEY), 0),
+    Field('gps_no_sats_after_fix', (DEVICE_GPS_STATS_KEY, DEVICE_GPS_STATS_NO_SATS_AFTER_FFIX_KEY), False),
+    Field('gps_inhibit', (DEVICE_GPS_STATS_KEY, DEVICE_GPS_INHIBIT_KEY), False)
+])
+
 class DishyGPS(EntityModule):
+    __slots__ = DISH_GPS_SCHEMA.get_attributes()
+    plugin_name = 'GPS'
+
     def __init__(self, json_object):
         super().__init__()
 
         if DEVICE_GPS_STATS_KEY not in json_object:
             return None
 
-        gps_stats = json_object[DEVICE_GPS_STATS_KEY]
-
-        self.gps_valid = gps_stats.get(DEVICE_GPS_STATS_GPS_VALID_KEY, False)
-        self.gps_sats = gps_stats.get(DEVICE_GPS_STATS_GPS_SATS_KEY, 0)
-        self.gps_no_sats_after_fix = gps_stats.get(DEVICE_GPS_STATS_NO_SATS_AFTER_FFIX_KEY, False)
-        self.gps_inhibit = gps_stats.get(DEVICE_GPS_INHIBIT_KEY, False)
+        DISH_GPS_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'GPS'
-
     def get_data(self):
         data = [
             [ _('GPS valid'),  self.yes_or_no(self.gps_valid) ],
@@ -255,60 +233,66 @@ class DishyGPS(EntityModule):
         return [ _('GPS'), data ]
 
 ''' Alignment stats '''
+DISH_ALIGNMENT_SCHEMA = Schema('Dish alignment', [
+    Field('has_actuators', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_HAS_ACTUATORS_KEY), 0, ActuatorStatus),
+    Field('actuator_state', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_ALIGNMENT_STATS_ACTUATOR_STATE_KEY), 0, ActuatorState),
+    Field('tilt_angle', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_ALIGNMENT_STATS_TILT_ANGLE_DEG_KEY), 0),
+    Field('boresight_az_deg', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_BORESIGHT_AZIMUTH_DEG_KEY), 0),
+    Field('boresight_el_deg', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_BORESIGHT_ELEVATION_DEG_KEY), 0),
+    Field('desired_boresight_azimuth_deg', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_DESIRED_BORESIGHT_AZ_DEG_KEY), 0),
+    Field('desired_boresight_elevation_deg', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_DESIRED_BORESIGHT_EL_DEG_KEY), 0),
+    Field('attitude_est_state', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_ALIGNMENT_STATS_ATTITUDE_ESTIMATION_STATE_KEY), 0, AttitudeEstimationState),
+    Field('attitude_uncert', (DEVICE_ALIGNMENT_STATS_KEY, DEVICE_ALIGNMENT_STATS_ATTITUDE_UNCERTANITY_DEG_KEY), 0)
+])
+
 class DishyAlignmentStats(EntityModule):
+    __slots__ = DISH_ALIGNMENT_SCHEMA.get_attributes()
+    plugin_name = 'Alignment'
+
     def __init__(self, json_object):
         super().__init__()
 
         if DEVICE_ALIGNMENT_STATS_KEY not in json_object:
             return None
 
-        self.stats = json_object[DEVICE_ALIGNMENT_STATS_KEY]
-
-        self.has_actuators = ActuatorStatus(self.stats.get(DEVICE_HAS_ACTUATORS_KEY, 0))
-        self.actuator_state = ActuatorState(self.stats.get(DEVICE_ALIGNMENT_STATS_ACTUATOR_STATE_KEY, 0))
-        self.tilt_angle = self.stats.get(DEVICE_ALIGNMENT_STATS_TILT_ANGLE_DEG_KEY, 0)
-        self.boresight_az_deg = self.stats.get(DEVICE_BORESIGHT_AZIMUTH_DEG_KEY, 0)
-        self.boresight_el_deg = self.stats.get(DEVICE_BORESIGHT_ELEVATION_DEG_KEY, 0)
-        self.desired_boresight_azimuth_deg = self.stats.get(DEVICE_DESIRED_BORESIGHT_AZ_DEG_KEY, 0)
-        self.desired_boresight_elevation_deg = self.stats.get(DEVICE_DESIRED_BORESIGHT_EL_DEG_KEY, 0)
-        self.attitude_est_state = AttitudeEstimationState(self.stats.get(DEVICE_ALIGNMENT_STATS_ATTITUDE_ESTIMATION_STATE_KEY, 0))
-        self.attitude_uncert = self.stats.get(DEVICE_ALIGNMENT_STATS_ATTITUDE_UNCERTANITY_DEG_KEY, 0)
+        DISH_ALIGNMENT_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'Alignment'
-
     def get_data(self):
         data = [
-            [ _('Actuators'), actuator_status_str[self.has_actuators] ],
-            [ _('Actuator state'), actuator_state_str[self.actuator_state] ],
+            [ _('Actuators'), _(actuator_status_str[self.has_actuators]) ],
+            [ _('Actuator state'), _(actuator_state_str[self.actuator_state]) ],
             [ _('Tilt angle, deg'), self.tilt_angle ],
             [ _('Panel boresight Azimuth angle, deg'), self.boresight_az_deg ],
             [ _('Panel boresight Elevation agngle, deg'), self.boresight_el_deg ],
             [ _('Panel desired boresight Azimuth angle, deg'), self.desired_boresight_azimuth_deg],
             [ _('Panel desired boresight Elevation angle, deg'), self.desired_boresight_elevation_deg],
-            [ _('Attitude Estimation State'), attitude_estimation_state_str[self.attitude_est_state]],
+            [ _('Attitude Estimation State'), _(attitude_estimation_state_str[self.attitude_est_state]) ],
             [ _('Attitude Uncertainty, deg'), self.attitude_uncert ]
         ]
 
         return [ _('Alignment'), data ]
 
 ''' Basic antenna info '''
+DISH_ANTENNA_SCHEMA = Schema('Dish antenna', [
+    Field('snr_above_noise_floor', DEVICE_IS_SNR_ABOVE_NOISE_FLOOR_KEY, False),
+    Field('snr_persistently_low', DEVICE_IS_SNR_PERSISTENTLY_LOW_KEY, False),
+    Field('boresight_az_deg', DEVICE_BORESIGHT_AZIMUTH_DEG_KEY, 0),
+    Field('boresight_el_deg', DEVICE_BORESIGHT_ELEVATION_DEG_KEY, 0)
+])
+
 class DishyAntenna(EntityModule):
+    __slots__ = DISH_ANTENNA_SCHEMA.get_attributes()
+    plugin_name = 'Antenna'
+
     def __init__(self, json_object):
         super().__init__()
 
-        self.snr_above_noise_floor = json_object.get(DEVICE_IS_SNR_ABOVE_NOISE_FLOOR_KEY, False)
-        self.snr_persistently_low = json_object.get(DEVICE_IS_SNR_PERSISTENTLY_LOW_KEY, False)
-        self.boresight_az_deg = json_object.get(DEVICE_BORESIGHT_AZIMUTH_DEG_KEY, 0)
-        self.boresight_el_deg = json_object.get(DEVICE_BORESIGHT_ELEVATION_DEG_KEY, 0)
+        DISH_ANTENNA_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'Antenna'
-
     def get_data(self):
         data = [
             [ _('Signal level'), _('Good') if self.snr_above_noise_floor else _('Bad') ],
@@ -320,7 +304,20 @@ class DishyAntenna(EntityModule):
         return [ _('Antenna'), data ]
 
 ''' Ready states '''
+DISH_READY_STATES_SCHEMA = Schema('Dish ready states', [
+    Field('cady', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_CADY_KEY), False),
+    Field('scp', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_SCP_KEY), False),
+    Field('l1l2', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_L1L2_KEY), False),
+    Field('l1l2_2', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_L1L2_KEY_2), False),
+    Field('xphy', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_XPHY_KEY), False),
+    Field('aap', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_AAP_KEY), False),
+    Field('rf', (DEVICE_READY_STATES_KEY, DEVICE_READY_STATES_RF_KEY), False)
+])
+
 class DishyReadyStates(EntityModule):
+    __slots__ = DISH_READY_STATES_SCHEMA.get_attributes() + ('init_durations',)
+    plugin_name = 'ReadyStates'
+
     def __init__(self, json_object):
         super().__init__()
 
@@ -329,14 +326,10 @@ class DishyReadyStates(EntityModule):
 
         self.init_durations = None
 
-        ready_states = json_object[DEVICE_READY_STATES_KEY]
+        DISH_READY_STATES_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
-        self.cady = ready_states.get(DEVICE_READY_STATES_CADY_KEY, False)
-        self.scp = ready_states.get(DEVICE_READY_STATES_SCP_KEY, False)
-        self.l1l2 = ready_states.get(DEVICE_READY_STATES_L1L2_KEY, False) or ready_states.get(DEVICE_READY_STATES_L1L2_KEY_2, False)
-        self.xphy = ready_states.get(DEVICE_READY_STATES_XPHY_KEY, False)
-        self.aap = ready_states.get(DEVICE_READY_STATES_AAP_KEY, False)
-        self.rf = ready_states.get(DEVICE_READY_STATES_RF_KEY, False)
+        ''' Key was renamed in the newer firmware '''
+        self.l1l2 = self.l1l2 or self.l1l2_2
 
         if DEVICE_INIT_DURATION_SEC_KEY in json_object:
             init_dur = json_object[DEVICE_INIT_DURATION_SEC_KEY]
@@ -356,9 +349,6 @@ class DishyReadyStates(EntityModule):
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'ReadyStates'
-
     def get_data(self):
         data = [
             [ _('Clock generator'),  self.yes_or_no(self.cady) ],
@@ -373,28 +363,30 @@ class DishyReadyStates(EntityModule):
         return [ _('Ready states'), data ]
 
 ''' Outages info '''
+DISH_OUTAGE_SCHEMA = Schema('Dish outage', [
+    Field('cause', (DEVICE_OUTAGE_KEY, DEVICE_OUTAGE_CAUSE_KEY), 0, OutageCause),
+    Field('start_timestamp_ns', (DEVICE_OUTAGE_KEY, DEVICE_OUTAGE_START_TIMESTAMP_NS_KEY), 0),
+    Field('outage_duration_ns', (DEVICE_OUTAGE_KEY, DEVICE_OUTAGE_DURATION_NS_KEY), 0),
+    Field('did_switch', (DEVICE_OUTAGE_KEY, DEVICE_OUTAGE_DID_SWITCH_KEY), False)
+])
+
 class DishyOutage(EntityModule):
+    __slots__ = DISH_OUTAGE_SCHEMA.get_attributes()
+    plugin_name = 'Outage'
+
     def __init__(self, json_object):
         super().__init__()
 
         if DEVICE_OUTAGE_KEY not in json_object:
             return None
 
-        outage_data = json_object[DEVICE_OUTAGE_KEY]
-
-        self.cause = OutageCause(outage_data.get(DEVICE_OUTAGE_CAUSE_KEY, 0))
-        self.start_timestamp_ns = outage_data.get(DEVICE_OUTAGE_START_TIMESTAMP_NS_KEY, 0)
-        self.outage_duration_ns = outage_data.get(DEVICE_OUTAGE_DURATION_NS_KEY, 0)
-        self.did_switch = outage_data.get(DEVICE_OUTAGE_DID_SWITCH_KEY, False)
+        DISH_OUTAGE_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'Outage'
-
     def get_data(self):
         data = [
-            [ _('Cause'), outage_cause_str[self.cause] ],
+            [ _('Cause'), _(outage_cause_str[self.cause]) ],
             [ _('Start timestamp, ns'), self.start_timestamp_ns ],
             [ _('Duration, ns'), self.outage_duration_ns ],
             [ _('Did switch'), self.yes_or_no(self.did_switch) ]
@@ -403,37 +395,55 @@ class DishyOutage(EntityModule):
         return [ _('Outage'), data ]
 
 ''' Obstructions info '''
+DISH_OBSTRUCTIONS_SCHEMA = Schema('Dish obstructions', [
+    Field('currently_obstructed', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_CURRENTLY_OBSTRUCTED_KEY), False),
+    Field('fraction_obstructed', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_FRACTION_OBSTRUCTED_KEY), 0),
+    Field('time_obstructed', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_TIME_OBSTRUCTED_KEY), 0),
+    Field('valid_sec', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_VALID_SEC_KEY), 0),
+    Field('patches_valid', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_PATCHES_VALID_KEY), 0),
+    Field('frac_obstr_list', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_WEDGE_FRAC_OBSTRUCTED_LIST_KEY), ()),
+    Field('abs_obstr_list', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_WEDGE_ABS_OBSTRUCTED_LIST_KEY), ()),
+    Field('avg_pr_dur_sec', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_DURATION_SEC_KEY), 0),
+    Field('avg_pr_int_sec', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_INTERVAL_SEC_KEY), 0),
+    Field('avg_pr_valid', (DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_VALID), False)
+])
+
 class DishyObstructions(EntityModule):
+    __slots__ = DISH_OBSTRUCTIONS_SCHEMA.get_attributes()
+    plugin_name = 'Obstructions'
+
     def __init__(self, json_object):
         super().__init__()
 
         if DEVICE_OBSTRUCTION_STATS_KEY not in json_object:
             return None
 
-        obstr_data = json_object[DEVICE_OBSTRUCTION_STATS_KEY]
+        DISH_OBSTRUCTIONS_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
-        self.currently_obstructed = obstr_data.get(DEVICE_OBSTRUCTION_STATS_CURRENTLY_OBSTRUCTED_KEY, False)
-        self.fraction_obstructed = obstr_data.get(DEVICE_OBSTRUCTION_STATS_FRACTION_OBSTRUCTED_KEY, 0)
-        self.time_obstructed = obstr_data.get(DEVICE_OBSTRUCTION_STATS_TIME_OBSTRUCTED_KEY, 0)
-        self.valid_sec = obstr_data.get(DEVICE_OBSTRUCTION_STATS_VALID_SEC_KEY, 0)
-        self.patches_valid = obstr_data.get(DEVICE_OBSTRUCTION_STATS_PATCHES_VALID_KEY, 0)
-        self.frac_obstr_list = obstr_data.get(DEVICE_OBSTRUCTION_STATS_WEDGE_FRAC_OBSTRUCTED_LIST_KEY, [])
-        self.abs_obstr_list = obstr_data.get(DEVICE_OBSTRUCTION_STATS_WEDGE_ABS_OBSTRUCTED_LIST_KEY, [])
-        self.avg_pr_dur_sec = obstr_data.get(DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_DURATION_SEC_KEY, 0)
-        self.avg_pr_int_sec = obstr_data.get(DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_INTERVAL_SEC_KEY, 0)
-        self.avg_pr_valid = obstr_data.get(DEVICE_OBSTRUCTION_STATS_AVG_PROLONGED_OBSTR_VALID, False)
+        self.data_ready = True
 
-        self.image = None
 
-        if len(self.frac_obstr_list):
-            self.image = generate_img_from_list(self.frac_obstr_list)
+    def has_img(self):
+        return len(self.frac_obstr_list) > 0
 
-        self.data_ready = True
+    ''' Images are cached, identical wedge lists are rendered only once '''
+    def get_image(self, size=None):
+        if not len(self.frac_obstr_list):
+            return None
 
-    def get_name(self):
-        return 'Obstructions'
+        return get_obstruction_img(self.frac_obstr_list, size)
 
-    def get_data(self):
+    ''' PNG file of the image, only when the cache has a disk store '''
+    def get_image_path(self, size=None):
+        if not self.has_img():
+            return None
+
+        return obstruction_img_cache.get_store_path(self.frac_obstr_list, size)
+
+    ''' Image is rendered at img_size, so it's shown without resizing
+        Without img_size there is no image: headless tools don't show it, rendering is skipped
+    '''
+    def get_data(self, img_size=None):
         data = [
             [ _('Currently obstructed'), self.yes_or_no(self.currently_obstructed) ],
             [ _('Fraction obstructed'), self.fraction_obstructed ],
@@ -443,7 +453,7 @@ class DishyObstructions(EntityModule):
             [ _('Average prolonged obstruction duration, sec'), self.avg_pr_dur_sec ],
             [ _('Average prolonged obstruction interval, sec'), self.avg_pr_int_sec],
             [ _('Average prolonged obstruction valid'), self.yes_or_no(self.avg_pr_valid) ],
-            [ 'image_blob', self.image ]
+            [ 'image_blob', self.get_image(img_size) if img_size is not None else None ]
         ]
 
         return [ _('Obstructions'), data ]
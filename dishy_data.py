@@ -19,13 +19,13 @@
 #set tabstop=4
 
 from enum import Enum
-import gettext
 from common_data import *
 
-gettext.bindtextdomain('space-debugger', './locales')
-gettext.textdomain('space-debugger')
-
-_ = gettext.gettext
+''' Strings are only marked for xgettext here,
+    they are translated when displayed
+'''
+def _(message):
+    return message
 
 dev_images = {
     'rev1_pre_production': 'resources/devices/dishy_v1.png',
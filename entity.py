@@ -23,14 +23,44 @@ import gettext
 from common_data import DEVICE_ALERTS_KEY
 from common_data import DEVICE_FEATURES_KEY
 from common_data import DEVICE_CONFIG_KEY
+from startup_profiler import profiler
 _ = gettext.gettext
 
-''' Basic class for all entities like Dishy, Router, Local device '''
+''' Plugin registration, the plugin parses its section only on first access '''
+class LazyPlugin:
+    __slots__ = ('plugin_class', 'json_object', 'plugin')
+
+    def __init__(self, plugin_class, json_object):
+        self.plugin_class = plugin_class
+        self.json_object = json_object
+        self.plugin = None
+
+    def get_name(self):
+        return self.plugin_class.plugin_name
+
+    def is_loaded(self):
+        return self.plugin is not None
+
+    def get(self):
+        if self.plugin is None:
+            with profiler.phase('plugin ' + self.plugin_class.__name__):
+                self.plugin = self.plugin_class(self.json_object)
+
+            self.json_object = None
+
+        return self.plugin
+
+''' Basic class for all entities like Dishy, Router, Local device
+    Entities and plugins use __slots__, many parsed snapshots can be kept in memory
+'''
 class Entity:
+    __slots__ = ('name', 'reachable', 'cloud_access', 'plugins')
+
     def __init__(self, name, reachable, cloud_access):
         self.name = name
         self.reachable = reachable
         self.cloud_access = cloud_access
+        self.plugins = []
 
     def get_module_readable_name(self):
         return _(self.name)
@@ -54,17 +84,69 @@ class Entity:
     def is_sx_device(self):
         return False
 
-    def get_additional_data(self, result):
-        return False
+    ''' Register additional data plugin, it's loaded on first access '''
+    def add_plugin(self, plugin_class, json_object):
+        self.plugins.append(LazyPlugin(plugin_class, json_object))
+
+    def get_plugin_names(self):
+        return [lazy_plugin.get_name() for lazy_plugin in self.plugins]
+
+    ''' Get plugin by name, None if there is no such plugin '''
+    def get_plugin(self, plugin_name):
+        for lazy_plugin in self.plugins:
+            if lazy_plugin.get_name() == plugin_name:
+                return lazy_plugin.get()
+
+        return None
+
+    def get_plugins(self):
+        return [lazy_plugin.get() for lazy_plugin in self.plugins]
+
+    ''' Load all plugins, so the source JSON is not referenced anymore '''
+    def compact(self):
+        for lazy_plugin in self.plugins:
+            lazy_plugin.get()
+
+        return self
+
+    ''' Return additional data, optionally only for the selected plugins
+        Plugins parse their sections here, the plugin which fails gets the error row,
+        so one broken section doesn't hide the rest of the data.
+        Plugins with images render them at img_size, images are not rendered without it
+    '''
+    def get_additional_data(self, result, plugin_names=None, img_size=None):
+        for lazy_plugin in self.plugins:
+            if plugin_names is not None and lazy_plugin.get_name() not in plugin_names:
+                continue
+
+            try:
+                plugin = lazy_plugin.get()
+            except Exception as err:
+                print('Failed to load ' + lazy_plugin.get_name() + ': ' + str(err))
+                result[lazy_plugin.get_name()] = [ _(lazy_plugin.get_name()), [[_('Error'), str(err)]] ]
+                continue
+
+            if not plugin.is_data_ready():
+                continue
+
+            if img_size is not None and plugin.has_img():
+                result[plugin.get_name()] = plugin.get_data(img_size)
+            else:
+                result[plugin.get_name()] = plugin.get_data()
 
 ''' Basic class for additional data plugins '''
 class EntityModule:
+    __slots__ = ('data_ready',)
+
     def __init__(self):
         self.data_ready = False
 
     def yes_or_no(self, bool_val):
         return _('Yes') if bool_val else _('No')
 
+    def get_name(self):
+        return self.plugin_name
+
     def has_img(self):
         return False
 
@@ -94,6 +176,9 @@ def words_to_str(words):
     return good_str
 
 class ModuleAlerts(EntityModule):
+    __slots__ = ('no_alerts', 'data', 'words', 'alert_keys')
+    plugin_name = 'Alerts'
+
     def __init__(self, json_object):
         super().__init__()
 
@@ -106,19 +191,20 @@ class ModuleAlerts(EntityModule):
         alerts_data = json_object.get(DEVICE_ALERTS_KEY)
 
         self.words = []
+
+        ''' Raw names of the active alerts, like thermalThrottle '''
+        self.alert_keys = ()
  
         if alerts_data is not None:
-            for alert in alerts_data:
-               if alerts_data[alert]:
-                    self.words = camel_case_split(alert)
-                    self.data.append([' ', words_to_str(self.words)])
+            self.alert_keys = tuple(alert for alert in alerts_data if alerts_data[alert])
+
+            for alert in self.alert_keys:
+                self.words = camel_case_split(alert)
+                self.data.append([' ', words_to_str(self.words)])
 
         self.no_alerts = not len(self.data)
         self.data_ready = True
 
-    def get_name(self):
-        return 'Alerts'
-
     def get_data(self):
         if self.no_alerts:
             return [ _('Alerts'), [[' ', _('No alerts')]] ]
@@ -126,6 +212,9 @@ class ModuleAlerts(EntityModule):
         return [ _('Alerts'), self.data ]
 
 class ModuleConfig(EntityModule):
+    __slots__ = ('no_config', 'data', 'words')
+    plugin_name = 'Config'
+
     def __init__(self, json_object):
         super().__init__()
 
@@ -146,9 +235,6 @@ class ModuleConfig(EntityModule):
         self.no_config = not len(self.data)
         self.data_ready = True
 
-    def get_name(self):
-        return 'Config'
-
     def get_data(self):
         if self.no_config:
             return [ _('Config'), [[' ', _('No config exposed')]] ]
@@ -156,6 +242,9 @@ class ModuleConfig(EntityModule):
         return [ _('Config'), self.data ]
 
 class Features(EntityModule):
+    __slots__ = ('no_features', 'data', 'words')
+    plugin_name = 'Features'
+
     def __init__(self, json_object):
         super().__init__()
 
@@ -176,9 +265,6 @@ class Features(EntityModule):
         self.no_features = not len(self.data)
         self.data_ready = True
 
-    def get_name(self):
-        return 'Features'
-
     def get_data(self):
         if self.no_features:
             return [ _('Features'), [[' ', _('No features')]] ]
@@ -0,0 +1,108 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Field projection: the fast path for analytics
+    Raw values are taken by key paths like 'dish.popPingLatencyMs' or
+    'dish.obstructionStats.fractionObstructed', no entities or plugins
+    are created and nothing is formatted or translated.
+    Path is the top-level section key followed by the keys inside of the section,
+    the key constants from the *_data.py modules can be used to build them.
+'''
+
+from schema import detect_format, unwrap
+from json_loader import load_json_file
+
+PATH_SEPARATOR = '.'
+
+MISSING = object()
+
+def lookup(obj, keys):
+    for key in keys:
+        if not isinstance(obj, dict):
+            return MISSING
+
+        obj = obj.get(key, MISSING)
+
+        if obj is MISSING:
+            return MISSING
+
+    return obj
+
+class FieldExtractor:
+    def __init__(self, paths, default=None):
+        self.paths = list(paths)
+        self.default = default
+        self.compiled = []
+        self.sections = []
+
+        for path in self.paths:
+            keys = path.split(PATH_SEPARATOR)
+
+            if len(keys) < 2:
+                raise ValueError('Path should start with the section key: ' + path)
+
+            self.compiled.append((keys[0], tuple(keys[1:])))
+
+            if keys[0] not in self.sections:
+                self.sections.append(keys[0])
+
+    ''' Values in the order of paths
+        Keys are searched inside of the status wrapper first, then next to it
+        (like 'reachable' in the new export format)
+    '''
+    def extract(self, json_data):
+        unwrapped = {}
+
+        for section_key in self.sections:
+            section = json_data.get(section_key)
+
+            if isinstance(section, dict):
+                unwrapped[section_key] = (unwrap(section, detect_format(section)), section)
+
+        values = []
+
+        for section_key, keys in self.compiled:
+            objects = unwrapped.get(section_key)
+            value = MISSING
+
+            if objects is not None:
+                value = lookup(objects[0], keys)
+
+                if value is MISSING and objects[1] is not objects[0]:
+                    value = lookup(objects[1], keys)
+
+            values.append(self.default if value is MISSING else value)
+
+        return tuple(values)
+
+    def extract_dict(self, json_data):
+        return dict(zip(self.paths, self.extract(json_data)))
+
+    ''' Load only the required sections of the file and extract values '''
+    def extract_file(self, json_file_path):
+        return self.extract(load_json_file(json_file_path, self.sections))
+
+def extract(json_data, paths, as_dict=False, default=None):
+    extractor = FieldExtractor(paths, default)
+
+    if as_dict:
+        return extractor.extract_dict(json_data)
+
+    return extractor.extract(json_data)
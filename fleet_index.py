@@ -0,0 +1,436 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Fleet index: metadata of many debug exports in a local SQLite database
+    Exports are parsed by the Dishy/Router/DeviceApp entities in worker processes,
+    one row per entity is stored with the device info, key metrics and active alerts.
+    Files are written in batched transactions, database uses WAL journal.
+    Files are stored by the absolute path, so the same file given by another
+    relative path is the same entry. Files with the same (path, size, mtime)
+    are skipped on the next ingest, changed files replace their old rows.
+'''
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import multiprocessing
+from core import load_json_file, read_entities
+from dishy import Dishy, DishyNetwork, DishyObstructions
+from router import Router, RouterNetwork
+from device_app import DeviceApp
+from entity import ModuleAlerts
+from space_dbg_batch import collect_files, JSON_PATTERNS
+
+INDEX_VERSION = 1
+
+''' Files are committed in batches of this size '''
+BATCH_SIZE = 500
+
+ENTITY_NAMES = { Dishy: 'dish', Router: 'router', DeviceApp: 'device' }
+
+SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    entity TEXT NOT NULL,
+    reachable INTEGER NOT NULL,
+    device_id TEXT,
+    hw_version TEXT,
+    sw_version TEXT,
+    country_code TEXT,
+    timestamp INTEGER,
+    uptime INTEGER,
+    boot_count INTEGER,
+    pop_ping_latency_ms REAL,
+    pop_ping_drop_rate REAL,
+    downlink_tput_bps REAL,
+    uplink_tput_bps REAL,
+    fraction_obstructed REAL,
+    currently_obstructed INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS snapshots_file ON snapshots(file_id);
+CREATE INDEX IF NOT EXISTS snapshots_device ON snapshots(device_id, timestamp);
+CREATE INDEX IF NOT EXISTS snapshots_hw ON snapshots(hw_version);
+CREATE INDEX IF NOT EXISTS snapshots_sw ON snapshots(sw_version);
+CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots(timestamp);
+CREATE INDEX IF NOT EXISTS snapshots_obstructed ON snapshots(fraction_obstructed);
+CREATE INDEX IF NOT EXISTS alerts_name ON alerts(name, snapshot_id);
+CREATE INDEX IF NOT EXISTS alerts_snapshot ON alerts(snapshot_id);
+'''
+
+''' Snapshot columns in the insert order '''
+SNAPSHOT_COLUMNS = ('entity', 'reachable', 'device_id', 'hw_version', 'sw_version', 'country_code',
+                    'timestamp', 'uptime', 'boot_count', 'pop_ping_latency_ms', 'pop_ping_drop_rate',
+                    'downlink_tput_bps', 'uplink_tput_bps', 'fraction_obstructed', 'currently_obstructed')
+
+''' Columns printed by the query '''
+QUERY_COLUMNS = ('path', 'entity', 'device_id', 'hw_version', 'sw_version', 'timestamp',
+                    'fraction_obstructed', 'pop_ping_latency_ms', 'alerts')
+
+''' Some values are exported as strings, like the uptime '''
+def to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+''' Plugin of the entity if it has data, only this plugin is parsed '''
+def get_ready_plugin(entity, plugin_class):
+    plugin = entity.get_plugin(plugin_class.plugin_name)
+
+    if plugin is None or not plugin.is_data_ready():
+        return None
+
+    return plugin
+
+''' Snapshot row values and active alert names of the entity '''
+def entity_to_row(entity):
+    values = dict.fromkeys(SNAPSHOT_COLUMNS)
+    values['entity'] = ENTITY_NAMES[type(entity)]
+    values['reachable'] = int(bool(entity.is_reachable()))
+    alerts = ()
+
+    if not entity.is_reachable():
+        return tuple(values[column] for column in SNAPSHOT_COLUMNS), alerts
+
+    values['device_id'] = getattr(entity, 'device_id', None) or None
+    values['timestamp'] = to_int(getattr(entity, 'timestamp', None))
+    values['uptime'] = to_int(getattr(entity, 'uptime', None))
+
+    if isinstance(entity, DeviceApp):
+        values['hw_version'] = entity.device_model or None
+        values['sw_version'] = entity.device_app_version
+    else:
+        values['hw_version'] = entity.hw_version
+        values['sw_version'] = entity.sw_version
+        values['country_code'] = entity.country_code
+        values['boot_count'] = to_int(entity.boot_count)
+
+    if isinstance(entity, Dishy):
+        network = get_ready_plugin(entity, DishyNetwork)
+
+        if network is not None:
+            values['pop_ping_latency_ms'] = to_float(network.pop_ping_latency)
+            values['pop_ping_drop_rate'] = to_float(network.pop_ping_drop_rate)
+            values['downlink_tput_bps'] = to_float(network.downlink_tput_bps)
+            values['uplink_tput_bps'] = to_float(network.uplink_tput_bps)
+
+        obstructions = get_ready_plugin(entity, DishyObstructions)
+
+        if obstructions is not None:
+            values['fraction_obstructed'] = to_float(obstructions.fraction_obstructed)
+            values['currently_obstructed'] = int(bool(obstructions.currently_obstructed))
+    elif isinstance(entity, Router):
+        network = get_ready_plugin(entity, RouterNetwork)
+
+        if network is not None:
+            values['pop_ping_latency_ms'] = to_float(network.pop_ping_latency_ms)
+            values['pop_ping_drop_rate'] = to_float(network.pop_ping_drop_rate)
+
+    alerts_plugin = get_ready_plugin(entity, ModuleAlerts)
+
+    if alerts_plugin is not None:
+        alerts = alerts_plugin.alert_keys
+
+    return tuple(values[column] for column in SNAPSHOT_COLUMNS), alerts
+
+''' Pool worker: parse one file, returns (path, size, mtime_ns, rows, error) '''
+def index_file(file_info):
+    json_file_path, size, mtime_ns = file_info
+    rows = []
+
+    try:
+        entities = read_entities(load_json_file(json_file_path))
+
+        for key in sorted(entities):
+            rows.append(entity_to_row(entities[key]))
+    except Exception as err:
+        return json_file_path, size, mtime_ns, [], type(err).__name__ + ': ' + str(err)
+
+    return json_file_path, size, mtime_ns, rows, None
+
+''' Entities print loading messages, keep the workers quiet '''
+def init_worker():
+    sys.stdout = open(os.devnull, 'w')
+
+class FleetIndex:
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('PRAGMA foreign_keys=ON')
+
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+
+        if version not in (0, INDEX_VERSION):
+            raise Exception('Unsupported index version: ' + str(version))
+
+        with self.db:
+            self.db.executescript(SCHEMA_SQL)
+            self.db.execute('PRAGMA user_version=%d' % INDEX_VERSION)
+
+    def close(self):
+        self.db.close()
+
+    ''' Files which are new or changed since the last ingest, with their size and mtime '''
+    def get_changed_files(self, files):
+        known = {}
+
+        for path, size, mtime_ns in self.db.execute('SELECT path, size, mtime_ns FROM files'):
+            known[path] = (size, mtime_ns)
+
+        changed = []
+
+        for json_file_path in files:
+            json_file_path = os.path.abspath(json_file_path)
+
+            try:
+                st = os.stat(json_file_path)
+            except OSError as err:
+                print(json_file_path + ': ' + str(err), file=sys.stderr)
+                continue
+
+            if known.get(json_file_path) != (st.st_size, st.st_mtime_ns):
+                changed.append((json_file_path, st.st_size, st.st_mtime_ns))
+
+        return changed
+
+    ''' Store parsed file, old rows of the file are removed by the cascade '''
+    def add_file(self, json_file_path, size, mtime_ns, rows, error):
+        self.db.execute('DELETE FROM files WHERE path = ?', (json_file_path,))
+
+        cursor = self.db.execute('INSERT INTO files (path, size, mtime_ns, error) VALUES (?, ?, ?, ?)',
+                                    (json_file_path, size, mtime_ns, error))
+        file_id = cursor.lastrowid
+
+        for values, alerts in rows:
+            cursor = self.db.execute('INSERT INTO snapshots (file_id, ' + ', '.join(SNAPSHOT_COLUMNS) + ') VALUES (?' +
+                                        ', ?' * len(SNAPSHOT_COLUMNS) + ')', (file_id,) + values)
+            snapshot_id = cursor.lastrowid
+
+            self.db.executemany('INSERT INTO alerts (snapshot_id, name) VALUES (?, ?)',
+                                    [(snapshot_id, name) for name in alerts])
+
+    ''' Parse and store files in worker processes, returns (indexed, skipped, errors) '''
+    def ingest(self, files, jobs, chunk_size=None):
+        changed = self.get_changed_files(files)
+        indexed = 0
+        errors = 0
+
+        if not len(changed):
+            return 0, len(files), 0
+
+        if chunk_size is None:
+            chunk_size = max(1, min(64, len(changed) // (jobs * 4)))
+
+        with multiprocessing.Pool(jobs, initializer=init_worker) as pool:
+            self.db.execute('BEGIN')
+
+            for result in pool.imap_unordered(index_file, changed, chunk_size):
+                self.add_file(*result)
+                indexed = indexed + 1
+
+                if result[4] is not None:
+                    errors = errors + 1
+
+                if indexed % BATCH_SIZE == 0:
+                    self.db.commit()
+                    self.db.execute('BEGIN')
+
+            self.db.commit()
+
+        return indexed, len(files) - len(changed), errors
+
+    ''' WHERE clause and its parameters for the snapshot filters, see query() '''
+    def get_filter(self, entity, device_id, hw_version, sw_version, country_code, alerts, min_obstructed, start, end):
+        conditions = []
+        params = []
+
+        for column, value in (('s.entity', entity), ('s.device_id', device_id), ('s.hw_version', hw_version),
+                                ('s.sw_version', sw_version), ('s.country_code', country_code)):
+            if value is not None:
+                conditions.append(column + ' = ?')
+                params.append(value)
+
+        if min_obstructed is not None:
+            conditions.append('s.fraction_obstructed > ?')
+            params.append(min_obstructed)
+
+        if start is not None:
+            conditions.append('s.timestamp >= ?')
+            params.append(start)
+
+        if end is not None:
+            conditions.append('s.timestamp < ?')
+            params.append(end)
+
+        for name in alerts:
+            conditions.append('s.id IN (SELECT snapshot_id FROM alerts WHERE name = ?)')
+            params.append(name)
+
+        if not len(conditions):
+            return '', params
+
+        return ' WHERE ' + ' AND '.join(conditions), params
+
+    ''' Snapshots matching all given filters, alerts should be active all together
+        Fraction obstructed is 0..1, 0.05 means 5%
+    '''
+    def query(self, entity=None, device_id=None, hw_version=None, sw_version=None, country_code=None,
+                alerts=(), min_obstructed=None, start=None, end=None, limit=None):
+        where, params = self.get_filter(entity, device_id, hw_version, sw_version, country_code,
+                                        alerts, min_obstructed, start, end)
+
+        sql = 'SELECT f.path, s.entity, s.device_id, s.hw_version, s.sw_version, s.timestamp, ' \
+                's.fraction_obstructed, s.pop_ping_latency_ms, ' \
+                '(SELECT group_concat(name, \' \') FROM alerts WHERE snapshot_id = s.id) ' \
+                'FROM snapshots s JOIN files f ON f.id = s.file_id' + where + \
+                ' ORDER BY s.device_id, s.timestamp'
+
+        if limit is not None:
+            sql = sql + ' LIMIT ?'
+            params.append(limit)
+
+        return self.db.execute(sql, params).fetchall()
+
+    ''' Number of the snapshots query() would return, rows are only counted by SQLite '''
+    def count(self, entity=None, device_id=None, hw_version=None, sw_version=None, country_code=None,
+                alerts=(), min_obstructed=None, start=None, end=None, limit=None):
+        where, params = self.get_filter(entity, device_id, hw_version, sw_version, country_code,
+                                        alerts, min_obstructed, start, end)
+
+        sql = 'SELECT s.id FROM snapshots s' + where
+
+        if limit is not None:
+            sql = sql + ' LIMIT ?'
+            params.append(limit)
+
+        return self.db.execute('SELECT count(*) FROM (' + sql + ')', params).fetchone()[0]
+
+    ''' Number of indexed files, snapshots and files with errors '''
+    def get_stats(self):
+        return self.db.execute('SELECT (SELECT count(*) FROM files), (SELECT count(*) FROM snapshots), ' \
+                                '(SELECT count(*) FROM files WHERE error IS NOT NULL)').fetchone()
+
+def format_csv_value(value):
+    if value is None:
+        return ''
+
+    value = str(value)
+
+    if ',' in value or '"' in value:
+        return '"' + value.replace('"', '""') + '"'
+
+    return value
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Space Debugger fleet index')
+    ''' Not required=True, it needs Python 3.7 '''
+    subparsers = parser.add_subparsers(dest='command')
+
+    ingest_parser = subparsers.add_parser('ingest', help='Parse JSON exports and add them to the index, unchanged files are skipped')
+    ingest_parser.add_argument('index', help='Index database file')
+    ingest_parser.add_argument('sources', nargs='+', help='Input JSON files, directories or glob patterns')
+    ingest_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='Number of worker processes')
+    ingest_parser.add_argument('-c', '--chunk-size', type=int, default=None, help='Number of files sent to a worker at once')
+
+    subparsers.add_parser('stats', help='Print number of indexed files and snapshots').add_argument('index', help='Index database file')
+
+    query_parser = subparsers.add_parser('query', help='Print matching snapshots as CSV')
+    query_parser.add_argument('index', help='Index database file')
+    query_parser.add_argument('-e', '--entity', choices=sorted(ENTITY_NAMES.values()), default=None, help='Entity type')
+    query_parser.add_argument('-d', '--device', default=None, help='Device id')
+    query_parser.add_argument('--hw', default=None, help='Hardware version, like rev4_prod2')
+    query_parser.add_argument('--sw', default=None, help='Software version')
+    query_parser.add_argument('--country', default=None, help='Country code')
+    query_parser.add_argument('-a', '--alert', action='append', default=[], help='Active alert, like thermalThrottle. Can be repeated')
+    query_parser.add_argument('--min-obstructed', type=float, default=None, help='Fraction obstructed greater than, 0.05 is 5%%')
+    query_parser.add_argument('--start', type=int, default=None, help='First timestamp, unix time')
+    query_parser.add_argument('--end', type=int, default=None, help='Timestamp after the last one, unix time')
+    query_parser.add_argument('-n', '--limit', type=int, default=None, help='Maximum number of rows')
+    query_parser.add_argument('--count', action='store_true', help='Print only the number of matching snapshots')
+
+    args = parser.parse_args()
+
+    if args.command is None:
+        parser.error('command is required: ingest, stats or query')
+
+    try:
+        index = FleetIndex(args.index)
+    except Exception as err:
+        print(args.index + ': ' + str(err), file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'ingest':
+        files = collect_files(args.sources, JSON_PATTERNS)
+
+        if not len(files):
+            print('No input files found', file=sys.stderr)
+            sys.exit(1)
+
+        start_time = time.monotonic()
+        indexed, skipped, errors = index.ingest(files, max(1, args.jobs), args.chunk_size)
+
+        print('Indexed %d files, %d unchanged, %d errors, %.2f sec' % (indexed, skipped, errors, time.monotonic() - start_time),
+                file=sys.stderr)
+    elif args.command == 'stats':
+        print('Files: %d, snapshots: %d, errors: %d' % index.get_stats())
+    else:
+        start_time = time.monotonic()
+
+        filters = (args.entity, args.device, args.hw, args.sw, args.country, args.alert,
+                    args.min_obstructed, args.start, args.end, args.limit)
+
+        if args.count:
+            count = index.count(*filters)
+            print(count)
+        else:
+            rows = index.query(*filters)
+            count = len(rows)
+            print(','.join(QUERY_COLUMNS))
+
+            for row in rows:
+                print(','.join(format_csv_value(value) for value in row))
+
+        print('%d snapshots, %.1f ms' % (count, (time.monotonic() - start_time) * 1000), file=sys.stderr)
+
+    index.close()
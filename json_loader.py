@@ -0,0 +1,409 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+import io
+import os
+import re
+import bz2
+import gzip
+import json
+import lzma
+import mmap
+import codecs
+import locale
+import zipfile
+import dishy
+import router
+import device_app
+from startup_profiler import profiler
+
+''' Top-level sections consumed by the entities '''
+ENTITY_SECTIONS = (dishy.DISH_KEY, router.ROUTER_KEY, device_app.DEVICE_KEY)
+
+''' Files with one snapshot per line (JSON Lines / NDJSON) '''
+NDJSON_EXTENSIONS = ('.jsonl', '.ndjson')
+
+''' Compression is detected by the magic bytes, suffixes are used only to find the files '''
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bz2'),
+    (b'PK\x03\x04', 'zip'),
+    (b'PK\x05\x06', 'zip')
+)
+
+MAGIC_SIZE = 6
+
+COMPRESSION_SUFFIXES = ('.gz', '.xz', '.bz2')
+
+''' Smaller files are just read, mapping doesn't pay off '''
+MMAP_MIN_SIZE = 64 * 1024
+
+''' Streams are decompressed on the fly, nothing is extracted to disk '''
+COMPRESSED_OPENERS = { 'gzip': gzip.open, 'xz': lzma.open, 'bz2': bz2.open }
+
+''' Largest uncompressed zip member, exports are much smaller, so larger ones are not read at all '''
+ZIP_MEMBER_MAX_SIZE = 1024 * 1024 * 1024
+
+WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+
+''' Everything JSON has outside of strings except brackets: separators, numbers and literals
+    (NaN and Infinity too, json.loads accepts them).
+    Strings are matched as a whole, so brackets inside of them are ignored.
+    Other characters stop the match, so garbage in the skipped sections is found
+'''
+SKIP_RE = re.compile(r'(?:[ \t\n\r,:0-9.eE+\-truefalsnNIiy]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+''' Closing bracket of the opening one '''
+CLOSING_BRACKETS = { '{': '}', '[': ']' }
+
+''' Detect encoding by BOM or by the zero bytes pattern of the first characters (RFC 4627) '''
+def detect_encoding(head):
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+
+    if head.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return 'utf-32'
+
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    if len(head) >= 4:
+        if not head[0] and not head[1] and not head[2]:
+            return 'utf-32-be'
+        if not head[1] and not head[2] and not head[3]:
+            return 'utf-32-le'
+
+    if len(head) >= 2:
+        if not head[0]:
+            return 'utf-16-be'
+        if not head[1]:
+            return 'utf-16-le'
+
+    return 'utf-8'
+
+''' Decode file data, non UTF exports are decoded with the system encoding
+    Any buffer can be given, e.g. memory-mapped file, it's decoded without a copy
+'''
+def decode_json_bytes(data):
+    encoding = detect_encoding(bytes(data[:4]))
+
+    try:
+        return str(data, encoding)
+    except UnicodeDecodeError:
+        return str(data, locale.getpreferredencoding(False))
+
+def skip_whitespace(text, idx):
+    return WHITESPACE_RE.match(text, idx).end()
+
+''' Skip JSON value without building Python objects, returns index after the value
+    Brackets must match and only the characters of JSON tokens may be between them,
+    the tokens themselves and their order inside of the skipped value aren't checked. Errors are raised as JSONDecodeError (ValueError)
+'''
+def skip_value(text, idx, decoder):
+    c = text[idx:idx + 1]
+
+    if c == '"':
+        return json.decoder.scanstring(text, idx + 1)[1]
+
+    if c != '{' and c != '[':
+        ''' Number, true, false or null '''
+        return decoder.raw_decode(text, idx)[1]
+
+    ''' Expected closing brackets of the open values '''
+    stack = []
+    text_len = len(text)
+
+    while idx < text_len:
+        c = text[idx]
+
+        if c == '{' or c == '[':
+            stack.append(CLOSING_BRACKETS[c])
+        elif c == '}' or c == ']':
+            if stack.pop() != c:
+                raise json.JSONDecodeError('Mismatched bracket', text, idx)
+
+            if not len(stack):
+                return idx + 1
+        elif c == '"':
+            raise json.JSONDecodeError('Unterminated string', text, idx)
+        else:
+            raise json.JSONDecodeError('Unexpected character', text, idx)
+
+        idx = SKIP_RE.match(text, idx + 1).end()
+
+    raise json.JSONDecodeError('Unterminated value', text, idx)
+
+''' Scan keys of the top-level JSON object
+    read_value(key, idx) is called for every value and returns the index after it
+'''
+def scan_json_object(text, read_value):
+    idx = skip_whitespace(text, 0)
+
+    if text[idx:idx + 1] != '{':
+        raise json.JSONDecodeError('Expecting object', text, idx)
+
+    idx = skip_whitespace(text, idx + 1)
+
+    if text[idx:idx + 1] == '}':
+        idx = idx + 1
+    else:
+        while True:
+            if text[idx:idx + 1] != '"':
+                raise json.JSONDecodeError('Expecting property name enclosed in double quotes', text, idx)
+
+            key, idx = json.decoder.scanstring(text, idx + 1)
+            idx = skip_whitespace(text, idx)
+
+            if text[idx:idx + 1] != ':':
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, idx)
+
+            idx = read_value(key, skip_whitespace(text, idx + 1))
+            idx = skip_whitespace(text, idx)
+            c = text[idx:idx + 1]
+
+            if c == '}':
+                idx = idx + 1
+                break
+
+            if c != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
+
+            idx = skip_whitespace(text, idx + 1)
+
+    if skip_whitespace(text, idx) != len(text):
+        raise json.JSONDecodeError('Extra data', text, idx)
+
+''' Parse only the required top-level sections of the JSON object
+    Keys are scanned one by one, other sections are skipped without being materialized
+'''
+def parse_json_sections(text, sections):
+    decoder = json.JSONDecoder()
+    result = {}
+
+    def read_value(key, idx):
+        if key in sections:
+            result[key], idx = decoder.raw_decode(text, idx)
+            return idx
+
+        return skip_value(text, idx, decoder)
+
+    scan_json_object(text, read_value)
+
+    return result
+
+''' Raw JSON text of the required top-level sections, nothing is parsed
+    Used to compare sections without building objects
+'''
+def split_json_sections(text, sections=ENTITY_SECTIONS):
+    decoder = json.JSONDecoder()
+    result = {}
+
+    def read_value(key, idx):
+        end = skip_value(text, idx, decoder)
+
+        if key in sections:
+            result[key] = text[idx:end]
+
+        return end
+
+    scan_json_object(text, read_value)
+
+    return result
+
+def detect_compression(head):
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+
+    return None
+
+def get_compression(json_file_path):
+    with open(json_file_path, 'rb') as f:
+        return detect_compression(f.read(MAGIC_SIZE))
+
+''' File name without the compression suffix, e.g. export.json.gz -> export.json '''
+def strip_compression_suffix(file_name):
+    base, ext = os.path.splitext(file_name)
+
+    if ext.lower() in COMPRESSION_SUFFIXES:
+        return base
+
+    return file_name
+
+''' JSON documents in the zip archive, compressed ones too '''
+def get_zip_json_members(zip_file):
+    return [ info.filename for info in zip_file.infolist()
+                if not info.is_dir() and strip_compression_suffix(info.filename).lower().endswith('.json') ]
+
+''' Zip member info, members larger than the limit are refused before reading '''
+def get_zip_member_info(zip_file, member_name):
+    info = zip_file.getinfo(member_name)
+
+    if info.file_size > ZIP_MEMBER_MAX_SIZE:
+        raise ValueError('Archive member %s is too large: %d bytes' % (member_name, info.file_size))
+
+    return info
+
+''' Content of the zip member, compressed members are decompressed while reading
+    Decompressed data is limited by the same size as the member
+'''
+def read_zip_member(zip_file, member_name):
+    with zip_file.open(get_zip_member_info(zip_file, member_name)) as member_file:
+        compression = detect_compression(member_file.peek(MAGIC_SIZE)[:MAGIC_SIZE])
+
+        if compression in COMPRESSED_OPENERS:
+            with COMPRESSED_OPENERS[compression](member_file, 'rb') as f:
+                data = f.read(ZIP_MEMBER_MAX_SIZE + 1)
+        else:
+            data = member_file.read()
+
+    if len(data) > ZIP_MEMBER_MAX_SIZE:
+        raise ValueError('Archive member %s is too large when decompressed' % member_name)
+
+    return data
+
+''' Binary stream of the file content, compressed files are decompressed on the fly
+    Zip archive is opened when it has only one JSON document, bundles are read by members
+'''
+def open_json_stream(json_file_path):
+    compression = get_compression(json_file_path)
+
+    if compression is None:
+        return open(json_file_path, 'rb')
+
+    if compression != 'zip':
+        return COMPRESSED_OPENERS[compression](json_file_path, 'rb')
+
+    with zipfile.ZipFile(json_file_path) as zip_file:
+        members = get_zip_json_members(zip_file)
+
+        if len(members) != 1:
+            raise ValueError('Archive has %d JSON documents, open them with the batch analyzer' % len(members))
+
+        if strip_compression_suffix(members[0]) != members[0]:
+            return io.BytesIO(read_zip_member(zip_file, members[0]))
+
+        ''' Member stream keeps the archive file open until it's closed '''
+        return zip_file.open(get_zip_member_info(zip_file, members[0]))
+
+''' Decode the memory-mapped file: text is decoded right from the page cache, so there is
+    no bytes copy of the whole file next to the text. Encoding is detected by the first bytes,
+    the mapping is released right after decoding, before anything is parsed.
+    None is returned for small and compressed files, they are read as usual
+'''
+def read_mapped_json_text(json_file_path):
+    with open(json_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            return None
+
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    with data:
+        if detect_compression(data[:MAGIC_SIZE]) is not None:
+            return None
+
+        return decode_json_bytes(data)
+
+''' Read and decode the file '''
+def read_json_text(json_file_path):
+    text = read_mapped_json_text(json_file_path)
+
+    if text is not None:
+        return text
+
+    with open_json_stream(json_file_path) as f:
+        return decode_json_bytes(f.read())
+
+''' Parse the decoded document, only sections used by the entities are parsed,
+    use sections=None to get the whole document
+'''
+def load_json_text(text, sections=ENTITY_SECTIONS):
+    if sections is None:
+        return json.loads(text)
+
+    return parse_json_sections(text, sections)
+
+''' Load Starlink JSON data from the file, gzip, xz, bz2 and single-document zip files are decompressed
+    File is read once, only sections used by the entities are parsed,
+    use sections=None to get the whole document.
+    Errors are raised to the caller, GUI and batch tools handle them differently
+'''
+def load_json_file(json_file_path, sections=ENTITY_SECTIONS):
+    return load_json_text(read_json_text(json_file_path), sections)
+
+def is_ndjson_file(json_file_path):
+    return os.path.splitext(strip_compression_suffix(json_file_path))[1].lower() in NDJSON_EXTENSIONS
+
+''' Lines of the NDJSON file from the byte offset: (line offset, next line offset, line bytes)
+    Offsets of the compressed files are in the decompressed data.
+    The newline after the last line is optional. When the file is followed, the last line
+    without it may be still being written: with partial_tail it's left for the next read.
+    Only one line is kept in memory, blank lines are skipped
+'''
+def iter_ndjson_lines(json_file_path, offset=0, partial_tail=False):
+    with open_json_stream(json_file_path) as f:
+        if offset:
+            f.seek(offset)
+
+        for line in f:
+            if partial_tail and not line.endswith(b'\n'):
+                return
+
+            next_offset = offset + len(line)
+
+            if line.strip():
+                yield offset, next_offset, line
+
+            offset = next_offset
+
+''' Parse one NDJSON line, errors are raised like for the whole file '''
+def parse_ndjson_line(line):
+    json_data = json.loads(line)
+
+    if not isinstance(json_data, dict):
+        raise ValueError('Unexpected JSON data format')
+
+    return json_data
+
+''' Create entities from the Starlink JSON data
+    Hacky way to keep tabs in required order: keys are prefixed with a letter
+'''
+def read_entities(json_data):
+    entities = {}
+
+    if not isinstance(json_data, dict):
+        raise Exception('Unexpected JSON data format')
+
+    for entry in json_data:
+        if entry == dishy.DISH_KEY:
+            with profiler.phase('entity Dishy'):
+                entities['A' + entry] = dishy.Dishy(json_data[dishy.DISH_KEY])
+        elif entry == router.ROUTER_KEY:
+            with profiler.phase('entity Router'):
+                entities['B' + entry] = router.Router(json_data[router.ROUTER_KEY])
+        elif entry == device_app.DEVICE_KEY:
+            with profiler.phase('entity DeviceApp'):
+                entities['C' + entry] = device_app.DeviceApp(json_data[device_app.DEVICE_KEY])
+
+    return entities
@@ -0,0 +1,438 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Live mode: poll dish and router status over HTTP
+    Every section is requested from <url>/<section key>, e.g. http://127.0.0.1:8080/dish,
+    the response is the same JSON object as the section of the debug data export.
+    Polling runs on asyncio: connections are kept alive and reused,
+    the number of requests in flight is limited.
+    The stand-in server serves recorded exports for testing without a dish.
+'''
+
+import sys
+import json
+import time
+import queue
+import asyncio
+import argparse
+import datetime
+import threading
+import socketserver
+import urllib.parse
+import http.server
+from dishy_data import DISH_KEY, DISH_REACHABLE_KEY
+from router_data import ROUTER_KEY, ROUTER_REACHABLE_KEY
+from json_loader import load_json_file, decode_json_bytes
+
+DEFAULT_URL = 'http://127.0.0.1:8080'
+DEFAULT_INTERVAL = 10
+DEFAULT_TIMEOUT = 5
+DEFAULT_MAX_IN_FLIGHT = 2
+
+''' Polled sections and their content when the device doesn't answer '''
+LIVE_SECTIONS = {
+    DISH_KEY: { DISH_REACHABLE_KEY: False },
+    ROUTER_KEY: { ROUTER_REACHABLE_KEY: False }
+}
+
+class HttpError(Exception):
+    pass
+
+''' Run coroutine in a new event loop, works on Python 3.6 too '''
+def run_async(coroutine):
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+''' Minimal HTTP/1.1 client connection, kept open between the requests '''
+class HttpConnection:
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    def is_open(self):
+        return self.writer is not None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+        self.reader = None
+        self.writer = None
+
+    async def get(self, path):
+        reused = self.is_open()
+
+        if not reused:
+            self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+
+        try:
+            return await asyncio.wait_for(self.exchange(path), self.timeout)
+        except ConnectionError:
+            self.close()
+
+            ''' Server may close the idle connection, then it's opened again '''
+            if not reused:
+                raise
+
+        return await self.get(path)
+
+    ''' Malformed response and the connection closed in the middle of it are HttpError '''
+    async def exchange(self, path):
+        request = 'GET ' + path + ' HTTP/1.1\r\nHost: ' + self.host + '\r\n' + \
+                    'Accept: application/json\r\nConnection: keep-alive\r\n\r\n'
+
+        try:
+            self.writer.write(request.encode('ascii'))
+            await self.writer.drain()
+
+            status_line = await self.reader.readline()
+
+            if not status_line:
+                raise ConnectionResetError('Connection closed by the server')
+
+            status_parts = status_line.split()
+
+            if len(status_parts) < 2 or not status_parts[1].isdigit():
+                raise ValueError('Malformed status line ' + repr(status_line[:80]))
+
+            status = int(status_parts[1])
+            headers = {}
+
+            while True:
+                line = await self.reader.readline()
+
+                if line in (b'\r\n', b'\n', b''):
+                    break
+
+                name, sep, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip().lower()
+
+            if headers.get('transfer-encoding') == 'chunked':
+                body = await self.read_chunked()
+            elif 'content-length' in headers:
+                body = await self.reader.readexactly(int(headers['content-length']))
+            else:
+                body = await self.reader.read()
+                headers['connection'] = 'close'
+        except asyncio.CancelledError:
+            ''' Timeout in the middle of the response, connection can't be reused '''
+            self.close()
+            raise
+        except (asyncio.IncompleteReadError, ValueError) as err:
+            self.close()
+            raise HttpError('Bad response for ' + path + ': ' + str(err))
+
+        if headers.get('connection') == 'close':
+            self.close()
+
+        if status != 200:
+            raise HttpError('HTTP error ' + str(status) + ' for ' + path)
+
+        return body
+
+    async def read_chunked(self):
+        chunks = []
+
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+
+            if size == 0:
+                ''' Trailer headers '''
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+
+                return b''.join(chunks)
+
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+''' Poll sections from the URL
+    Snapshots are dicts like the loaded export data: section key -> section object
+'''
+class LivePoller:
+    def __init__(self, url=DEFAULT_URL, interval=DEFAULT_INTERVAL, sections=LIVE_SECTIONS,
+                    max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT):
+        parsed_url = urllib.parse.urlsplit(url)
+
+        if parsed_url.scheme != 'http' or not parsed_url.hostname:
+            raise ValueError('Only http:// URLs are supported: ' + url)
+
+        self.url = url
+        self.host = parsed_url.hostname
+        self.port = parsed_url.port or 80
+        self.base_path = parsed_url.path.rstrip('/')
+        self.interval = interval
+        self.sections = sections
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+
+        ''' Errors of the last poll, section key -> error '''
+        self.errors = {}
+
+        self.idle_connections = []
+        self.semaphore = None
+        self.stop_event = None
+        self.stopped = False
+        self.loop = None
+        self.thread = None
+        self.snapshots = queue.Queue()
+
+    ''' Asyncio objects belong to the loop, so they are created when the loop runs '''
+    def open_session(self):
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.stop_event = asyncio.Event()
+
+    def close_session(self):
+        for connection in self.idle_connections:
+            connection.close()
+
+        self.idle_connections = []
+
+    async def fetch(self, path):
+        async with self.semaphore:
+            if len(self.idle_connections):
+                connection = self.idle_connections.pop()
+            else:
+                connection = HttpConnection(self.host, self.port, self.timeout)
+
+            try:
+                return await connection.get(path)
+            finally:
+                if connection.is_open():
+                    self.idle_connections.append(connection)
+
+    async def fetch_section(self, section_key):
+        try:
+            section = json.loads(decode_json_bytes(await self.fetch(self.base_path + '/' + section_key)))
+
+            if not isinstance(section, dict):
+                raise ValueError('Unexpected JSON data format')
+
+            return section_key, section, None
+        except (OSError, EOFError, HttpError, ValueError, asyncio.TimeoutError) as err:
+            return section_key, dict(self.sections[section_key]), err
+
+    async def poll_once(self):
+        results = await asyncio.gather(*[self.fetch_section(section_key) for section_key in self.sections])
+
+        snapshot = {}
+        self.errors = {}
+
+        for section_key, section, err in results:
+            snapshot[section_key] = section
+
+            if err is not None:
+                self.errors[section_key] = err
+
+        return snapshot
+
+    async def poll_single(self):
+        self.open_session()
+
+        try:
+            return await self.poll_once()
+        finally:
+            self.close_session()
+
+    ''' Poll every interval until stopped or count polls are done, snapshots are passed to the callback '''
+    async def run(self, callback, count=None):
+        self.open_session()
+        loop = asyncio.get_event_loop()
+        polls = 0
+
+        try:
+            while not self.stopped:
+                started = loop.time()
+
+                ''' Failed poll is shown as unreachable devices, polling goes on '''
+                try:
+                    snapshot = await self.poll_once()
+                except Exception as err:
+                    snapshot = dict((section_key, dict(section)) for section_key, section in self.sections.items())
+                    self.errors = dict((section_key, err) for section_key in self.sections)
+
+                callback(snapshot)
+                polls = polls + 1
+
+                if count is not None and polls >= count:
+                    break
+
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), max(0, self.interval - (loop.time() - started)))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.close_session()
+
+    ''' Blocking single poll, e.g. for the first window content '''
+    def poll_sync(self):
+        return run_async(self.poll_single())
+
+    ''' Poll in the background thread, snapshots are read with get_snapshot() '''
+    def start_thread(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self.thread_main, daemon=True)
+        self.thread.start()
+
+    def thread_main(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        try:
+            self.loop.run_until_complete(self.run(self.snapshots.put))
+        finally:
+            self.loop.close()
+
+    ''' Latest snapshot since the last call or None, older ones are dropped '''
+    def get_snapshot(self):
+        snapshot = None
+
+        while True:
+            try:
+                snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return snapshot
+
+    def stop(self):
+        self.stopped = True
+
+        if self.loop is not None and self.stop_event is not None:
+            try:
+                self.loop.call_soon_threadsafe(self.stop_event.set)
+            except RuntimeError:
+                ''' Loop is already closed '''
+                pass
+
+''' Stand-in server for the recorded exports
+    Snapshots are switched every step seconds, so the data changes like on a real dish
+'''
+class RecordedDataHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        section_key = self.path.rstrip('/').rsplit('/', 1)[-1]
+        snapshot = self.server.get_snapshot()
+
+        if section_key not in snapshot:
+            self.send_error(404)
+            return
+
+        body = json.dumps(snapshot[section_key]).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class RecordedDataServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, snapshots, step=DEFAULT_INTERVAL, verbose=False):
+        super().__init__(address, RecordedDataHandler)
+
+        self.snapshots = snapshots
+        self.step = step
+        self.verbose = verbose
+        self.started = time.monotonic()
+
+    def get_snapshot(self):
+        index = int((time.monotonic() - self.started) / self.step) % len(self.snapshots)
+
+        return self.snapshots[index]
+
+def print_snapshot(poller, snapshot, out):
+    ''' Imported here, the poller itself doesn't need the batch tool '''
+    from space_dbg_batch import entity_to_record
+    from json_loader import read_entities
+
+    record = { 'time': datetime.datetime.now().isoformat() }
+
+    for section_key, err in poller.errors.items():
+        print(section_key + ': ' + str(err), file=sys.stderr)
+
+    try:
+        for key, entity in sorted(read_entities(snapshot).items()):
+            record[entity.name.lower()] = entity_to_record(entity)
+    except Exception as err:
+        record['error'] = type(err).__name__ + ': ' + str(err)
+
+    print(json.dumps(record, ensure_ascii=False), file=out, flush=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Space Debugger live polling')
+    ''' Not required=True, it needs Python 3.7 '''
+    subparsers = parser.add_subparsers(dest='command')
+
+    poll_parser = subparsers.add_parser('poll', help='Poll status and print one JSON record per poll')
+    poll_parser.add_argument('url', nargs='?', default=DEFAULT_URL, help='Base URL, default ' + DEFAULT_URL)
+    poll_parser.add_argument('-i', '--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between the polls')
+    poll_parser.add_argument('-n', '--count', type=int, default=None, help='Stop after this number of polls')
+    poll_parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help='Requests running at the same time')
+    poll_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Request timeout, seconds')
+
+    serve_parser = subparsers.add_parser('serve', help='Serve recorded JSON exports like a live device')
+    serve_parser.add_argument('files', nargs='+', help='Recorded JSON exports, served in turn')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('-p', '--port', type=int, default=8080)
+    serve_parser.add_argument('--step', type=float, default=DEFAULT_INTERVAL, help='Seconds before switching to the next file')
+    serve_parser.add_argument('-v', '--verbose', action='store_true', help='Log requests')
+
+    args = parser.parse_args()
+
+    if args.command is None:
+        parser.error('command is required: poll or serve')
+
+    if args.command == 'serve':
+        snapshots = [load_json_file(json_file_path) for json_file_path in args.files]
+        server = RecordedDataServer((args.host, args.port), snapshots, args.step, args.verbose)
+
+        print('Serving ' + str(len(snapshots)) + ' snapshots on http://' + args.host + ':' + str(args.port), file=sys.stderr)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    else:
+        try:
+            poller = LivePoller(args.url, args.interval, max_in_flight=args.max_in_flight, timeout=args.timeout)
+        except ValueError as err:
+            print(err, file=sys.stderr)
+            sys.exit(1)
+
+        ''' Parsers print loading messages, only records go to stdout '''
+        out = sys.stdout
+        sys.stdout = sys.stderr
+
+        try:
+            run_async(poller.run(lambda snapshot: print_snapshot(poller, snapshot, out), args.count))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,262 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Follow NDJSON files like tail -f
+    Collectors append one snapshot per line, only the appended lines are read:
+    the byte offset after the last complete line is kept between the reads.
+    Changes are waited with inotify on Linux, other systems poll the file.
+    Truncated or replaced (rotated) file is read again from the beginning.
+'''
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from json_loader import iter_ndjson_lines, parse_ndjson_line
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+''' Stop request is checked at least that often '''
+WAIT_TIMEOUT = 1.0
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+''' The directory is watched, so the rotated file is noticed too '''
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+''' struct inotify_event: wd, mask, cookie, len, then the name '''
+EVENT_HEADER = struct.Struct('iIII')
+
+EVENTS_BUFFER_SIZE = 64 * 1024
+
+class InotifyWatcher:
+    def __init__(self, file_path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+
+        self.name = os.fsencode(os.path.basename(file_path))
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        dir_path = os.path.dirname(os.path.abspath(file_path))
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, 'inotify_add_watch failed: ' + dir_path)
+
+    ''' Wait for the change of the file, returns False on timeout '''
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                return False
+
+            readable, writable, failed = select.select([self.fd], [], [], remaining)
+
+            if len(readable) and self.read_events():
+                return True
+
+    ''' True if some event is about the followed file '''
+    def read_events(self):
+        try:
+            data = os.read(self.fd, EVENTS_BUFFER_SIZE)
+        except OSError as err:
+            if err.errno == errno.EAGAIN:
+                return False
+            raise
+
+        changed = False
+        pos = 0
+
+        while pos + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, name_len = EVENT_HEADER.unpack_from(data, pos)
+            name = data[pos + EVENT_HEADER.size:pos + EVENT_HEADER.size + name_len].rstrip(b'\0')
+            pos = pos + EVENT_HEADER.size + name_len
+
+            if mask & IN_Q_OVERFLOW or name == self.name:
+                changed = True
+
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+''' Fallback: the follower checks the file after every interval '''
+class PollingWatcher:
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return True
+
+    def close(self):
+        pass
+
+def get_file_watcher(file_path, poll_interval=DEFAULT_POLL_INTERVAL):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(file_path)
+        except (OSError, AttributeError) as err:
+            print('inotify is not available, polling the file: ' + str(err))
+
+    return PollingWatcher(poll_interval)
+
+''' Complete lines appended to the file, like iter_ndjson_lines, but never ends
+    until the stop event is set. Missing file is waited for
+'''
+def follow_ndjson_lines(json_file_path, offset=0, stop_event=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    watcher = get_file_watcher(json_file_path, poll_interval)
+    identity = None
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            try:
+                st = os.stat(json_file_path)
+            except FileNotFoundError:
+                st = None
+
+            if st is not None:
+                if (identity is not None and identity != (st.st_dev, st.st_ino)) or st.st_size < offset:
+                    offset = 0
+
+                identity = (st.st_dev, st.st_ino)
+
+                if st.st_size > offset:
+                    try:
+                        for line_offset, next_offset, line in iter_ndjson_lines(json_file_path, offset, partial_tail=True):
+                            offset = next_offset
+                            yield line_offset, next_offset, line
+                    except FileNotFoundError:
+                        pass
+
+            watcher.wait(WAIT_TIMEOUT)
+    finally:
+        watcher.close()
+
+''' NDJSON file as the source of the viewer snapshots
+    Same interface as live_poller.LivePoller, so the viewer refreshes the tabs
+    with every appended line. Without follow only the last snapshot is shown.
+    Only the latest snapshot is kept, memory doesn't depend on the file size
+'''
+class NdjsonFollower:
+    def __init__(self, json_file_path, follow=True, poll_interval=DEFAULT_POLL_INTERVAL):
+        ''' Shown in the window title '''
+        self.url = json_file_path
+
+        self.json_file_path = json_file_path
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.offset = 0
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    ''' Broken lines are reported and skipped, the next ones may be fine '''
+    def parse_line(self, line_offset, line):
+        try:
+            return parse_ndjson_line(line)
+        except ValueError as err:
+            print('Skipped broken line at offset ' + str(line_offset) + ' of ' + self.json_file_path + ': ' + str(err))
+            return None
+
+    ''' Read the file up to the end, returns the last snapshot
+        Unterminated last line is read too, unless it's followed and may be still being written.
+        Only the last line is parsed, offsets of the previous ones are kept to fall back
+        to them when it's broken
+    '''
+    def poll_sync(self):
+        line_offsets = []
+        last_line = None
+
+        for line_offset, next_offset, line in iter_ndjson_lines(self.json_file_path, self.offset, partial_tail=self.follow):
+            self.offset = next_offset
+            line_offsets.append(line_offset)
+            last_line = line
+
+        while len(line_offsets):
+            line_offset = line_offsets.pop()
+
+            if last_line is None:
+                last_line = self.read_line(line_offset)
+
+            snapshot = self.parse_line(line_offset, last_line)
+            last_line = None
+
+            if snapshot is not None:
+                return snapshot
+
+        raise ValueError('No snapshots in ' + self.json_file_path)
+
+    def read_line(self, line_offset):
+        for offset, next_offset, line in iter_ndjson_lines(self.json_file_path, line_offset):
+            return line
+
+        return b''
+
+    def start_thread(self):
+        if not self.follow:
+            return
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.thread_main, daemon=True)
+        self.thread.start()
+
+    def thread_main(self):
+        for line_offset, next_offset, line in follow_ndjson_lines(self.json_file_path, self.offset,
+                                                                    self.stop_event, self.poll_interval):
+            self.offset = next_offset
+            json_data = self.parse_line(line_offset, line)
+
+            if json_data is not None:
+                with self.lock:
+                    self.snapshot = json_data
+
+    ''' Latest snapshot since the last call or None '''
+    def get_snapshot(self):
+        with self.lock:
+            snapshot = self.snapshot
+            self.snapshot = None
+
+        return snapshot
+
+    def stop(self):
+        self.stop_event.set()
@@ -18,8 +18,13 @@
 #set expandtab
 #set tabstop=4
 
+import os
 import math 
-from PIL import Image, ImageDraw
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from startup_profiler import profiler
 
 img_h = 600
 img_w = 600
@@ -34,45 +39,238 @@ obstruction_line_width = 5
 
 ###
 
-''' Draw line from center to the point on circle using angle and distance '''
-def line_to_deg(draw, ang_deg, dist):
+''' Point on the circle for the angle (North is 0, clockwise) and distance '''
+def point_at_deg(ang_deg, dist, scale):
     ang_rad = math.radians(ang_deg + 270)
 
-    new_x = (dist * math.cos(ang_rad)) + img_w/2
-    new_y = (dist * math.sin(ang_rad)) + img_h/2 + 1
+    x = (dist * math.cos(ang_rad)) + img_w/2
+    y = (dist * math.sin(ang_rad)) + img_h/2 + 1
 
-    draw.line([(img_w/2, img_h/2), (new_x, new_y)], width=obstruction_line_width, fill='#820000')
+    return (x * scale, y * scale)
 
-''' Generate simple obstructions vizualization '''
-def generate_img_from_list(wedge_list):
-    img = Image.new(mode="RGB", size=(img_h, img_w))
+''' Draw obstructed wedge in one step
+    Filled pie slice covers the area of the per-degree lines,
+    two border lines keep the same line width on the wedge edges
+'''
+def draw_wedge(draw, start_deg, dist, scale):
+    center = ((img_w/2) * scale, (img_h/2 + 1) * scale)
+    radius = dist * scale
+    end_deg = start_deg + ang_span - 1
+    line_width = max(1, round(obstruction_line_width * scale))
+
+    draw.pieslice((center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius), \
+                    start=start_deg + 270, end=end_deg + 270, fill='#820000')
+
+    for ang_deg in (start_deg, end_deg):
+        draw.line([((img_w/2) * scale, (img_h/2) * scale), point_at_deg(ang_deg, dist, scale)], \
+                    width=line_width, fill='#820000')
+
+''' Add labels
+    Bitmap font is used, not super readable...
+    Fix this with truetype font ?
+    The font is not scaled: on smaller images the labels would be clipped at the edges,
+    so they are moved inside the image there (clamp_size), otherwise they are drawn as is
+'''
+def draw_labels(draw, scale, clamp_size=None):
+    for x, y, text in ((1, 285, "W"), (595, 285, "E"), (290, 0, "N"), (290, 590, "S")):
+        x = x * scale
+        y = y * scale
+
+        if clamp_size is not None:
+            left, top, right, bottom = draw.textbbox((0, 0), text)
+            x = max(0, min(x, clamp_size - right))
+            y = max(0, min(y, clamp_size - bottom))
+
+        draw.text((x, y), text)
+
+''' Generate simple obstructions vizualization
+    Image is rendered directly at the requested size (square), 600x600 by default
+'''
+def generate_img_from_list(wedge_list, size=None):
+    ''' PIL is loaded only when an image is really needed '''
+    from PIL import Image, ImageDraw
+
+    if size is None:
+        size = img_w
+
+    scale = size / img_w
+
+    img = Image.new(mode="RGB", size=(size, size))
 
     draw = ImageDraw.Draw(img)
 
-    ''' Add labels 
-        Bitmap font is used, not super readable...
-        Fix this with truetype font ?
-    '''
-    draw.text((1,285), "W")
-    draw.text((595,285), "E")
-    draw.text((290, 0), "N")
-    draw.text((290, 590), "S")
+    ''' Full size images have the labels around the circle, as they always had '''
+    if size >= img_w:
+        draw_labels(draw, scale)
 
-    draw.pieslice(nom_outline_box, start=0, end=360, fill="#0067bc")
+    draw.pieslice([c * scale for c in nom_outline_box], start=0, end=360, fill="#0067bc")
 
     start_sect = 0
 
     for item in wedge_list:
         val = item * 100
         if val:
-            for offset in range(0, ang_span):
-                sect_angle = start_sect + offset
-                line_to_deg(draw, sect_angle, max_radius * item)
+            draw_wedge(draw, start_sect, max_radius * item, scale)
 
         start_sect = start_sect + ang_span
 
-    draw.line([(img_w/2, 0), (img_w/2, img_h)], fill='white')
-    draw.line([(0, img_h/2), (img_w, img_h/2)], fill='white')
+    draw.line([(size/2, 0), (size/2, size)], fill='white')
+    draw.line([(0, size/2), (size, size/2)], fill='white')
+
+    ''' Smaller images have no room around the circle, labels are drawn on top of it '''
+    if size < img_w:
+        draw_labels(draw, scale, size)
 
     return img
 
+''' Cache of the rendered obstruction images
+    Static installations produce the same wedge list again and again,
+    so the images are keyed by the hash of the quantized wedge list and the image size.
+    Bounded LRU in memory, optionally backed by the directory with PNG files.
+    Cached images are shared, callers must not modify them.
+'''
+class ObstructionImgCache:
+    def __init__(self, max_items=64, store_dir=None):
+        self.max_items = max_items
+        self.store_dir = store_dir
+        self.images = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        ''' Viewer loader threads and the Tk thread share the cache
+            Images are rendered outside of the lock, the same image may be rendered twice then
+        '''
+        self.lock = threading.Lock()
+
+    def set_store_dir(self, store_dir):
+        if store_dir is not None:
+            os.makedirs(store_dir, exist_ok=True)
+
+        self.store_dir = store_dir
+
+    ''' Values are rounded, tiny float noise should not produce a new image '''
+    def quantize(self, wedge_list):
+        return [round(item, 4) for item in wedge_list]
+
+    def make_key(self, wedge_list, size):
+        key_str = str(size) + ':' + ','.join('%.4f' % item for item in wedge_list)
+        return hashlib.sha1(key_str.encode()).hexdigest()
+
+    def load_from_store(self, key):
+        if self.store_dir is None:
+            return None
+
+        from PIL import Image
+
+        img_path = os.path.join(self.store_dir, key + '.png')
+
+        if not os.path.exists(img_path):
+            return None
+
+        try:
+            with Image.open(img_path) as img:
+                img = img.convert('RGB')
+        except OSError:
+            return None
+
+        ''' Modification time is the last use for the eviction of the parse cache '''
+        try:
+            os.utime(img_path)
+        except OSError:
+            pass
+
+        return img
+
+    ''' Write to a temporary file first, store can be shared by several processes '''
+    def save_to_store(self, key, img):
+        if self.store_dir is None:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.png', dir=self.store_dir)
+
+        with os.fdopen(fd, 'wb') as f:
+            img.save(f, format='PNG')
+
+        os.replace(tmp_path, os.path.join(self.store_dir, key + '.png'))
+
+    def get(self, wedge_list, size=None):
+        if size is None:
+            size = img_w
+
+        wedge_list = self.quantize(wedge_list)
+        key = self.make_key(wedge_list, size)
+
+        with self.lock:
+            img = self.images.get(key)
+
+            if img is not None:
+                self.hits = self.hits + 1
+                self.images.move_to_end(key)
+                return img
+
+        img = self.load_from_store(key)
+        disk_hit = img is not None
+
+        if not disk_hit:
+            with profiler.phase('obstruction image rendering'):
+                img = generate_img_from_list(wedge_list, size)
+
+            self.save_to_store(key, img)
+
+        with self.lock:
+            if disk_hit:
+                self.disk_hits = self.disk_hits + 1
+            else:
+                self.misses = self.misses + 1
+
+            self.images[key] = img
+
+            if len(self.images) > self.max_items:
+                self.images.popitem(last=False)
+
+        return img
+
+    ''' Path of the PNG file in the store, image is rendered if needed '''
+    def get_store_path(self, wedge_list, size=None):
+        if self.store_dir is None:
+            return None
+
+        if size is None:
+            size = img_w
+
+        key = self.make_key(self.quantize(wedge_list), size)
+        img_path = os.path.join(self.store_dir, key + '.png')
+
+        if not os.path.exists(img_path):
+            self.get(wedge_list, size)
+        else:
+            try:
+                os.utime(img_path)
+            except OSError:
+                pass
+
+        return img_path
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'items': len(self.images),
+                'max_items': self.max_items,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses
+            }
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+obstruction_img_cache = ObstructionImgCache()
+
+''' Get obstructions image from the process-wide cache '''
+def get_obstruction_img(wedge_list, size=None):
+    return obstruction_img_cache.get(wedge_list, size)
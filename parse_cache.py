@@ -0,0 +1,239 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Persistent cache of the parsed exports
+    Parsed entities (compact, all plugins loaded) are pickled to the per-user
+    cache directory, the entry name is the SHA-1 of the file content.
+    The index maps (path, size, mtime) to the content hash, so unchanged files
+    are not even read on reopen, and copies of the same export share the entry.
+    Every entry has the parser version stamp: hash of the parser sources and the
+    UI language, entries of another version are ignored and removed.
+    Rendered obstruction images are stored as PNG next to the entries.
+    Old entries and images are evicted by age and then by the total size, oldest first.
+    The cache directory is trusted, like any other per-user application data.
+'''
+
+import os
+import sys
+import json
+import pickle
+import hashlib
+import tempfile
+import importlib
+import threading
+from device_img_cache import get_cache_root, evict_cache_files, remove_cache_file
+
+CACHE_DIR_NAME = 'parsed'
+INDEX_FILE = 'index.json'
+ENTRY_SUFFIX = '.pkl'
+IMG_DIR_NAME = 'obstructions'
+IMG_SUFFIX = '.png'
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+''' Modules which define the parsed data, any change invalidates the cache '''
+PARSER_MODULES = ('common_data', 'dishy_data', 'router_data', 'app_data', 'schema', 'entity',
+                    'dishy', 'router', 'device_app', 'about', 'json_loader', 'parse_cache')
+
+''' Translated defaults are stored in the entities '''
+LOCALE_VARIABLES = ('LANGUAGE', 'LC_ALL', 'LC_MESSAGES', 'LANG')
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+parser_version = None
+
+''' Version stamp of the parser code
+    Frozen builds have no sources, the executable itself is used then
+'''
+def get_parser_version():
+    global parser_version
+
+    if parser_version is not None:
+        return parser_version
+
+    digest = hashlib.sha1()
+    digest.update(sys.version.encode())
+
+    for module_name in PARSER_MODULES:
+        module_file = getattr(importlib.import_module(module_name), '__file__', None)
+
+        try:
+            with open(module_file, 'rb') as source_file:
+                digest.update(source_file.read())
+        except (OSError, TypeError):
+            digest.update(module_name.encode() + str(os.stat(sys.executable).st_mtime_ns).encode())
+
+    for variable in LOCALE_VARIABLES:
+        digest.update((variable + '=' + os.environ.get(variable, '')).encode())
+
+    parser_version = digest.hexdigest()
+
+    return parser_version
+
+def get_content_hash(json_file_path):
+    digest = hashlib.sha1()
+
+    with open(json_file_path, 'rb') as json_file:
+        for block in iter(lambda: json_file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+''' Write file atomically, readers never see a partial file '''
+def write_atomic(file_path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path))
+
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+
+        os.replace(tmp_path, file_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        raise
+
+class ParseCache:
+    def __init__(self, store_dir=None, max_size=DEFAULT_MAX_SIZE, max_age=DEFAULT_MAX_AGE):
+        if store_dir is None:
+            store_dir = os.path.join(get_cache_root(), CACHE_DIR_NAME)
+
+        self.store_dir = store_dir
+        self.img_dir = os.path.join(store_dir, IMG_DIR_NAME)
+
+        os.makedirs(self.img_dir, exist_ok=True)
+
+        self.max_size = max_size
+        self.max_age = max_age
+
+        ''' Viewer windows load files in their own threads '''
+        self.lock = threading.Lock()
+
+        ''' Absolute path -> [size, mtime_ns, content hash] '''
+        self.index = {}
+        self.index_changed = False
+
+        try:
+            with open(os.path.join(store_dir, INDEX_FILE), encoding='utf8') as index_file:
+                self.index = json.load(index_file)
+        except (OSError, ValueError):
+            pass
+
+    def save_index(self):
+        write_atomic(os.path.join(self.store_dir, INDEX_FILE), json.dumps(self.index).encode())
+        self.index_changed = False
+
+    def get_entry_path(self, key):
+        return os.path.join(self.store_dir, key + ENTRY_SUFFIX)
+
+    ''' Cache key of the file, the content is hashed only when the file is new or changed '''
+    def get_key(self, json_file_path):
+        abs_path = os.path.abspath(json_file_path)
+        st = os.stat(abs_path)
+        identity = self.index.get(abs_path)
+
+        if identity is not None and identity[0] == st.st_size and identity[1] == st.st_mtime_ns:
+            return identity[2]
+
+        key = get_content_hash(abs_path)
+        self.index[abs_path] = [st.st_size, st.st_mtime_ns, key]
+        self.index_changed = True
+
+        return key
+
+    ''' Parsed entities of the file or None, the key is returned for store() '''
+    def load(self, json_file_path):
+        with self.lock:
+            return self.load_entry(json_file_path)
+
+    def load_entry(self, json_file_path):
+        try:
+            key = self.get_key(json_file_path)
+        except OSError:
+            return None, None
+
+        entry_path = self.get_entry_path(key)
+
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                version, modules = pickle.load(entry_file)
+        except FileNotFoundError:
+            return key, None
+        except Exception as err:
+            print('Broken parse cache entry ' + entry_path + ': ' + str(err))
+            self.remove_entry(entry_path)
+            return key, None
+
+        if version != get_parser_version():
+            self.remove_entry(entry_path)
+            return key, None
+
+        ''' Modification time is the last use for the eviction '''
+        try:
+            os.utime(entry_path)
+
+            if self.index_changed:
+                self.save_index()
+        except OSError:
+            pass
+
+        return key, modules
+
+    ''' Store entities, plugins are loaded, so the source JSON isn't pickled
+        The cache is optional: any error is printed and the entry is just not stored
+    '''
+    def store(self, key, modules):
+        try:
+            for entity in modules.values():
+                entity.compact()
+
+            data = pickle.dumps((get_parser_version(), modules), protocol=pickle.HIGHEST_PROTOCOL)
+
+            with self.lock:
+                write_atomic(self.get_entry_path(key), data)
+                self.evict()
+                self.save_index()
+        except Exception as err:
+            print('Failed to store parse cache entry: ' + str(err))
+
+    def remove_entry(self, entry_path):
+        remove_cache_file(entry_path)
+
+    ''' Remove entries and images older than max_age, then the oldest ones while the total size is above max_size '''
+    def evict(self):
+        entry_paths = evict_cache_files(((self.store_dir, ENTRY_SUFFIX), (self.img_dir, IMG_SUFFIX)), self.max_size, self.max_age)
+
+        ''' Index entries of the removed entries and files are not needed, e.g. temporary files of --stdin '''
+        keys = set(os.path.basename(entry_path)[:-len(ENTRY_SUFFIX)] for entry_path in entry_paths if entry_path.endswith(ENTRY_SUFFIX))
+        self.index = { path: identity for path, identity in self.index.items()
+                        if identity[2] in keys and os.path.exists(path) }
+
+    def clear(self):
+        for name in os.listdir(self.store_dir):
+            if name.endswith(ENTRY_SUFFIX) or name == INDEX_FILE:
+                self.remove_entry(os.path.join(self.store_dir, name))
+
+        for name in os.listdir(self.img_dir):
+            if name.endswith(IMG_SUFFIX):
+                self.remove_entry(os.path.join(self.img_dir, name))
+
+        self.index = {}
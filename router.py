@@ -22,46 +22,54 @@ import gettext
 import datetime
 from entity import * 
 from router_data import *
+from schema import Schema, Field, Text, FORMAT_FLAT
 
 _ = gettext.gettext
 
+''' Fields of the router section '''
+ROUTER_SCHEMA = Schema('Router', [
+    Field('reachable', ROUTER_REACHABLE_KEY, False, outer=True),
+    Field('cloud_access', ROUTER_CLOUD_ACCESS_KEY, False, outer=True)
+])
+
+ROUTER_DEVICE_INFO_SCHEMA = Schema('Router device info', [
+    Field('device_id', (DEVICE_INFO_KEY, DEVICE_INFO_ID_KEY), Text('Unknown')),
+    Field('sw_version', (DEVICE_INFO_KEY, DEVICE_INFO_SW_VER_KEY), Text('Unknown'), intern=True),
+    Field('hw_version', (DEVICE_INFO_KEY, DEVICE_INFO_HW_VER_KEY), Text('Unknown'), intern=True),
+    Field('mf_version', (DEVICE_INFO_KEY, DEVICE_INFO_MF_VER_KEY), Text('Unknown'), intern=True),
+    Field('gen_number', (DEVICE_INFO_KEY, DEVICE_INFO_GEN_NUMBER), Text('Unknown')),
+    Field('country_code', (DEVICE_INFO_KEY, DEVICE_INFO_CC_KEY), Text('Unknown'), intern=True),
+    Field('utc_off_hours', (DEVICE_INFO_KEY, DEVICE_INFO_UTC_OFF_KEY), 0),
+    Field('sw_parts_eq', (DEVICE_INFO_KEY, DEVICE_INFO_SW_PARTS_EQ_KEY), False),
+    Field('is_developer', (DEVICE_INFO_KEY, DEVICE_INFO_IS_DEV_KEY), False),
+    Field('boot_count', (DEVICE_INFO_KEY, DEVICE_INFO_BOOT_COUNT_KEY), 0),
+    Field('anti_rollback_version', (DEVICE_INFO_KEY, DEVICE_INFO_ANTI_ROLLBACK_KEY), 0),
+    Field('timestamp', DEVICE_TIMESTAMP_KEY, 0),
+    Field('uptime', (DEVICE_STATE_KEY, DEVICE_UPTIME_KEY), 0),
+    Field('is_aviation', ROUTER_IS_AVIATION_KEY, False),
+    Field('is_aviation_conformed', ROUTER_IS_AVIATION_CONFORMED_KEY, False),
+    Field('captiva_portal_enabled', ROUTER_CAPTIVE_PORTAL_ENABLED_KEY, False)
+])
+
 ''' Starlink Dishy info parser and formatter '''
 class Router(Entity):
+    __slots__ = ROUTER_DEVICE_INFO_SCHEMA.get_attributes()
+
     def __init__(self, json_object):
         print("Loading Router")
 
-        router_object = json_object
-
-        if STATUS_KEY in json_object:
-            router_object = json_object[STATUS_KEY]
-        elif RAW_STATUS_KEY in json_object:
-            router_object = json_object[RAW_STATUS_KEY]
-
-        router_reachable = False
-        router_cloud_access = False
-
-        if ROUTER_REACHABLE_KEY in json_object:
-          router_reachable = json_object[ROUTER_REACHABLE_KEY]
-        elif ROUTER_REACHABLE_KEY in router_object:
-          router_reachable = router_object[ROUTER_REACHABLE_KEY]
-
-        if ROUTER_CLOUD_ACCESS_KEY in json_object:
-          router_cloud_access = json_object[ROUTER_CLOUD_ACCESS_KEY]
-        elif ROUTER_CLOUD_ACCESS_KEY in router_object:
-          router_cloud_access = router_object[ROUTER_CLOUD_ACCESS_KEY]
+        router_object = ROUTER_SCHEMA.load(self, json_object)
 
-        super().__init__('Router', router_reachable, router_cloud_access)
+        super().__init__('Router', self.reachable, self.cloud_access)
 
         if self.reachable and not self.parse_device_info(router_object):
             raise Exception(_('Failed to load Router Device Info'))
 
-        self.plugins = []
-
         if self.reachable:
-            self.plugins.append(RouterNetwork(router_object))
-            self.plugins.append(ModuleAlerts(router_object))
-            self.plugins.append(Features(router_object))
-            self.plugins.append(BootInfo(router_object))
+            self.add_plugin(RouterNetwork, router_object)
+            self.add_plugin(ModuleAlerts, router_object)
+            self.add_plugin(Features, router_object)
+            self.add_plugin(BootInfo, router_object)
 
     def get_device_image_file(self):
         if self.hw_version not in dev_images:
@@ -98,68 +106,42 @@ class Router(Entity):
         result[_('Captive portal enabled')] = self.yes_or_no(self.captiva_portal_enabled)
 
     def parse_device_info(self, json_object):
-        router_object = json_object
-
-        if STATUS_KEY in json_object:
-            router_object = json_object[STATUS_KEY]
-
-        if DEVICE_INFO_KEY not in router_object:
+        if DEVICE_INFO_KEY not in json_object:
             return False
 
-        device_info = router_object[DEVICE_INFO_KEY]
-        device_state = router_object[DEVICE_STATE_KEY]
-
-        self.device_id = device_info.get(DEVICE_INFO_ID_KEY, _('Unknown'))
-        self.sw_version = device_info.get(DEVICE_INFO_SW_VER_KEY, _('Unknown'))
-        self.hw_version = device_info.get(DEVICE_INFO_HW_VER_KEY, _('Unknown'))
-        self.mf_version = device_info.get(DEVICE_INFO_MF_VER_KEY, _('Unknown'))
-        self.gen_number = device_info.get(DEVICE_INFO_GEN_NUMBER, _('Unknown'))
-        self.country_code = device_info.get(DEVICE_INFO_CC_KEY, _('Unknown'))
-        self.utc_off_hours = device_info.get(DEVICE_INFO_UTC_OFF_KEY, 0)
-        self.sw_parts_eq = device_info.get(DEVICE_INFO_SW_PARTS_EQ_KEY, False)
-        self.is_developer = device_info.get(DEVICE_INFO_IS_DEV_KEY, False) 
-        self.boot_count = device_info.get(DEVICE_INFO_BOOT_COUNT_KEY, 0)
-        self.anti_rollback_version = device_info.get(DEVICE_INFO_ANTI_ROLLBACK_KEY, 0)
-
-        self.timestamp = router_object.get(DEVICE_TIMESTAMP_KEY, 0)
-        self.uptime = device_state.get(DEVICE_UPTIME_KEY, 0)
-
-        self.is_aviation = router_object.get(ROUTER_IS_AVIATION_KEY, False)
-        self.is_aviation_conformed = router_object.get(ROUTER_IS_AVIATION_CONFORMED_KEY, False)
-        self.captiva_portal_enabled = router_object.get(ROUTER_CAPTIVE_PORTAL_ENABLED_KEY, False)
+        ROUTER_DEVICE_INFO_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         return True
 
-    def get_additional_data(self, result):
-        for plugin in self.plugins:
-            if plugin.is_data_ready():
-                result[plugin.get_name()] = plugin.get_data() 
-
 ''' '''
 
+ROUTER_NETWORK_SCHEMA = Schema('Router network', [
+    Field('wan_ipv4', ROUTER_WAN_IPV4_ADDRESS_KEY, '0.0.0.0'),
+    Field('wan_ipv6', ROUTER_WAN_IPV6_ADDRESS_LIST_KEY, None),
+    Field('wan_ipv6_addresses', ROUTER_WAN_IPV6_ADRESSES_KEY, ()),
+    Field('dhcp_servers', ROUTER_WAN_DHPS_SERVERS_LIST_KEY, ()),
+    Field('ping_drop_rate', ROUTER_PING_DROP_RATE_KEY, 0),
+    Field('dish_ping_drop_rate', ROUTER_DISH_PING_DROP_RATE_KEY, 0),
+    Field('dish_ping_latency_ms', ROUTER_DISH_PING_LATENCY_MS_KEY, 0),
+    Field('pop_ping_drop_rate', ROUTER_POP_PING_DROP_RATE_KEY, 0),
+    Field('pop_ping_latency_ms', ROUTER_POP_PING_LATENCY_MS_KEY, 0)
+])
+
 class RouterNetwork(EntityModule):
+    __slots__ = ROUTER_NETWORK_SCHEMA.get_attributes() + ('ipv6_list', 'dhcp_servers_list')
+    plugin_name = 'Network'
+
     def __init__(self, json_object):
         super().__init__()
 
-        self.wan_ipv4 = json_object.get(ROUTER_WAN_IPV4_ADDRESS_KEY, "0.0.0.0")
-
-        if ROUTER_WAN_IPV6_ADDRESS_LIST_KEY in json_object:
-            self.wan_ipv6 = json_object.get(ROUTER_WAN_IPV6_ADDRESS_LIST_KEY, [])
-        elif ROUTER_WAN_IPV6_ADRESSES_KEY in json_object:
-            self.wan_ipv6 = json_object.get(ROUTER_WAN_IPV6_ADRESSES_KEY, [])
+        ROUTER_NETWORK_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
-        self.dhcp_servers = json_object.get(ROUTER_WAN_DHPS_SERVERS_LIST_KEY, [])
-        self.ping_drop_rate = json_object.get(ROUTER_PING_DROP_RATE_KEY, 0)
-        self.dish_ping_drop_rate = json_object.get(ROUTER_DISH_PING_DROP_RATE_KEY, 0)
-        self.dish_ping_latency_ms = json_object.get(ROUTER_DISH_PING_LATENCY_MS_KEY, 0)
-        self.pop_ping_drop_rate = json_object.get(ROUTER_POP_PING_DROP_RATE_KEY, 0)
-        self.pop_ping_latency_ms = json_object.get(ROUTER_POP_PING_LATENCY_MS_KEY, 0)
+        ''' Older firmware uses another key for the list '''
+        if self.wan_ipv6 is None:
+            self.wan_ipv6 = self.wan_ipv6_addresses
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'Network'
-
     def get_data(self):
         self.ipv6_list = ', '.join(str(s) for s in self.wan_ipv6)
         self.dhcp_servers_list = ', '.join(str(s) for s in self.dhcp_servers)
@@ -178,36 +160,36 @@ class RouterNetwork(EntityModule):
         return [ _('Network'), data ]
 
 
+BOOT_INFO_SCHEMA = Schema('Router boot info', [
+    Field('last_reason', (DEVICE_INFO_KEY, ROUTER_BOOT_KEY, ROUTER_BOOT_LAST_REASON), 0, BootReason),
+    Field('last_count', (DEVICE_INFO_KEY, ROUTER_BOOT_KEY, ROUTER_BOOT_LAST_COUNT), 0),
+    Field('count_by_reason_map', (DEVICE_INFO_KEY, ROUTER_BOOT_KEY, ROUTER_BOOT_COUNT_BY_REASON_MAP_KEY), ())
+])
+
 class BootInfo(EntityModule):
+    __slots__ = BOOT_INFO_SCHEMA.get_attributes()
+    plugin_name = 'BootInfo'
+
     def __init__(self, json_object):
         super().__init__()
 
-        device_info = json_object[DEVICE_INFO_KEY]
-
-        if ROUTER_BOOT_KEY not in device_info:
+        if ROUTER_BOOT_KEY not in json_object[DEVICE_INFO_KEY]:
             return None
 
-        boot_info = device_info[ROUTER_BOOT_KEY]
-
-        self.last_reason = BootReason(boot_info.get(ROUTER_BOOT_LAST_REASON, 0))
-        self.last_count = boot_info.get(ROUTER_BOOT_LAST_COUNT, 0)
-        self.count_by_reason_map = boot_info.get(ROUTER_BOOT_COUNT_BY_REASON_MAP_KEY, [])
+        BOOT_INFO_SCHEMA.load(self, json_object, FORMAT_FLAT)
 
         self.data_ready = True
 
-    def get_name(self):
-        return 'BootInfo'
-
     def get_data(self):
         data = [
-            [ _('Last reboot reason'), boot_reason_str[self.last_reason] ],
+            [ _('Last reboot reason'), _(boot_reason_str[self.last_reason]) ],
             [ _('Last boot count'), self.last_count ]
         ]
 
         for boot_reason in self.count_by_reason_map:
             boot_reason_code = BootReason(boot_reason[0])
             boot_reason_count = boot_reason[1]
-            data.append([ _('Reason') + ': ' + boot_reason_str[boot_reason_code], \
+            data.append([ _('Reason') + ': ' + _(boot_reason_str[boot_reason_code]), \
                     _('count by this reason') + ': ' + str(boot_reason_count)])
 
         return [ _('Boot info'), data ]
@@ -17,14 +17,14 @@
 #set expandtab
 #set tabstop=4
 
-import gettext
 from enum import Enum
 from common_data import *
 
-gettext.bindtextdomain('space-debugger', './locales')
-gettext.textdomain('space-debugger')
-
-_ = gettext.gettext
+''' Strings are only marked for xgettext here,
+    they are translated when displayed
+'''
+def _(message):
+    return message
 
 dev_images = {
 	'v1': 'resources/devices/router_v1.png',
@@ -0,0 +1,164 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Declarative field tables
+    Entities and plugins describe their fields (attribute, key path, default, enum type)
+    instead of the chains of json_object.get() calls. For every export format a plain
+    Python function is generated from the table once and cached, so loading of the
+    values costs about the same as the dict lookups themselves.
+'''
+
+import sys
+import gettext
+from common_data import STATUS_KEY, RAW_STATUS_KEY
+
+''' Export formats, the value is the key of the status wrapper '''
+FORMAT_STATUS = STATUS_KEY
+FORMAT_RAW_STATUS = RAW_STATUS_KEY
+FORMAT_FLAT = None
+
+MISSING = object()
+EMPTY = {}
+
+''' Default value which is translated when the field is loaded '''
+class Text(str):
+    pass
+
+''' Format fingerprint of the section '''
+def detect_format(json_object):
+    for wrapper_key in (FORMAT_STATUS, FORMAT_RAW_STATUS):
+        if isinstance(json_object.get(wrapper_key), dict):
+            return wrapper_key
+
+    return FORMAT_FLAT
+
+''' Section content without the status wrapper '''
+def unwrap(json_object, json_format):
+    if json_format is FORMAT_FLAT:
+        return json_object
+
+    return json_object[json_format]
+
+''' One field of the table
+    Path is a key or tuple of keys inside of the unwrapped section.
+    Outer fields are searched next to the status wrapper first, like 'reachable' in the new exports.
+    Interned strings are shared by all loaded entities, use it for values like versions.
+'''
+class Field:
+    def __init__(self, attr, path, default=None, enum=None, outer=False, intern=False):
+        self.attr = attr
+        self.path = (path,) if isinstance(path, str) else tuple(path)
+        self.default = default
+        self.enum = enum
+        self.outer = outer
+        self.intern = intern
+
+        if outer and len(self.path) != 1:
+            raise ValueError('Outer field should be a top-level key: ' + attr)
+
+class Schema:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.extractors = {}
+
+    ''' Names of the attributes set by the schema, used for __slots__ '''
+    def get_attributes(self):
+        return tuple(field.attr for field in self.fields)
+
+    ''' Generate extractor function source for the export format '''
+    def make_source(self, json_format):
+        lines = [ 'def extract(target, root, inner):' ]
+        containers = {}
+
+        for i, field in enumerate(self.fields):
+            obj = 'inner'
+
+            ''' Every nested object is looked up only once '''
+            for depth in range(1, len(field.path)):
+                prefix = field.path[:depth]
+                name = containers.get(prefix)
+
+                if name is None:
+                    name = 'c%d' % len(containers)
+                    containers[prefix] = name
+                    lines.append('    %s = %s.get(%r)' % (name, obj, prefix[-1]))
+                    lines.append('    if not isinstance(%s, dict): %s = EMPTY' % (name, name))
+
+                obj = name
+
+            key = field.path[-1]
+
+            if field.outer and json_format is not FORMAT_FLAT:
+                lines.append('    v = root.get(%r, MISSING)' % key)
+                lines.append('    if v is MISSING: v = %s.get(%r, MISSING)' % (obj, key))
+            else:
+                lines.append('    v = %s.get(%r, MISSING)' % (obj, key))
+
+            if isinstance(field.default, Text):
+                lines.append('    if v is MISSING: v = _(d%d)' % i)
+            else:
+                lines.append('    if v is MISSING: v = d%d' % i)
+
+            if field.enum is not None:
+                lines.append('    v = e%d(v)' % i)
+
+            if field.intern:
+                lines.append('    if type(v) is str: v = intern(v)')
+
+            lines.append('    target.%s = v' % field.attr)
+
+        if len(self.fields) == 0:
+            lines.append('    pass')
+
+        return '\n'.join(lines) + '\n'
+
+    def compile_extractor(self, json_format):
+        namespace = { '_': gettext.gettext, 'intern': sys.intern, 'MISSING': MISSING, 'EMPTY': EMPTY }
+
+        for i, field in enumerate(self.fields):
+            namespace['d%d' % i] = field.default
+            namespace['e%d' % i] = field.enum
+
+        code = compile(self.make_source(json_format), '<schema ' + self.name + ':' + str(json_format) + '>', 'exec')
+        exec(code, namespace)
+
+        return namespace['extract']
+
+    def get_extractor(self, json_format):
+        extractor = self.extractors.get(json_format)
+
+        if extractor is None:
+            extractor = self.compile_extractor(json_format)
+            self.extractors[json_format] = extractor
+
+        return extractor
+
+    ''' Set attributes of the target from the section, returns unwrapped section
+        Format is detected when it's not given, plugins get already unwrapped data
+    '''
+    def load(self, target, json_object, json_format=MISSING):
+        if json_format is MISSING:
+            json_format = detect_format(json_object)
+
+        inner = unwrap(json_object, json_format)
+        self.get_extractor(json_format)(target, json_object, inner)
+
+        return inner
@@ -0,0 +1,312 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Single instance mode
+    The first viewer listens on a per-user Unix domain socket (named pipe on Windows),
+    next runs just send the file path or raw JSON data to it and exit.
+    The socket directory must be private: owned by the user and closed for others.
+    Connections are authenticated with the random key of the running instance, stored
+    in the 0600 file next to the socket. Messages are JSON, never pickles, and can't
+    ask the viewer to remove files: temporary files are sent as data instead.
+    Clients which stall are dropped after the timeout, they don't block the next ones.
+    The module is imported before the GUI, it should stay light.
+'''
+
+import os
+import json
+import stat
+import queue
+import base64
+import socket
+import struct
+import getpass
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing.connection import Listener, Client, Connection, deliver_challenge, answer_challenge
+
+KEY_FILE = 'space-debugger.key'
+KEY_SIZE = 32
+
+''' Taken while the server socket and the key are created '''
+LOCK_FILE = 'space-debugger.lock'
+
+''' Seconds for the client to authenticate and send the message '''
+CLIENT_TIMEOUT = 5
+
+''' Messages '''
+OPEN_FILE_MSG = 'open_file'
+OPEN_JSON_MSG = 'open_json'
+
+''' Refuse the directory which other users can write to or replace '''
+def check_private_dir(dir_path):
+    st = os.lstat(dir_path)
+
+    if not stat.S_ISDIR(st.st_mode):
+        raise OSError('Not a directory: ' + dir_path)
+
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        raise OSError('Directory is not private: ' + dir_path)
+
+''' Private per-user directory of the socket and the key file '''
+def get_runtime_dir():
+    if os.name == 'nt':
+        ''' Imported here, it imports PIL '''
+        from device_img_cache import get_cache_root
+
+        runtime_dir = os.path.join(get_cache_root(), 'instance')
+        os.makedirs(runtime_dir, exist_ok=True)
+        return runtime_dir
+
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), 'space-debugger-' + str(os.getuid()))
+        os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+
+    ''' Directory may be created in advance by someone else '''
+    check_private_dir(runtime_dir)
+
+    return runtime_dir
+
+''' Socket address and family for the current user '''
+def get_address():
+    if os.name == 'nt':
+        return r'\\.\pipe\space-debugger-' + getpass.getuser(), 'AF_PIPE'
+
+    return os.path.join(get_runtime_dir(), 'space-debugger.sock'), 'AF_UNIX'
+
+def get_key_path():
+    return os.path.join(get_runtime_dir(), KEY_FILE)
+
+def read_auth_key():
+    with open(get_key_path(), 'rb') as key_file:
+        return key_file.read()
+
+''' New random key of this instance, readable by the user only
+    Key of the previous instance is replaced, the file is created exclusively and read back,
+    so the instance never listens with a key which is not in the file
+'''
+def write_auth_key():
+    key = os.urandom(KEY_SIZE)
+    key_path = get_key_path()
+
+    try:
+        os.remove(key_path)
+    except FileNotFoundError:
+        pass
+
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+
+    with os.fdopen(fd, 'wb') as key_file:
+        key_file.write(key)
+
+    if read_auth_key() != key:
+        raise OSError('Key file is changed by another instance')
+
+    return key
+
+''' Servers starting at the same time create the socket and the key one by one '''
+@contextmanager
+def server_lock():
+    import fcntl
+
+    fd = os.open(os.path.join(get_runtime_dir(), LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o600)
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+''' Authenticated connection of the accepted Unix socket client
+    Reads and writes time out, so the stalled client can't block the server
+'''
+def open_client_connection(client_socket, authkey):
+    timeout = struct.pack('ll', CLIENT_TIMEOUT, 0)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, timeout)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeout)
+
+    conn = Connection(client_socket.detach())
+
+    try:
+        deliver_challenge(conn, authkey)
+        answer_challenge(conn, authkey)
+    except Exception:
+        conn.close()
+        raise
+
+    return conn
+
+def encode_message(message):
+    return json.dumps(message).encode()
+
+''' Returns (message type, argument) or None for malformed messages '''
+def decode_message(data):
+    try:
+        message = json.loads(data)
+
+        if message['type'] == OPEN_FILE_MSG and isinstance(message['path'], str):
+            return OPEN_FILE_MSG, message['path']
+
+        if message['type'] == OPEN_JSON_MSG:
+            return OPEN_JSON_MSG, base64.b64decode(message['data'], validate=True)
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    return None
+
+''' Send message to the running instance, returns False if there is no such instance '''
+def send_to_running_instance(message):
+    try:
+        address, family = get_address()
+        conn = Client(address, family, authkey=read_auth_key())
+    except Exception:
+        ''' No instance, no key or failed authentication, e.g. key of the crashed instance '''
+        return False
+
+    try:
+        conn.send_bytes(encode_message(message))
+        return conn.recv_bytes() == b'1'
+    except (OSError, EOFError):
+        return False
+    finally:
+        conn.close()
+
+def open_file_message(json_file_path):
+    return { 'type': OPEN_FILE_MSG, 'path': os.path.abspath(json_file_path) }
+
+def open_json_message(json_bytes):
+    return { 'type': OPEN_JSON_MSG, 'data': base64.b64encode(json_bytes).decode('ascii') }
+
+''' True if some process accepts connections on the Unix socket '''
+def is_socket_alive(address):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        sock.connect(address)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+''' Server side, requests are put to the queue as (message type, argument)
+    Queue should be polled from the GUI thread.
+    Unix socket is served directly, so the clients get the timeout; Windows pipes use the Listener
+'''
+class InstanceServer:
+    def __init__(self):
+        self.address, family = get_address()
+        self.requests = queue.Queue()
+        self.closed = False
+        self.listener = None
+        self.server_socket = None
+
+        if family == 'AF_UNIX':
+            with server_lock():
+                self.server_socket = self.bind_unix_socket()
+
+                try:
+                    self.authkey = write_auth_key()
+                except OSError:
+                    self.close()
+                    raise
+        else:
+            self.authkey = write_auth_key()
+            self.listener = Listener(self.address, family, authkey=self.authkey)
+
+        self.thread = threading.Thread(target=self.accept_loop, daemon=True)
+        self.thread.start()
+
+    ''' Socket file is removed only when nobody answers on it, so it's left from the crashed instance '''
+    def bind_unix_socket(self):
+        if os.path.exists(self.address):
+            if is_socket_alive(self.address):
+                raise OSError('Another instance is listening on ' + self.address)
+
+            os.remove(self.address)
+
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            server_socket.bind(self.address)
+            server_socket.listen()
+        except OSError:
+            server_socket.close()
+            raise
+
+        return server_socket
+
+    ''' Authenticated connection of the next client '''
+    def accept(self):
+        if self.listener is not None:
+            return self.listener.accept()
+
+        client_socket, client_address = self.server_socket.accept()
+
+        return open_client_connection(client_socket, self.authkey)
+
+    def accept_loop(self):
+        while not self.closed:
+            try:
+                conn = self.accept()
+            except Exception:
+                ''' Server closed, failed authentication, stalled or broken client '''
+                continue
+
+            try:
+                message = decode_message(conn.recv_bytes())
+
+                if message is not None:
+                    self.requests.put(message)
+
+                conn.send_bytes(b'1' if message is not None else b'0')
+            except (OSError, EOFError):
+                pass
+            finally:
+                conn.close()
+
+    ''' Get next request or None '''
+    def get_request(self):
+        try:
+            return self.requests.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+
+        if self.listener is not None:
+            self.listener.close()
+            return
+
+        ''' Shutdown wakes up the accept() of the server thread '''
+        try:
+            self.server_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.server_socket.close()
+
+        try:
+            os.remove(self.address)
+        except OSError:
+            pass
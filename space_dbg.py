@@ -23,18 +23,82 @@
 import sys
 import os
 import argparse
+from startup_profiler import profiler, start_timer
+import single_instance
+
+''' Command line arguments, parsed before the GUI modules are imported '''
+def parse_args():
+    parser = argparse.ArgumentParser('Space Debugger args')
+    parser.add_argument('-f', '--file', help='Input JSON file, can be gzip, xz, bz2 or zip compressed. NDJSON (.jsonl, .ndjson) files show the last snapshot')
+    parser.add_argument('--follow', required=False, action='store_true', help='Follow the NDJSON file and show every appended snapshot')
+    parser.add_argument('-r', '--remove-file-on-exit', required=False, action='store_true', help='Remove input JSON file on exit')
+    parser.add_argument('-s', '--single-instance', required=False, action='store_true', help='Open data in the already running viewer if any')
+    parser.add_argument('--stdin', required=False, action='store_true', help='Read JSON data from stdin')
+    parser.add_argument('-l', '--live', required=False, nargs='?', const='', help='Poll live data from the URL, default http://127.0.0.1:8080')
+    parser.add_argument('-i', '--interval', required=False, type=float, default=None, help='Live data polling interval, seconds, default 10')
+    parser.add_argument('--no-cache', required=False, action='store_true', help='Do not use the cache of the parsed files')
+    parser.add_argument('--profile', required=False, action='store_true', help='Print startup time of every phase')
+    parser.add_argument('--profile-out', required=False, help='Save cProfile data of the startup to the file (implies --profile)')
+    parser.add_argument('--profile-memory', required=False, action='store_true', help='Trace memory peak of every phase (implies --profile)')
+
+    return parser.parse_args()
+
+''' Single instance mode: hand the file or stdin data over to the running viewer
+    Done before the GUI modules are imported, so the hand-off is fast.
+    Returns True if the running viewer took the data
+'''
+def hand_over_to_running_instance(args, json_bytes):
+    if args.stdin:
+        message = single_instance.open_json_message(json_bytes)
+    elif args.remove_file_on_exit:
+        ''' Running instance never removes files on request, temporary file is sent as data '''
+        with open(args.file, 'rb') as f:
+            message = single_instance.open_json_message(f.read())
+    else:
+        message = single_instance.open_file_message(args.file)
+
+    if not single_instance.send_to_running_instance(message):
+        return False
+
+    if args.remove_file_on_exit and not args.stdin:
+        os.remove(args.file)
+
+    return True
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.file is None and not args.stdin and args.live is None:
+        print("Please provide JSON file as an argument")
+        sys.exit()
+
+    json_bytes = sys.stdin.buffer.read() if args.stdin else None
+
+    if args.single_instance and not args.follow and args.live is None:
+        if hand_over_to_running_instance(args, json_bytes):
+            sys.exit()
+
+''' Imports time is measured for the startup profiling '''
+imports_started = start_timer()
+
 import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter import messagebox
-from PIL import ImageTk,Image
+from PIL import ImageTk
 import sv_ttk
 import pyperclip
 import gettext
-import json
-import dishy
-import router
-import device_app
+import tempfile
+import queue
+import threading
 import about
+from device_img_cache import get_device_img
+from json_loader import load_json_file, read_entities, is_ndjson_file, get_compression
+from ndjson_follow import NdjsonFollower
+from obstruction_img_gen import obstruction_img_cache
+from parse_cache import ParseCache
+
+profiler.add_phase('imports', imports_started)
 
 ''' Load translation for a locale '''
 ''' Local dir is used to search and load .mo file '''
@@ -45,162 +109,618 @@ _ = gettext.gettext
 
 MIN_PYTHON = (3, 6)
 
+''' How often the live data queue is checked '''
+LIVE_CHECK_INTERVAL_MS = 200
+
+''' Plugin images (obstructions) are rendered right at the size of the subtab canvas '''
+SUBTAB_IMG_SIZE = 170
+
+''' How often the loader queue is checked while the data is loading '''
+LOAD_CHECK_INTERVAL_MS = 50
+
+''' Persistent cache of the parsed files, created by the first window which loads a file
+    Windows opened from the launcher share it with the main one. Disabled by --no-cache
+'''
+parse_cache = None
+parse_cache_enabled = True
+
+''' Shared parse cache or None when it's disabled or not available
+    Called from the Tk thread only
+'''
+def get_parse_cache():
+    global parse_cache, parse_cache_enabled
+
+    if parse_cache is None and parse_cache_enabled:
+        try:
+            parse_cache = ParseCache()
+            obstruction_img_cache.set_store_dir(parse_cache.img_dir)
+        except OSError as err:
+            print('Parse cache is not available: ' + str(err))
+            parse_cache_enabled = False
+
+    return parse_cache
+
+''' Messages from the loader thread '''
+LOAD_MODULES_MSG = 'modules'
+LOAD_MODULE_DATA_MSG = 'module'
+LOAD_MODULE_ERROR_MSG = 'module_error'
+LOAD_ERROR_MSG = 'error'
+LOAD_DONE_MSG = 'done'
+
 if sys.version_info < MIN_PYTHON:
     sys.exit("Python %s.%s or later is required.\n" % MIN_PYTHON)
 
-''' Main window implementation '''
-class SpaceDebuggerMain(tk.Tk):
-    def __init__(self, file_path, remove_file_on_exit):
-        super().__init__()
+''' Value label color: negative values are blue, positive are green, None for the default '''
+def get_value_color(value):
+    if isinstance(value, str):
+        if ('No ' in value or 'No' == value):
+            return '#5400ff'
+        elif ('Yes' == value or 'Good' == value or 'Okay' == value):
+            return '#007107'
+
+    return None
+
+''' Params and additional data of the module, shown in the tab '''
+def get_tab_data(module_object):
+    params = {}
+    additional_params = {}
+
+    if module_object.is_reachable():
+        module_object.get_readable_params(params)
+        module_object.get_additional_data(additional_params, img_size=SUBTAB_IMG_SIZE)
+
+    return params, additional_params
+
+''' Everything for the tab which doesn't need Tk: params, additional data
+    with rendered obstruction images and decoded device image
+'''
+def prepare_tab_data(module_object, img_size):
+    params, additional_params = get_tab_data(module_object)
+    device_img = None
+
+    if module_object.is_reachable():
+        device_img = get_device_img(module_object.get_device_image_file(), img_size)
+
+    return params, additional_params, device_img
+
+''' Loads, parses and renders the data in the background thread
+    Results are posted to the queue which is polled by the Tk main loop with after(),
+    Tk objects are created only in the main thread.
+    Entities are handed over to the main thread, the loader only stores them to the cache.
+    Module which fails to prepare gets the error instead of the data, it's not prepared again
+    on the main thread, and such entities are not cached.
+'''
+class DataLoader:
+    def __init__(self, json_file, poller, img_size, cache=None):
+        self.json_file = json_file
+        self.poller = poller
+        self.img_size = img_size
+        self.cache = cache if poller is None else None
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.thread_main, daemon=True)
+        self.thread.start()
+
+    def thread_main(self):
+        with profiler.thread_profile():
+            self.load()
+
+    def load(self):
+        cache_key = None
+        modules = None
+        json_data = None
+
+        if self.cache is not None:
+            with profiler.phase('parse cache load'):
+                cache_key, modules = self.cache.load(self.json_file)
+
+            ''' Entities from the cache are not stored again '''
+            if modules is not None:
+                cache_key = None
+
+        if modules is None:
+            loaded = self.load_modules()
+
+            if loaded is None:
+                return
+
+            json_data, modules = loaded
+
+        self.queue.put((LOAD_MODULES_MSG, json_data, modules))
+
+        failed = False
+
+        ''' Tabs are filled in the order they are shown '''
+        for module in sorted(modules):
+            try:
+                with profiler.phase('prepare ' + modules[module].get_module_readable_name()):
+                    tab_data = prepare_tab_data(modules[module], self.img_size)
+            except Exception as err:
+                print('Failed to prepare ' + module + ': ' + str(err))
+                self.queue.put((LOAD_MODULE_ERROR_MSG, module, err))
+                failed = True
+                continue
 
+            self.queue.put((LOAD_MODULE_DATA_MSG, module, tab_data))
+
+        self.queue.put((LOAD_DONE_MSG,))
+
+        if cache_key is not None and not failed:
+            with profiler.phase('parse cache store'):
+                self.cache.store(cache_key, modules)
+
+    ''' Load and parse the data, returns (json_data, modules)
+        None is returned on errors, they are posted to the queue
+    '''
+    def load_modules(self):
+        try:
+            if self.poller is not None:
+                with profiler.phase('live poll'):
+                    json_data = self.poller.poll_sync()
+            else:
+                with profiler.phase('load_json_data'):
+                    json_data = load_json_file(self.json_file)
+        except Exception as err:
+            self.queue.put((LOAD_ERROR_MSG, _('Failed to load JSON file'), err))
+            return None
+
+        try:
+            with profiler.phase('read_json_data'):
+                modules = read_entities(json_data)
+        except Exception as err:
+            self.queue.put((LOAD_ERROR_MSG, _('Error'), err))
+            return None
+
+        return json_data, modules
+
+''' Viewer implementation
+    Shared by the main window and the windows opened from the launcher
+'''
+class SpaceDebuggerView:
+    ''' Window is shown right away, data is loaded by the loader thread
+        and the tabs are filled as soon as every module is ready.
+        Load errors are shown to the user and the window is closed.
+        In live mode data is taken from the poller instead of the file,
+        NDJSON files are read by the follower the same way
+    '''
+    def init_view(self, file_path, remove_file_on_exit, poller=None):
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.bind('<Destroy>', self.on_destroy, add='+')
+
+        if poller is None and is_ndjson_file(file_path):
+            poller = NdjsonFollower(file_path, follow=False)
 
         self.json_file = file_path
         self.remove_json_on_exit = remove_file_on_exit
+        self.poller = poller
+        self.live_check_id = None
+        self.load_check_id = None
         self.modules = {}
+        self.top_tabs = None
+
+        ''' Modules waiting for the loader and the data prepared by it '''
+        self.loading_modules = set()
+        self.prepared_tabs = {}
+
+        ''' Modules which failed to prepare, module key -> error '''
+        self.failed_modules = {}
 
         ''' Configure window and widgets '''
         self.img_canvas_h = 210
         self.img_canvas_w = 210
 
-        sv_ttk.set_theme("light")
         self.title('Space Debugger')
         self.geometry('')
 
         ''' Set window icon '''
-        p = tk.PhotoImage(file = 'resources/icons/space_debugger_icon.png')
-        self.iconphoto(False, p)
+        self.icon = tk.PhotoImage(master=self, file = 'resources/icons/space_debugger_icon.png')
+        self.iconphoto(False, self.icon)
+
+        if poller is not None:
+            self.title('Space Debugger: ' + poller.url)
+            loading_text = poller.url
+        else:
+            loading_text = os.path.basename(self.json_file)
+
+        self.loading_label = ttk.Label(self, text=_('Loading') + ' ' + loading_text + '...')
+        self.loading_label.pack(padx=40, pady=40)
+
+        ''' Live data changes with every poll, it's not cached '''
+        cache = get_parse_cache() if poller is None else None
 
-        self.load_json_data()
-        self.read_json_data()
+        self.loader = DataLoader(self.json_file, poller, (self.img_canvas_w, self.img_canvas_h), cache)
+        self.loader.start()
 
-        top_tabs = ttk.Notebook(self)
-        top_tabs.pack(pady=10, expand=True)
+        self.load_check_id = self.after(LOAD_CHECK_INTERVAL_MS, self.check_load_queue)
+
+    ''' Handle all messages of the loader thread '''
+    def check_load_queue(self):
+        self.load_check_id = None
+
+        while True:
+            try:
+                message = self.loader.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] == LOAD_ERROR_MSG:
+                messagebox.showerror(message[1], message[2], parent=self)
+                self.on_closing()
+                return
+            elif message[0] == LOAD_MODULES_MSG:
+                self.json_data = message[1]
+                self.modules.update(message[2])
+                self.loading_modules = set(message[2])
+
+                ''' About tab should be last one '''
+                self.modules['www'] = about.AboutApp()
+
+                self.loading_label.destroy()
+                self.build_tabs()
+            elif message[0] == LOAD_MODULE_DATA_MSG:
+                self.set_module_data(message[1], message[2])
+            elif message[0] == LOAD_MODULE_ERROR_MSG:
+                self.set_module_error(message[1], message[2])
+            elif message[0] == LOAD_DONE_MSG:
+                self.on_data_loaded()
+                return
+
+        self.load_check_id = self.after(LOAD_CHECK_INTERVAL_MS, self.check_load_queue)
+
+    ''' Module is ready, its tab is built if it's already selected '''
+    def set_module_data(self, module, tab_data):
+        self.loading_modules.discard(module)
+        self.prepared_tabs[module] = tab_data
+
+        self.build_selected_tab(self.top_tabs)
+
+    ''' Module failed to prepare, its tab shows the error '''
+    def set_module_error(self, module, err):
+        self.loading_modules.discard(module)
+        self.failed_modules[module] = err
+
+        self.build_selected_tab(self.top_tabs)
+
+    ''' All modules are shown, live polling is started '''
+    def on_data_loaded(self):
+        if self.poller is not None:
+            self.poller.start_thread()
+            self.live_check_id = self.after(LIVE_CHECK_INTERVAL_MS, self.check_live_data)
+
+    ''' Create notebook with the tabs of all modules '''
+    def build_tabs(self):
+        self.top_tabs = ttk.Notebook(self)
+        self.top_tabs.pack(pady=10, expand=True)
 
         self.tab_images = {}
         self.subtab_images = {}
 
-        ''' Load data from modules and draw tabs '''
+        ''' Tabs and subtabs are created empty and filled on first selection
+            Keys are Tk widget names of the tab frames, values are module keys
+            (and plugin keys for subtabs), so the latest data is used when they are built
+        '''
+        self.pending_tabs = {}
+        self.pending_subtabs = {}
+
+        ''' Displayed data, used to update the built tabs in place
+            Value labels are keyed by (module key, plugin key, param), plugin key is None for the main params
+        '''
+        self.tab_layouts = {}
+        self.subtab_data = {}
+        self.built_subtabs = set()
+        self.value_labels = {}
+        self.subtab_blobs = {}
+
+        ''' Loading labels of the tabs which are not ready yet '''
+        self.placeholders = {}
+
         for module in sorted(self.modules):
-            ''' Create and configure tab frame '''
             module_object = self.modules[module]
 
-            tab_frame = ttk.Frame(top_tabs)
+            tab_frame = ttk.Frame(self.top_tabs)
             tab_frame.pack(fill='both', expand=True)
             tab_frame.columnconfigure(1, weight=1, minsize=200)
-            tab_name = module_object.get_module_readable_name()
 
-            main_data_frame = ttk.Frame(tab_frame)
-            main_data_frame.grid(sticky="N", row=0, column=0, padx=20, pady=15)
+            self.pending_tabs[str(tab_frame)] = module
 
-            rc = 0
-            params = {}
+            if module in self.loading_modules:
+                self.placeholders[str(tab_frame)] = ttk.Label(tab_frame, text=_('Loading') + '...')
+                self.placeholders[str(tab_frame)].grid(row=0, column=0, padx=40, pady=40)
 
-            if module_object.is_reachable():
-                module_object.get_readable_params(params)
+            self.top_tabs.add(tab_frame, text=module_object.get_module_readable_name())
+
+        ''' Only the first tab is built right away '''
+        self.build_selected_tab(self.top_tabs)
+        self.top_tabs.bind('<<NotebookTabChanged>>', lambda event: self.build_selected_tab(event.widget))
+
+        self.top_tabs.pack(expand = 1, fill ="both")
+
+    ''' Live mode: show the new snapshot, if any '''
+    def check_live_data(self):
+        json_data = self.poller.get_snapshot()
+
+        if json_data is not None:
+            self.refresh_view(json_data)
+
+        self.live_check_id = self.after(LIVE_CHECK_INTERVAL_MS, self.check_live_data)
+
+    ''' Show the new data
+        Only changed labels are updated, tabs are rebuilt when the set of
+        params changes, e.g. the device becomes unreachable.
+        Errors are printed only, the previous data stays on the screen
+    '''
+    def refresh_view(self, json_data):
+        try:
+            with profiler.phase('read_json_data'):
+                modules = read_entities(json_data)
+        except Exception as err:
+            print('Failed to read live data: ' + str(err))
+            return
+
+        modules['www'] = self.modules['www']
+        same_modules = sorted(modules) == sorted(self.modules)
+
+        self.json_data = json_data
+        self.modules = modules
+        self.prepared_tabs = {}
+        self.failed_modules = {}
+
+        if same_modules:
+            with profiler.phase('widgets (update)'):
+                for module in self.tab_layouts:
+                    if not self.update_tab(module):
+                        same_modules = False
+                        break
+
+        if not same_modules:
+            selected = self.top_tabs.index('current')
+
+            self.top_tabs.destroy()
+            self.build_tabs()
+            self.top_tabs.select(min(selected, self.top_tabs.index('end') - 1))
+
+    ''' Everything except the values, tab can be updated in place while the layout is the same '''
+    def get_tab_layout(self, module_object, params, additional_params):
+        device_image = None
+
+        if module_object.is_reachable():
+            device_image = module_object.get_device_image_file()
+
+        subtabs = []
+
+        for plugin_key, (subtab_name, subtab_params) in additional_params.items():
+            rows = []
+
+            for subtab_param in subtab_params:
+                if subtab_param[0] == 'image_blob':
+                    rows.append((subtab_param[0], subtab_param[1] is None))
+                elif subtab_param[0] == 'init_durations':
+                    entries = None if subtab_param[1] is None else tuple(entry[0] for entry in subtab_param[1])
+                    rows.append((subtab_param[0], entries))
+                else:
+                    rows.append(subtab_param[0])
+
+            subtabs.append((plugin_key, subtab_name, tuple(rows)))
+
+        return (module_object.is_reachable(), module_object.get_access_type(), device_image, tuple(params), tuple(subtabs))
+
+    ''' Update labels of the built tab, returns False if the tab should be rebuilt '''
+    def update_tab(self, module):
+        params, additional_params = get_tab_data(self.modules[module])
+
+        if self.get_tab_layout(self.modules[module], params, additional_params) != self.tab_layouts[module]:
+            return False
+
+        for param in params:
+            self.update_value((module, None, param), params[param])
+
+        for plugin_key in additional_params:
+            self.subtab_data[(module, plugin_key)] = additional_params[plugin_key]
+
+            if (module, plugin_key) in self.built_subtabs:
+                self.update_subtab(module, plugin_key, additional_params[plugin_key][1])
+
+        return True
+
+    def update_subtab(self, module, plugin_key, subtab_params):
+        for irc, subtab_param in enumerate(subtab_params):
+            subtab_param_name = subtab_param[0]
+            subtab_param_value = subtab_param[1]
+
+            if subtab_param_name == 'image_blob':
+                ''' Images are cached, the same wedges give the same image object '''
+                if subtab_param_value is not None and subtab_param_value is not self.subtab_blobs[(module, plugin_key)]:
+                    self.subtab_images[(module, plugin_key)].paste(subtab_param_value)
+                    self.subtab_blobs[(module, plugin_key)] = subtab_param_value
+            elif subtab_param_name == 'init_durations':
+                if subtab_param_value is not None:
+                    for idc, init_dur_entry in enumerate(subtab_param_value):
+                        self.update_value((module, plugin_key, irc, idc), init_dur_entry[1])
+            else:
+                self.update_value((module, plugin_key, irc), subtab_param_value)
+
+    ''' Change label text and color if the value is changed '''
+    def update_value(self, key, value):
+        value_label, displayed_value, default_fg = self.value_labels[key]
+
+        if value == displayed_value:
+            return
+
+        value_label.config(text=value, fg=get_value_color(value) or default_fg)
+        self.value_labels[key] = (value_label, value, default_fg)
+
+    ''' Build the tab selected in the notebook if it wasn't built yet
+        Tabs of the modules which are still loading keep the placeholder
+    '''
+    def build_selected_tab(self, notebook):
+        tab_id = notebook.select()
+
+        if tab_id in self.pending_tabs and self.pending_tabs[tab_id] not in self.loading_modules:
+            module = self.pending_tabs.pop(tab_id)
 
-                for param in params:
-                    self.display_params(main_data_frame, rc, param, params[param], 0, 0, 15, 0)
-                    rc = rc + 1
+            if tab_id in self.placeholders:
+                self.placeholders.pop(tab_id).destroy()
 
-                ''' Create canva with device image 
-                    The image is resized to fit the window
-                    But it's is clickable to see it full size
-                '''
-                canvas = tk.Canvas(tab_frame, width=self.img_canvas_w, height=self.img_canvas_h)
-                canvas.grid(sticky="NE", row=0, column=1, padx=20, pady=20)
+            with profiler.phase('widgets'):
+                self.build_tab(self.nametowidget(tab_id), module)
 
-                ''' Store image data in the class field '''
-                tab_image = module_object.get_device_image_file()
-                self.tab_images[tab_name] = ImageTk.PhotoImage(Image.open(tab_image).resize((self.img_canvas_w, self.img_canvas_h)))
+    ''' Build the subtab selected in the notebook if it wasn't built yet '''
+    def build_selected_subtab(self, notebook):
+        tab_id = notebook.select()
 
-                canvas.create_image((0,0), anchor=tk.NW, image=self.tab_images[tab_name])
+        if tab_id in self.pending_subtabs:
+            module, plugin_key = self.pending_subtabs.pop(tab_id)
+            subtab_name, subtab_params = self.subtab_data[(module, plugin_key)]
 
-                ''' Bind image click event '''
-                canvas.bind("<Button-1>", lambda event, arg=tab_image: self.show_image(arg))
+            with profiler.phase('widgets (subtab)'):
+                self.build_subtab(self.nametowidget(tab_id), module, plugin_key, subtab_params)
 
-                additional_params = {}
+            self.built_subtabs.add((module, plugin_key))
 
-                ''' Load any additional data (if available) '''
-                module_object.get_additional_data(additional_params)
+    ''' Load data from module and draw tab content
+        Data is prepared by the loader, About tab and tabs rebuilt in live mode are prepared here.
+        Errors are shown in the tab instead of the content
+    '''
+    def build_tab(self, tab_frame, module):
+        module_object = self.modules[module]
+        tab_name = module_object.get_module_readable_name()
 
-                ''' Show additional data as subtabs '''
-                if len(additional_params):
-                    self.sub_tabs = ttk.Notebook(tab_frame)
-                    self.sub_tabs.grid(sticky="NW", row=rc+1, column=0, padx=20, pady=0, columnspan=2)
+        if module in self.failed_modules:
+            self.show_tab_error(tab_frame, self.failed_modules[module])
+            return
 
-                    rc = rc + 1
+        tab_data = self.prepared_tabs.pop(module, None)
 
-                    for add_param in additional_params:
-                        ''' Load params '''
-                        add_data_object = additional_params[add_param]
-                        subtab_name = add_data_object[0]
-                        subtab_params = add_data_object[1]
+        if tab_data is None:
+            try:
+                tab_data = prepare_tab_data(module_object, (self.img_canvas_w, self.img_canvas_h))
+            except Exception as err:
+                print('Failed to prepare ' + module + ': ' + str(err))
+                self.failed_modules[module] = err
+                self.show_tab_error(tab_frame, err)
+                return
+
+        params, additional_params, device_img = tab_data
+
+        main_data_frame = ttk.Frame(tab_frame)
+        main_data_frame.grid(sticky="N", row=0, column=0, padx=20, pady=15)
+
+        rc = 0
+
+        self.tab_layouts[module] = self.get_tab_layout(module_object, params, additional_params)
+
+        if module_object.is_reachable():
+            for param in params:
+                self.display_params(main_data_frame, rc, param, params[param], 0, 0, 15, 0, (module, None, param))
+                rc = rc + 1
+
+            ''' Create canva with device image 
+                The image is resized to fit the window
+                But it's is clickable to see it full size
+            '''
+            canvas = tk.Canvas(tab_frame, width=self.img_canvas_w, height=self.img_canvas_h)
+            canvas.grid(sticky="NE", row=0, column=1, padx=20, pady=20)
+
+            ''' Store image data in the class field '''
+            tab_image = module_object.get_device_image_file()
+            self.tab_images[tab_name] = ImageTk.PhotoImage(device_img)
 
-                        ''' Create subtab frame '''
-                        subtab_frame = ttk.Frame(self.sub_tabs)
-                        subtab_frame.columnconfigure(1, weight=1, minsize=380)
-                        subtab_frame.pack(fill='both', expand=True, padx=10, pady=20)
+            canvas.create_image((0,0), anchor=tk.NW, image=self.tab_images[tab_name])
 
-                        irc = 0
+            ''' Bind image click event '''
+            canvas.bind("<Button-1>", lambda event, arg=tab_image: self.show_image(arg))
 
-                        for subtab_param in subtab_params:
-                            subtab_param_name = subtab_param[0]
-                            subtab_param_value = subtab_param[1]
+            ''' Show additional data as subtabs '''
+            if len(additional_params):
+                sub_tabs = ttk.Notebook(tab_frame)
+                sub_tabs.grid(sticky="NW", row=rc+1, column=0, padx=20, pady=0, columnspan=2)
 
-                            ''' Magic word 'image_blob' - load image data and show in a third row '''
-                            if subtab_param_name == 'image_blob':
-                                if subtab_param_value != None:
-                                    cv = tk.Canvas(subtab_frame, width=170, height=170)
-                                    cv.grid(sticky="NE", row=0, column=2, rowspan=len(subtab_params))
+                rc = rc + 1
 
-                                    self.subtab_images[subtab_name] = ImageTk.PhotoImage(subtab_param_value.resize((170, 170)))
-                                    cv.create_image((0,0), anchor=tk.NW, image=self.subtab_images[subtab_name])
+                for add_param in additional_params:
+                    ''' Load params '''
+                    add_data_object = additional_params[add_param]
+                    subtab_name = add_data_object[0]
 
-                                    cv.bind("<Button-1>", lambda event, arg=subtab_param_value: self.show_image_mem(arg))
-                            elif subtab_param_name == 'init_durations':
-                                if subtab_param_value is not None:
-                                    idc = 0
+                    ''' Create subtab frame '''
+                    subtab_frame = ttk.Frame(sub_tabs)
+                    subtab_frame.columnconfigure(1, weight=1, minsize=380)
+                    subtab_frame.pack(fill='both', expand=True, padx=10, pady=20)
 
-                                    init_durs_frame = ttk.Frame(subtab_frame)
+                    self.subtab_data[(module, add_param)] = add_data_object
+                    self.pending_subtabs[str(subtab_frame)] = (module, add_param)
 
-                                    for init_dur_entry in subtab_param_value:
-                                        self.display_params(init_durs_frame, idc, init_dur_entry[0], init_dur_entry[1], 0, 1, 5, 0)
-                                        idc = idc + 1
+                    sub_tabs.add(subtab_frame, text=subtab_name)
 
-                                    init_durs_frame.grid(sticky="NE", row=0, column=2, rowspan=len(subtab_params) - 1)
-                            else:
-                                self.display_params(subtab_frame, irc, subtab_param_name, subtab_param_value, 0, 1, 15, 1)
+                self.build_selected_subtab(sub_tabs)
+                sub_tabs.bind('<<NotebookTabChanged>>', lambda event: self.build_selected_subtab(event.widget))
 
-                            irc = irc + 1
+        self.display_status_line(module_object, tab_frame, rc)
 
-                        self.sub_tabs.add(subtab_frame, text=subtab_name)
+    def show_tab_error(self, tab_frame, err):
+        ttk.Label(tab_frame, text=_('Error') + ': ' + str(err)).grid(row=0, column=0, padx=40, pady=40)
 
+    ''' Draw subtab content '''
+    def build_subtab(self, subtab_frame, module, plugin_key, subtab_params):
+        irc = 0
 
-            self.display_status_line(module_object, tab_frame, rc)
+        for subtab_param in subtab_params:
+            subtab_param_name = subtab_param[0]
+            subtab_param_value = subtab_param[1]
 
-            top_tabs.add(tab_frame, text=tab_name)
+            ''' Magic word 'image_blob' - load image data and show in a third row '''
+            if subtab_param_name == 'image_blob':
+                if subtab_param_value != None:
+                    blob_key = (module, plugin_key)
 
-        top_tabs.pack(expand = 1, fill ="both")
+                    cv = tk.Canvas(subtab_frame, width=SUBTAB_IMG_SIZE, height=SUBTAB_IMG_SIZE)
+                    cv.grid(sticky="NE", row=0, column=2, rowspan=len(subtab_params))
 
-    '''  Generic method showing param-value pair as two labels '''
-    def display_params(self, frame, rc, param, value_label_txt, param_px, param_py, value_px, value_py):
+                    self.subtab_images[blob_key] = ImageTk.PhotoImage(subtab_param_value)
+                    self.subtab_blobs[blob_key] = subtab_param_value
+                    cv.create_image((0,0), anchor=tk.NW, image=self.subtab_images[blob_key])
+
+                    ''' Full size image of the current data is rendered on click '''
+                    cv.bind("<Button-1>", lambda event, arg=blob_key: self.show_plugin_image(*arg))
+            elif subtab_param_name == 'init_durations':
+                if subtab_param_value is not None:
+                    idc = 0
+
+                    init_durs_frame = ttk.Frame(subtab_frame)
+
+                    for init_dur_entry in subtab_param_value:
+                        self.display_params(init_durs_frame, idc, init_dur_entry[0], init_dur_entry[1], 0, 1, 5, 0, (module, plugin_key, irc, idc))
+                        idc = idc + 1
+
+                    init_durs_frame.grid(sticky="NE", row=0, column=2, rowspan=len(subtab_params) - 1)
+            else:
+                self.display_params(subtab_frame, irc, subtab_param_name, subtab_param_value, 0, 1, 15, 1, (module, plugin_key, irc))
+
+            irc = irc + 1
+
+    '''  Generic method showing param-value pair as two labels
+         Value label is registered by the key to be updated later
+    '''
+    def display_params(self, frame, rc, param, value_label_txt, param_px, param_py, value_px, value_py, key=None):
         param_label_txt = param + ":" if param[0] != ' ' else param
         param_label = tk.Label(master=frame, text=param_label_txt)
         param_label.grid(sticky="W", row = rc, column=0, padx=param_px, pady=param_py)
 
-        value_fg = None
+        value_label = tk.Label(master=frame, text=value_label_txt, cursor="hand1")
+        default_fg = value_label.cget('fg')
+        value_fg = get_value_color(value_label_txt)
 
-        if isinstance(value_label_txt, str):
-            if ('No ' in value_label_txt or 'No' == value_label_txt):
-                value_fg = '#5400ff'
-            elif ('Yes' == value_label_txt or 'Good' == value_label_txt or 'Okay' == value_label_txt):
-                value_fg = '#007107'
+        if value_fg is not None:
+            value_label.config(fg=value_fg)
 
-        value_label = tk.Label(master=frame, text=value_label_txt, cursor="hand1", fg=value_fg)
         value_label.grid(sticky="W", row = rc, column=1, padx=value_px, pady=value_py)
         value_label.bind("<Button-1>", self.copy_on_click)
 
+        if key is not None:
+            self.value_labels[key] = (value_label, value_label_txt, default_fg)
+
     ''' Display colored status line at the bottom '''
     def display_status_line(self, module_object, frame, rc):
         if module_object.is_sx_device():
@@ -230,7 +750,7 @@ class SpaceDebuggerMain(tk.Tk):
 
     ''' Show image from path '''
     def show_image(self, arg):
-        img = Image.open(arg)
+        img = get_device_img(arg)
         img.show()
 
     '''  Show image from memory blob '''
@@ -238,59 +758,157 @@ class SpaceDebuggerMain(tk.Tk):
         img = arg
         img.show()
 
-    ''' Load Starlink JSON data '''
-    def load_json_data(self):
-        f = None
-        self.json_data = None
-        try:
-            f = open(self.json_file)
-            self.json_data = json.load(f)
-        except:
-            f = open(self.json_file, encoding="utf8")
-            self.json_data = json.load(f)
-
-        if f is None or self.json_data is None:
-            messagebox.showerror(_('Failed to load JSON file'), err)
-            sys.exit()
+    def show_plugin_image(self, module, plugin_key):
+        img = self.modules[module].get_plugin(plugin_key).get_image()
+
+        if img is not None:
+            self.show_image_mem(img)
+
+    def on_closing(self):
+        self.destroy()
 
-        f.close()
+    ''' Stop the checks and remove tmp file when asked
+        The window may be destroyed without on_closing, e.g. together with the parent window.
+        Children widgets send the event too, only the window itself is handled
+    '''
+    def on_destroy(self, event):
+        if event.widget is not self:
+            return
+
+        if self.load_check_id is not None:
+            self.after_cancel(self.load_check_id)
+            self.load_check_id = None
+
+        if self.poller is not None:
+            self.poller.stop()
+
+            if self.live_check_id is not None:
+                self.after_cancel(self.live_check_id)
+                self.live_check_id = None
+
+        if self.remove_json_on_exit:
+            self.remove_json_on_exit = False
 
-    ''' Read and parse Starlink JSON data '''
-    def read_json_data(self):
-        for entry in self.json_data:
             try:
-                ''' Hacky way to keep tabs in required order '''
-                if entry == dishy.DISH_KEY:
-                    self.modules['A' + entry] = dishy.Dishy(self.json_data[dishy.DISH_KEY])
-                elif entry == router.ROUTER_KEY:
-                    self.modules['B' + entry] = router.Router(self.json_data[router.ROUTER_KEY])
-                elif entry == device_app.DEVICE_KEY:
-                    self.modules['C' + entry] = device_app.DeviceApp(self.json_data[device_app.DEVICE_KEY])
-            except Exception as err:
-                messagebox.showerror(_('Error'), err)
-                sys.exit()
+                os.remove(self.json_file)
+            except OSError as err:
+                print('Failed to remove ' + self.json_file + ': ' + str(err))
+
+''' Save raw JSON data to the temporary file, viewer works with files '''
+def store_json_to_tmp(json_bytes):
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.write(json_bytes)
+    tmp_file_path = tmp.name
+    tmp.close()
+
+    return tmp_file_path
+
+''' Called when the main window is ready and the event loop is idle '''
+def measure_window_shown(mainloop_started):
+    profiler.add_phase('mainloop until window shown', mainloop_started)
+
+''' Main window implementation '''
+class SpaceDebuggerMain(tk.Tk, SpaceDebuggerView):
+    def __init__(self, file_path, remove_file_on_exit, poller=None):
+        super().__init__()
 
-        ''' About tab should be last one '''
-        self.modules['www'] = about.AboutApp()
+        self.instance_server = None
+
+        with profiler.phase('sv_ttk.set_theme'):
+            sv_ttk.set_theme("light")
+
+        self.init_view(file_path, remove_file_on_exit, poller)
+
+    ''' Single instance mode: accept files from the next space_dbg.py runs '''
+    def start_instance_server(self):
+        try:
+            self.instance_server = single_instance.InstanceServer()
+        except OSError as err:
+            print('Single instance mode is not available: ' + str(err))
+            return
+
+        self.poll_instance_server()
+
+    def poll_instance_server(self):
+        request = self.instance_server.get_request()
+
+        while request is not None:
+            if request[0] == single_instance.OPEN_FILE_MSG:
+                SpaceDebuggerWindow(self, request[1], False)
+            elif request[0] == single_instance.OPEN_JSON_MSG:
+                SpaceDebuggerWindow(self, store_json_to_tmp(request[1]), True)
+
+            request = self.instance_server.get_request()
+
+        self.after(100, self.poll_instance_server)
+
+    ''' Startup profile is reported when all data is shown '''
+    def on_data_loaded(self):
+        SpaceDebuggerView.on_data_loaded(self)
+
+        if profiler.enabled:
+            ''' Loader stores the parse cache after the last message, its profile is complete when it ends '''
+            self.loader.thread.join()
+            self.after_idle(profiler.report)
 
-    ''' We need close handler to remove tmp file when asked '''
     def on_closing(self):
-        if self.remove_json_on_exit:
-            os.remove(self.json_file)
-        self.destroy()
+        if self.instance_server is not None:
+            self.instance_server.close()
+
+        SpaceDebuggerView.on_closing(self)
+
+''' Viewer window opened in the already running application (e.g. from the launcher) '''
+class SpaceDebuggerWindow(tk.Toplevel, SpaceDebuggerView):
+    def __init__(self, parent, file_path, remove_file_on_exit, poller=None):
+        super().__init__(parent)
+
+        self.init_view(file_path, remove_file_on_exit, poller)
 
 ''' Space Debugger entry point '''
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser('Space Debugger args')
-    parser.add_argument('-f', '--file', help='Input JSON file')
-    parser.add_argument('-r', '--remove-file-on-exit', required=False, action='store_true', help='Remove input JSON file on exit')
+    poller = None
 
-    args = parser.parse_args()
+    if args.follow:
+        if args.file is None or not is_ndjson_file(args.file):
+            print('Only NDJSON files (.jsonl, .ndjson) can be followed')
+            sys.exit()
+
+        if os.path.isfile(args.file) and get_compression(args.file) is not None:
+            print('Compressed files can not be followed')
+            sys.exit()
+
+        poller = NdjsonFollower(args.file)
+    elif args.live is not None:
+        ''' Imported only in live mode, asyncio and http.server are not needed for files '''
+        import live_poller
+
+        try:
+            poller = live_poller.LivePoller(args.live or live_poller.DEFAULT_URL,
+                                            args.interval if args.interval is not None else live_poller.DEFAULT_INTERVAL)
+        except ValueError as err:
+            print(err)
+            sys.exit()
+
+    json_file = args.file
+    remove_file_on_exit = args.remove_file_on_exit
+
+    if args.stdin:
+        json_file = store_json_to_tmp(json_bytes)
+        remove_file_on_exit = True
+
+    if args.profile or args.profile_out is not None or args.profile_memory:
+        profiler.enable(args.profile_memory, args.profile_out)
+
+    if args.no_cache:
+        parse_cache_enabled = False
+
+    space_dbg = SpaceDebuggerMain(json_file, remove_file_on_exit, poller)
+
+    if profiler.enabled:
+        space_dbg.after_idle(measure_window_shown, start_timer())
+
+    if args.single_instance and poller is None:
+        space_dbg.start_instance_server()
 
-    if args.file is None:
-        print("Please provide JSON file as an argument")
-        sys.exit()
-       
-    space_dbg = SpaceDebuggerMain(args.file, args.remove_file_on_exit)
     space_dbg.mainloop()
 
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Headless batch analyzer
+    Parse many Starlink debug JSON files without GUI and
+    write one normalized JSON record per file (JSON Lines).
+    NDJSON inputs (.jsonl, .ndjson) give one record per line, the lines are
+    streamed to the workers in windows, so memory doesn't depend on the file size.
+    Compressed files are decompressed on the fly, zip bundles give one record
+    per JSON member, members are read by the workers directly from the archive
+'''
+
+import os
+import sys
+import glob
+import json
+import time
+import signal
+import datetime
+import argparse
+import zipfile
+import itertools
+import multiprocessing
+from core import load_json_file, read_entities
+from json_loader import is_ndjson_file, iter_ndjson_lines, parse_ndjson_line, get_compression, \
+                        get_zip_json_members, read_zip_member, decode_json_bytes, load_json_text, COMPRESSION_SUFFIXES
+from ndjson_follow import follow_ndjson_lines
+from obstruction_img_gen import obstruction_img_cache
+from field_extract import FieldExtractor
+
+''' Lines of NDJSON files sent to the workers at once '''
+NDJSON_WINDOW = 4096
+
+''' Single JSON documents, plain and compressed '''
+JSON_PATTERNS = ('*.json',) + tuple('*.json' + suffix for suffix in COMPRESSION_SUFFIXES)
+
+DIR_PATTERNS = JSON_PATTERNS + ('*.jsonl', '*.ndjson') + \
+                tuple(pattern + suffix for pattern in ('*.jsonl', '*.ndjson') for suffix in COMPRESSION_SUFFIXES) + ('*.zip',)
+
+''' Find input files, directories are searched recursively for JSON, NDJSON and zip files '''
+def collect_files(sources, patterns=DIR_PATTERNS):
+    files = []
+
+    for source in sources:
+        if os.path.isdir(source):
+            for pattern in patterns:
+                files += glob.glob(os.path.join(source, '**', pattern), recursive=True)
+        else:
+            files += glob.glob(source, recursive=True)
+
+    return sorted(set(files))
+
+''' Convert value to something JSON serializable '''
+def normalize_value(value):
+    if isinstance(value, str):
+        return value.strip()
+
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+
+    return str(value)
+
+''' Convert plugin rows [[label, value], ...] to dict
+    Rows without label (like alerts) are collected to the 'items' list
+'''
+def plugin_rows_to_dict(rows):
+    result = {}
+    items = []
+
+    for label, value in rows:
+        if label == 'image_blob':
+            continue
+
+        if label == 'init_durations':
+            result[label] = plugin_rows_to_dict(value) if value is not None else None
+        elif not label.strip():
+            items.append(normalize_value(value))
+        else:
+            result[label] = normalize_value(value)
+
+    if len(items):
+        result['items'] = items
+
+    return result
+
+''' Build normalized record from the entity object
+    Plugins are loaded lazily, only selected plugins are parsed if plugin_names is set
+'''
+def entity_to_record(entity, plugin_names=None):
+    record = { 'reachable': entity.is_reachable() }
+
+    if not entity.is_reachable():
+        return record
+
+    params = {}
+    entity.get_readable_params(params)
+
+    ''' Skip spacers '''
+    record['params'] = { k: normalize_value(v) for k, v in params.items() if k.strip() }
+
+    additional_params = {}
+    entity.get_additional_data(additional_params, plugin_names)
+
+    record['plugins'] = { name: plugin_rows_to_dict(data[1]) for name, data in additional_params.items() }
+
+    return record
+
+''' Reference images in the shared PNG store '''
+def add_image_paths(entity, entity_record):
+    for lazy_plugin in entity.plugins:
+        if not lazy_plugin.is_loaded():
+            continue
+
+        plugin = lazy_plugin.get()
+
+        if plugin.is_data_ready() and plugin.has_img():
+            entity_record['plugins'][plugin.get_name()]['image'] = plugin.get_image_path()
+
+def add_entities(record, json_data):
+    entities = read_entities(json_data)
+
+    for key in sorted(entities):
+        entity = entities[key]
+        entity_record = entity_to_record(entity, plugin_names)
+
+        if obstruction_img_cache.store_dir is not None and entity.is_reachable():
+            add_image_paths(entity, entity_record)
+
+        record[entity.name.lower()] = entity_record
+
+''' Pool worker: parse one file, errors are recorded instead of exit '''
+def process_file(json_file_path):
+    record = { 'file': json_file_path }
+
+    try:
+        if field_extractor is not None:
+            record['fields'] = dict(zip(field_extractor.paths, field_extractor.extract_file(json_file_path)))
+            return record
+
+        add_entities(record, load_json_file(json_file_path))
+    except Exception as err:
+        record['error'] = type(err).__name__ + ': ' + str(err)
+
+    return record
+
+''' Archive opened by the worker, members of one archive mostly come in a row '''
+worker_archive = None
+
+def get_worker_archive(zip_file_path):
+    global worker_archive
+
+    if worker_archive is None or worker_archive.filename != zip_file_path:
+        if worker_archive is not None:
+            worker_archive.close()
+
+        worker_archive = zipfile.ZipFile(zip_file_path)
+
+    return worker_archive
+
+''' Pool worker: parse one JSON member of the zip archive, nothing is extracted to disk '''
+def process_member(member_info):
+    zip_file_path, member_name = member_info
+    record = { 'file': zip_file_path, 'member': member_name }
+
+    try:
+        text = decode_json_bytes(read_zip_member(get_worker_archive(zip_file_path), member_name))
+
+        if field_extractor is not None:
+            record['fields'] = field_extractor.extract_dict(load_json_text(text, field_extractor.sections))
+            return record
+
+        add_entities(record, load_json_text(text))
+    except Exception as err:
+        record['error'] = type(err).__name__ + ': ' + str(err)
+
+    return record
+
+''' Pool worker: files are given as paths, archive members as (archive path, member name) '''
+def process_task(task):
+    if isinstance(task, tuple):
+        return process_member(task)
+
+    return process_file(task)
+
+''' Pool worker: parse one line of NDJSON file, offset identifies the line in the file '''
+def process_line(line_info):
+    json_file_path, line_offset, line = line_info
+    record = { 'file': json_file_path, 'offset': line_offset }
+
+    try:
+        json_data = parse_ndjson_line(line)
+
+        if field_extractor is not None:
+            record['fields'] = field_extractor.extract_dict(json_data)
+            return record
+
+        add_entities(record, json_data)
+    except Exception as err:
+        record['error'] = type(err).__name__ + ': ' + str(err)
+
+    return record
+
+''' Plugins to load, None means all of them '''
+plugin_names = None
+
+''' Only these raw fields are extracted when set, no entities are created '''
+field_extractor = None
+
+''' Entities print loading messages, keep the workers quiet '''
+def init_worker(img_cache_dir, selected_plugins, fields):
+    global plugin_names, field_extractor
+
+    sys.stdout = open(os.devnull, 'w')
+
+    ''' Ctrl+C is handled by the main process, e.g. to stop following '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    plugin_names = selected_plugins
+
+    if fields is not None:
+        field_extractor = FieldExtractor(fields)
+
+    if img_cache_dir is not None:
+        obstruction_img_cache.set_store_dir(img_cache_dir)
+
+''' Zip files are detected by the magic bytes, unreadable files are left to the workers '''
+def is_zip_file(json_file_path):
+    try:
+        return get_compression(json_file_path) == 'zip'
+    except OSError:
+        return False
+
+''' Returns 1 for the error record, so errors can be counted '''
+def write_record(out, record):
+    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return 1 if 'error' in record else 0
+
+''' Stream lines of the NDJSON file to the workers, records are written in the file order
+    Unterminated last line is left for the follower when the file is followed (partial_tail)
+    Unreadable rest of the file (truncated archive, vanished file) is reported
+    as an error record at its offset, the lines before it are still processed
+    Returns (records, errors, offset after the last line)
+'''
+def process_ndjson_file(pool, json_file_path, out, jobs, partial_tail=False):
+    records = 0
+    errors = 0
+    offset = 0
+    lines = iter_ndjson_lines(json_file_path, partial_tail=partial_tail)
+    read_error = None
+
+    while read_error is None:
+        window = []
+
+        try:
+            for line_offset, offset, line in itertools.islice(lines, NDJSON_WINDOW):
+                window.append((json_file_path, line_offset, line))
+        except Exception as err:
+            read_error = type(err).__name__ + ': ' + str(err)
+
+        if not len(window):
+            break
+
+        for record in pool.imap(process_line, window, max(1, len(window) // (jobs * 4))):
+            records = records + 1
+            errors = errors + write_record(out, record)
+
+    if read_error is not None:
+        records = records + 1
+        errors = errors + write_record(out, { 'file': json_file_path, 'offset': offset, 'error': read_error })
+
+    return records, errors, offset
+
+''' Write records of the lines appended to the file until interrupted '''
+def follow_ndjson_file(pool, json_file_path, offset, out):
+    records = 0
+    errors = 0
+
+    try:
+        for line_offset, next_offset, line in follow_ndjson_lines(json_file_path, offset):
+            records = records + 1
+            errors = errors + write_record(out, pool.apply(process_line, ((json_file_path, line_offset, line),)))
+            out.flush()
+    except KeyboardInterrupt:
+        pass
+
+    return records, errors
+
+''' Returns (records, errors), NDJSON files give one record per line, zip files one record per member
+    Only the last NDJSON file is followed, after all inputs are processed
+'''
+def run_batch(files, out, jobs, chunk_size, img_cache_dir=None, selected_plugins=None, fields=None, follow=False):
+    ndjson_files = [ f for f in files if is_ndjson_file(f) ]
+    tasks = []
+    records = 0
+    errors = 0
+    offset = 0
+
+    ''' Only the member list is read here, members are decompressed by the workers '''
+    for json_file_path in files:
+        if is_ndjson_file(json_file_path):
+            continue
+
+        if not is_zip_file(json_file_path):
+            tasks.append(json_file_path)
+            continue
+
+        try:
+            with zipfile.ZipFile(json_file_path) as zip_file:
+                tasks += [ (json_file_path, member_name) for member_name in get_zip_json_members(zip_file) ]
+        except (OSError, zipfile.BadZipFile) as err:
+            records = records + 1
+            errors = errors + write_record(out, { 'file': json_file_path, 'error': type(err).__name__ + ': ' + str(err) })
+
+    if chunk_size is None:
+        chunk_size = max(1, min(64, len(tasks) // (jobs * 4)))
+
+    with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(img_cache_dir, selected_plugins, fields)) as pool:
+        for record in pool.imap_unordered(process_task, tasks, chunk_size):
+            records = records + 1
+            errors = errors + write_record(out, record)
+
+        for json_file_path in ndjson_files:
+            file_records, file_errors, offset = process_ndjson_file(pool, json_file_path, out, jobs,
+                                                                    follow and json_file_path == ndjson_files[-1])
+            records = records + file_records
+            errors = errors + file_errors
+
+        if follow and len(ndjson_files):
+            out.flush()
+            file_records, file_errors = follow_ndjson_file(pool, ndjson_files[-1], offset, out)
+            records = records + file_records
+            errors = errors + file_errors
+
+    return records, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser('Space Debugger batch analyzer')
+    parser.add_argument('sources', nargs='+', help='Input JSON, NDJSON or zip files (can be gzip, xz or bz2 compressed), directories or glob patterns')
+    parser.add_argument('-o', '--output', default='-', help='Output JSON Lines file, stdout by default')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('-c', '--chunk-size', type=int, default=None, help='Number of files or archive members sent to a worker at once')
+    parser.add_argument('-p', '--plugins', default=None, help='Comma separated list of plugins to parse, e.g. Alignment,Network')
+    parser.add_argument('-F', '--fields', default=None, help='Comma separated raw fields to extract, e.g. dish.popPingLatencyMs,dish.softwareUpdateState')
+    parser.add_argument('--follow', action='store_true', help='Follow the NDJSON file and write records of the appended lines until Ctrl+C')
+    parser.add_argument('--img-cache', default=None, help='Directory to store rendered obstruction images (PNG)')
+
+    args = parser.parse_args()
+
+    files = collect_files(args.sources)
+
+    if not len(files):
+        print('No input files found', file=sys.stderr)
+        sys.exit(1)
+
+    if args.follow:
+        ndjson_files = [f for f in files if is_ndjson_file(f)]
+
+        if len(ndjson_files) != 1:
+            print('Exactly one NDJSON file can be followed', file=sys.stderr)
+            sys.exit(1)
+
+        if get_compression(ndjson_files[0]) is not None:
+            print('Compressed files can not be followed', file=sys.stderr)
+            sys.exit(1)
+
+    selected_plugins = None
+
+    if args.plugins is not None:
+        selected_plugins = set(name.strip() for name in args.plugins.split(','))
+
+    fields = None
+
+    if args.fields is not None:
+        fields = [field.strip() for field in args.fields.split(',')]
+
+        try:
+            FieldExtractor(fields)
+        except ValueError as err:
+            print(err, file=sys.stderr)
+            sys.exit(1)
+
+    start_time = time.monotonic()
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf8')
+
+    records, errors = run_batch(files, out, max(1, args.jobs), args.chunk_size, args.img_cache, selected_plugins, fields, args.follow)
+
+    if out is not sys.stdout:
+        out.close()
+
+    print('Processed %d files, %d records, %d errors, %.2f sec' % (len(files), records, errors, time.monotonic() - start_time), file=sys.stderr)
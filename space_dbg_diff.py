@@ -0,0 +1,253 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Structural diff of the debug data exports
+    Raw text of every entity section is hashed first, identical sections are not parsed at all.
+    Changed sections are loaded through the entities and their normalized records
+    (the same as in the batch tool) are compared field by field.
+    With more than two files every export is compared with the previous one.
+'''
+
+import sys
+import json
+import hashlib
+import argparse
+from json_loader import read_json_text, split_json_sections, read_entities
+from space_dbg_batch import entity_to_record, normalize_value
+from dishy import DishyObstructions
+
+''' Labels of the record levels '''
+PARAMS_KEY = 'params'
+PLUGINS_KEY = 'plugins'
+ITEMS_KEY = 'items'
+WEDGES_KEY = 'wedges'
+
+''' Export file: section digests, records are built on demand '''
+class ExportSnapshot:
+    def __init__(self, json_file_path):
+        self.path = json_file_path
+        self.raw_sections = split_json_sections(read_json_text(json_file_path))
+        self.digests = { key: hashlib.sha1(raw.encode()).digest() for key, raw in self.raw_sections.items() }
+
+        ''' Section key -> {entity name: record} '''
+        self.records = {}
+
+    ''' Records of the entities of the section '''
+    def get_records(self, section_key):
+        if section_key not in self.records:
+            section_records = {}
+            json_data = { section_key: json.loads(self.raw_sections[section_key]) }
+
+            for entity in read_entities(json_data).values():
+                section_records[entity.name.lower()] = get_entity_record(entity)
+
+            self.records[section_key] = section_records
+
+        return self.records[section_key]
+
+    ''' Record of the same section from the previous snapshot, used when the section isn't changed '''
+    def reuse_records(self, other, section_key):
+        if section_key in other.records:
+            self.records[section_key] = other.records[section_key]
+
+''' Normalized entity record with the raw obstruction wedges, so shifted wedges are reported '''
+def get_entity_record(entity):
+    record = entity_to_record(entity)
+
+    if entity.is_reachable():
+        plugin = entity.get_plugin(DishyObstructions.plugin_name)
+
+        if plugin is not None and plugin.is_data_ready() and plugin.get_name() in record[PLUGINS_KEY]:
+            record[PLUGINS_KEY][plugin.get_name()][WEDGES_KEY] = normalize_value(plugin.frac_obstr_list)
+
+    return record
+
+''' Compare values recursively, changes are (path, old, new)
+    None means missing value, list items without labels (alerts) are reported as added or removed
+'''
+def diff_values(path, old, new, changes):
+    if old == new:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            diff_values(path + (key,), old[key], new.get(key), changes)
+
+        for key in new:
+            if key not in old:
+                changes.append((path + (key,), None, new[key]))
+    elif isinstance(old, list) and isinstance(new, list) and len(path) and path[-1] == ITEMS_KEY:
+        for item in old:
+            if item not in new:
+                changes.append((path, item, None))
+
+        for item in new:
+            if item not in old:
+                changes.append((path, None, item))
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i in range(len(old)):
+            if old[i] != new[i]:
+                changes.append((path + (i,), old[i], new[i]))
+    else:
+        changes.append((path, old, new))
+
+''' Changes between two snapshots, sections with the same digest are skipped '''
+def diff_snapshots(old, new):
+    changes = []
+
+    for section_key in sorted(set(old.digests) | set(new.digests)):
+        if old.digests.get(section_key) == new.digests.get(section_key):
+            new.reuse_records(old, section_key)
+            continue
+
+        old_records = old.get_records(section_key) if section_key in old.digests else {}
+        new_records = new.get_records(section_key) if section_key in new.digests else {}
+
+        diff_values((), old_records, new_records, changes)
+
+    return changes
+
+''' Path without the record levels: entity, plugin, field... '''
+def get_display_path(path):
+    return [str(p) for p in path if p != PLUGINS_KEY]
+
+def format_value(value):
+    if value is None:
+        return '-'
+
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+
+    return str(value)
+
+def print_changes(changes, out):
+    if not len(changes):
+        print('  No changes', file=out)
+        return
+
+    shown_path = []
+
+    for path, old, new in changes:
+        display_path = get_display_path(path)
+        group = display_path[:-1]
+
+        ''' Entity and plugin headers are printed once '''
+        for depth in range(len(group)):
+            if shown_path[:depth + 1] != group[:depth + 1]:
+                print('  ' * (depth + 1) + group[depth], file=out)
+
+        shown_path = group
+        indent = '  ' * (len(group) + 1)
+
+        if path[-1] == ITEMS_KEY:
+            if old is None:
+                print(indent + '+ ' + format_value(new), file=out)
+            else:
+                print(indent + '- ' + format_value(old), file=out)
+        else:
+            print(indent + display_path[-1] + ': ' + format_value(old) + ' -> ' + format_value(new), file=out)
+
+''' Changes in the tree: entity -> plugin -> field with old and new values '''
+def show_diff_window(results):
+    import tkinter as tk
+    import tkinter.ttk as ttk
+
+    root = tk.Tk()
+    root.title('Space Debugger: diff')
+    root.geometry('900x600')
+
+    tree = ttk.Treeview(root, columns=('old', 'new'))
+    tree.heading('#0', text='Field')
+    tree.heading('old', text='Old')
+    tree.heading('new', text='New')
+    tree.column('#0', width=400)
+
+    scroll = ttk.Scrollbar(root, orient='vertical', command=tree.yview)
+    tree.configure(yscrollcommand=scroll.set)
+    scroll.pack(side=tk.RIGHT, fill='y')
+    tree.pack(expand=True, fill='both')
+
+    for title, changes in results:
+        pair_node = tree.insert('', 'end', text=title, open=True)
+        nodes = {}
+
+        for path, old, new in changes:
+            display_path = get_display_path(path)
+            parent = pair_node
+
+            for depth in range(len(display_path) - 1):
+                key = tuple(display_path[:depth + 1])
+
+                if key not in nodes:
+                    nodes[key] = tree.insert(parent, 'end', text=display_path[depth], open=True)
+
+                parent = nodes[key]
+
+            tree.insert(parent, 'end', text=display_path[-1], values=(format_value(old), format_value(new)))
+
+    root.mainloop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare Starlink debug data exports')
+    parser.add_argument('files', nargs='+', help='Two exports, or more to compare every export with the previous one')
+    parser.add_argument('--json', action='store_true', help='Print changes as JSON Lines')
+    parser.add_argument('--gui', action='store_true', help='Show changes in a window')
+
+    args = parser.parse_args()
+
+    if len(args.files) < 2:
+        print('At least two files are required', file=sys.stderr)
+        sys.exit(1)
+
+    ''' Parsers print loading messages, only changes go to stdout '''
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    results = []
+    previous = None
+
+    for json_file_path in args.files:
+        try:
+            snapshot = ExportSnapshot(json_file_path)
+        except Exception as err:
+            print(json_file_path + ': ' + str(err), file=sys.stderr)
+            sys.exit(1)
+
+        if previous is not None:
+            try:
+                changes = diff_snapshots(previous, snapshot)
+            except Exception as err:
+                print(json_file_path + ': ' + str(err), file=sys.stderr)
+                sys.exit(1)
+
+            results.append((previous.path + ' -> ' + snapshot.path, changes))
+
+            if args.json:
+                for path, old, new in changes:
+                    print(json.dumps({ 'old_file': previous.path, 'new_file': snapshot.path, 'path': list(path),
+                                        'old': old, 'new': new }, ensure_ascii=False), file=out)
+            elif not args.gui:
+                print(previous.path + ' -> ' + snapshot.path, file=out)
+                print_changes(changes, out)
+
+        previous = snapshot
+
+    if args.gui:
+        show_diff_window(results)
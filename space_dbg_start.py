@@ -29,6 +29,7 @@ import tkinter.ttk as ttk
 import sv_ttk
 from tkinter import filedialog as fd
 from tkinter import messagebox
+from tkinter import simpledialog
 import gettext
 import tempfile
 
@@ -37,14 +38,16 @@ gettext.textdomain('space-debugger')
 
 _ = gettext.gettext
 
-def run_space_debugger_with_data(json_file_path, flags=''):
-    run_args = []
-
+''' Command to run the viewer as a separate process '''
+def get_space_debugger_command():
     if os.name == 'nt':
-        run_args.append('space_dbg.exe')
-    else:
-        run_args.append('python3')
-        run_args.append(os.path.join(os.getcwd()) + '/' + 'space_dbg.py')
+        return ['space_dbg.exe']
+
+    return ['python3', os.path.join(os.getcwd()) + '/' + 'space_dbg.py']
+
+''' Run viewer as a separate process, used for Windows exe bundles '''
+def run_space_debugger_with_data(json_file_path, flags=''):
+    run_args = get_space_debugger_command()
 
     run_args.append('-f')
     run_args.append(json_file_path)
@@ -52,6 +55,9 @@ def run_space_debugger_with_data(json_file_path, flags=''):
     if flags != '':
         run_args.append(flags)
 
+    run_space_debugger(run_args)
+
+def run_space_debugger(run_args):
     proc = None
 
     try:
@@ -64,6 +70,50 @@ def run_space_debugger_with_data(json_file_path, flags=''):
 
     proc.communicate(input='\n')
 
+''' Viewer is opened in this process unless asked otherwise
+    Windows exe bundles ship the viewer as a separate executable
+'''
+def use_subprocess_viewer():
+    if os.environ.get('SPACE_DEBUGGER_SUBPROCESS'):
+        return True
+
+    return os.name == 'nt' and getattr(sys, 'frozen', False)
+
+''' Open viewer window for the JSON file
+    Returns True if the launcher should quit (viewer was run as a separate process)
+'''
+def open_space_debugger(parent, json_file_path, remove_file_on_exit=False):
+    if use_subprocess_viewer():
+        run_space_debugger_with_data(json_file_path, '-r' if remove_file_on_exit else '')
+        return True
+
+    ''' Imported on first use, the launcher itself starts faster '''
+    import space_dbg
+
+    space_dbg.SpaceDebuggerWindow(parent, json_file_path, remove_file_on_exit)
+
+    return False
+
+''' Open viewer window polling live data from the URL, returns True if the launcher should quit '''
+def open_live_space_debugger(parent, url):
+    import live_poller
+
+    try:
+        poller = live_poller.LivePoller(url)
+    except ValueError as err:
+        messagebox.showerror(_('Error'), err, parent=parent)
+        return False
+
+    if use_subprocess_viewer():
+        run_space_debugger(get_space_debugger_command() + ['--live', url])
+        return True
+
+    import space_dbg
+
+    space_dbg.SpaceDebuggerWindow(parent, None, False, poller)
+
+    return False
+
 class JsonInputWindow(tk.Toplevel):
     def __init__(self, parent):
         super().__init__(parent)
@@ -107,8 +157,10 @@ class JsonInputWindow(tk.Toplevel):
         tmp_file_path = self.store_data_to_tmp(self.text_box.get('1.0','end-1c'))
 
         if tmp_file_path is not None:
-            run_space_debugger_with_data(tmp_file_path, '-r')
-            self.quit()
+            if open_space_debugger(self.master, tmp_file_path, True):
+                self.quit()
+            else:
+                self.destroy()
 
 class SpaceDebuggerStart(tk.Tk):
     def __init__(self):
@@ -134,15 +186,28 @@ class SpaceDebuggerStart(tk.Tk):
                 command=lambda: self.run_paste_text(), width=20)
         self.text_input_btn.grid(row=0, column=1, padx=10, pady=20)
 
+        self.net_fetch_btn = ttk.Button(self, text=_('Live data'), \
+                command=lambda: self.run_net_fetch(), width=20)
+        self.net_fetch_btn.grid(row=0, column=2, padx=10, pady=20)
+
+    ''' Live mode, status is polled from the URL '''
     def run_net_fetch(self):
-        print('net fetch')
+        import live_poller
+
+        url = simpledialog.askstring(_('Live data'), _('Status URL'), \
+                initialvalue=live_poller.DEFAULT_URL, parent=self)
+
+        if url:
+            if open_live_space_debugger(self, url.strip()):
+                self.quit()
 
     def run_open_file(self):
-        file_types = ((_('JSON files'), '*.json'), (_('All files'), '*.*'))
+        file_types = ((_('JSON files'), '*.json'), (_('JSON Lines files'), '*.jsonl *.ndjson'),
+                        (_('Compressed files'), '*.gz *.xz *.bz2 *.zip'), (_('All files'), '*.*'))
         filename = fd.askopenfilename(title=_('Select JSON file'), filetypes=file_types)
         if len(filename) > 0:
-            run_space_debugger_with_data(filename)
-            self.quit()
+            if open_space_debugger(self, filename):
+                self.quit()
 
     def run_paste_text(self):
         json_win = JsonInputWindow(self)
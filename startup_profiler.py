@@ -0,0 +1,202 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Startup profiling
+    Wall-clock and CPU time of the startup phases (imports, JSON loading,
+    plugins, rendering, widgets...), optional cProfile and tracemalloc data.
+    Phases can be nested, outer phase time includes the inner ones.
+    Phases may run in several threads: CPU time and nesting are per thread,
+    other threads are profiled by cProfile inside of thread_profile() only.
+    Memory peaks are process-wide, tracemalloc traces all threads.
+    Only standard library is used, the module is safe to import anywhere.
+'''
+
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+''' CPU time of the current thread, Python 3.6 has only the process time '''
+thread_time = getattr(time, 'thread_time', time.process_time)
+
+def start_timer():
+    return (time.perf_counter(), thread_time())
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.cprofile = None
+        self.cprofile_file = None
+        self.started = start_timer()
+        self.started_cpu = time.process_time()
+
+        ''' Phase name -> [calls, wall time, cpu time, memory peak] '''
+        self.phases = {}
+        self.lock = threading.Lock()
+
+        ''' Memory phases stack of the thread '''
+        self.local = threading.local()
+
+        ''' cProfile data of the finished thread_profile() contexts '''
+        self.thread_cprofiles = []
+
+    def enable(self, trace_memory=False, cprofile_file=None):
+        self.enabled = True
+
+        ''' Imported only when needed, the module is used by the parsing core '''
+        global cProfile, tracemalloc
+        import cProfile
+        import tracemalloc
+
+        if trace_memory:
+            self.trace_memory = True
+            tracemalloc.start()
+
+        if cprofile_file is not None:
+            self.cprofile_file = cprofile_file
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    ''' Add phase measured outside of the phase() context, e.g. imports
+        The phase should end in the thread where it was started
+    '''
+    def add_phase(self, name, started, mem_peak=None, cpu=None):
+        wall = time.perf_counter() - started[0]
+
+        if cpu is None:
+            cpu = thread_time() - started[1]
+
+        with self.lock:
+            phase = self.phases.setdefault(name, [0, 0.0, 0.0, None])
+            phase[0] = phase[0] + 1
+            phase[1] = phase[1] + wall
+            phase[2] = phase[2] + cpu
+
+            if mem_peak is not None:
+                phase[3] = mem_peak if phase[3] is None else max(phase[3], mem_peak)
+
+    def get_mem_stack(self):
+        if not hasattr(self.local, 'mem_stack'):
+            self.local.mem_stack = []
+
+        return self.local.mem_stack
+
+    def mem_phase_start(self):
+        mem_stack = self.get_mem_stack()
+        current, peak = tracemalloc.get_traced_memory()
+
+        ''' Peak of the outer phase should survive the reset '''
+        if len(mem_stack):
+            mem_stack[-1][1] = max(mem_stack[-1][1], peak)
+
+        ''' Python < 3.9 can't reset peak, the peak since start is used then '''
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+
+        mem_stack.append([current, current])
+
+    def mem_phase_end(self):
+        mem_stack = self.get_mem_stack()
+        start_current, peak = mem_stack.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+
+        if len(mem_stack):
+            mem_stack[-1][1] = max(mem_stack[-1][1], peak)
+
+        return peak - start_current
+
+    ''' cProfile profiles only the thread which enabled it, other threads
+        run their code in this context to get into the cProfile data
+    '''
+    @contextmanager
+    def thread_profile(self):
+        if self.cprofile is None:
+            yield
+            return
+
+        thread_cprofile = cProfile.Profile()
+        thread_cprofile.enable()
+
+        try:
+            yield
+        finally:
+            thread_cprofile.disable()
+
+            with self.lock:
+                self.thread_cprofiles.append(thread_cprofile)
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        if self.trace_memory:
+            self.mem_phase_start()
+
+        started = start_timer()
+
+        try:
+            yield
+        finally:
+            mem_peak = self.mem_phase_end() if self.trace_memory else None
+            self.add_phase(name, started, mem_peak)
+
+    ''' Print phases table, dump cProfile data if requested '''
+    def report(self, out=sys.stdout):
+        if not self.enabled:
+            return
+
+        ''' Total CPU time is of all threads '''
+        self.add_phase('total', self.started, cpu=time.process_time() - self.started_cpu)
+
+        if self.cprofile is not None:
+            import pstats
+
+            self.cprofile.disable()
+            stats = pstats.Stats(self.cprofile)
+
+            with self.lock:
+                for thread_cprofile in self.thread_cprofiles:
+                    stats.add(thread_cprofile)
+
+            stats.dump_stats(self.cprofile_file)
+
+        header = '%-40s %6s %10s %10s' % ('Phase', 'Calls', 'Wall, ms', 'CPU, ms')
+
+        if self.trace_memory:
+            header = header + ' %12s' % 'Mem peak, KB'
+
+        print(header, file=out)
+        print('-' * len(header), file=out)
+
+        for name, phase in self.phases.items():
+            line = '%-40s %6d %10.1f %10.1f' % (name, phase[0], phase[1] * 1000, phase[2] * 1000)
+
+            if self.trace_memory:
+                line = line + ' %12s' % ('-' if phase[3] is None else '%.1f' % (phase[3] / 1024))
+
+            print(line, file=out)
+
+        if self.cprofile_file is not None:
+            print('cProfile data saved to ' + self.cprofile_file, file=out)
+
+profiler = StartupProfiler()
@@ -0,0 +1,70 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from json_loader import parse_json_sections, split_json_sections
+
+''' Skipped sections must be accepted and rejected like json.loads does it '''
+class SkipValueTest(unittest.TestCase):
+    def parse(self, skipped):
+        return parse_json_sections('{"skip": ' + skipped + ', "keep": [1, 2]}', ('keep',))
+
+    def assertSkipped(self, skipped):
+        json.loads(skipped)
+        self.assertEqual(self.parse(skipped), { 'keep': [1, 2] })
+        self.assertEqual(split_json_sections('{"skip": ' + skipped + '}', ('skip',)), { 'skip': skipped })
+
+    def assertRejected(self, skipped):
+        self.assertRaises(ValueError, json.loads, skipped)
+        self.assertRaises(ValueError, self.parse, skipped)
+
+    def test_nested(self):
+        self.assertSkipped('{"a": [1, {"b": [[], {}]}, -2.5e+3], "c": {"d": [true, false, null]}}')
+        self.assertSkipped('[[[[[]]]], [{}], {"x": []}]')
+
+    def test_scalars(self):
+        for skipped in ('"text"', '-1.5E-7', '0', 'true', 'false', 'null', '[NaN, -Infinity]'):
+            self.assertSkipped(skipped)
+
+    def test_brackets_in_strings(self):
+        self.assertSkipped('{"a": "]}{[", "b": ["[", "}"]}')
+        self.assertSkipped('["escaped \\" ] quote", "back\\\\", "\\\\\\"}"]')
+        self.assertSkipped('{"\\u005d": "\\n\\t]"}')
+
+    def test_mismatched(self):
+        for skipped in ('[}', '{]', '[{]}', '{"a": [1, 2}}', '[]]', '{"a": "]"]'):
+            self.assertRejected(skipped)
+
+    def test_truncated(self):
+        for skipped in ('[1, 2', '{"a": {"b": [', '["unterminated', '{"a": "esc\\"}', '[1, "x\\'):
+            self.assertRaises(ValueError, parse_json_sections, '{"skip": ' + skipped, ('keep',))
+
+    def test_garbage(self):
+        for skipped in ('[1, x]', '{"a": undefined}', "['single']", '[1; 2]', '{"a": @}', '[None]'):
+            self.assertRejected(skipped)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+import io
+import os
+import sys
+import unittest
+import contextlib
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import obstruction_img_gen
+from gen_debug_json import generate_exports
+from json_loader import read_entities
+from dishy import DishyObstructions
+from live_poller import LivePoller, print_snapshot
+from space_dbg_diff import get_entity_record, WEDGES_KEY
+
+''' Headless records must not render obstruction images, the viewer renders them at its size '''
+class RecordImagesTest(unittest.TestCase):
+    def setUp(self):
+        obstruction_img_gen.obstruction_img_cache.clear()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.snapshots = generate_exports(4)
+            self.entities = [read_entities(snapshot) for snapshot in self.snapshots]
+
+    def get_dishes(self):
+        return [entities['Adish'] for entities in self.entities if entities['Adish'].is_reachable()]
+
+    def test_diff_records_are_not_rendered(self):
+        with mock.patch('obstruction_img_gen.generate_img_from_list') as render:
+            records = [get_entity_record(dish) for dish in self.get_dishes()]
+
+        render.assert_not_called()
+        self.assertTrue(any(WEDGES_KEY in record['plugins'].get(DishyObstructions.plugin_name, {}) for record in records))
+
+    def test_live_records_are_not_rendered(self):
+        poller = LivePoller()
+        out = io.StringIO()
+
+        with mock.patch('obstruction_img_gen.generate_img_from_list') as render, contextlib.redirect_stdout(io.StringIO()):
+            for snapshot in self.snapshots:
+                print_snapshot(poller, snapshot, out)
+
+        render.assert_not_called()
+        self.assertEqual(len(out.getvalue().splitlines()), len(self.snapshots))
+
+    def test_viewer_image_size(self):
+        for dish in self.get_dishes():
+            additional_data = {}
+            dish.get_additional_data(additional_data, img_size=170)
+            rows = dict((row[0], row[1]) for row in additional_data[DishyObstructions.plugin_name][1])
+
+            if dish.get_plugin(DishyObstructions.plugin_name).has_img():
+                self.assertEqual(rows['image_blob'].size, (170, 170))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+import os
+import sys
+import array
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from timeseries_store import TimeSeriesStore, device_dir_name
+
+class TimeSeriesStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = TimeSeriesStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_device(self, device_id, metric):
+        series = self.store.open(device_id)
+
+        try:
+            return list(series.get_timestamps()), list(series.get_column(metric))
+        finally:
+            series.close()
+
+    ''' Interrupted append: metric value written, timestamp not '''
+    def test_append_after_orphan_values(self):
+        self.store.append('dev', 100, { 'downlink_tput_bps': 1.0 })
+
+        with open(os.path.join(self.store.get_device_dir('dev'), 'downlink_tput_bps'), 'ab') as f:
+            array.array('f', [999.0]).tofile(f)
+
+        self.store.append('dev', 200, { 'downlink_tput_bps': 2.0 })
+
+        self.assertEqual(self.read_device('dev', 'downlink_tput_bps'), ([100, 200], [1.0, 2.0]))
+
+    def test_short_column_is_filled(self):
+        self.store.append('dev', 100, { 'uptime': 10 })
+
+        with open(os.path.join(self.store.get_device_dir('dev'), 'uptime'), 'r+b') as f:
+            f.truncate(0)
+
+        self.store.append('dev', 200, { 'uptime': 20 })
+
+        self.assertEqual(self.read_device('dev', 'uptime'), ([100, 200], [-1, 20]))
+
+    def test_device_dir_names_differ(self):
+        self.assertNotEqual(device_dir_name('a/b'), device_dir_name('a_b'))
+
+        self.store.append('a/b', 100, { 'uptime': 1 })
+        self.store.append('a_b', 100, { 'uptime': 2 })
+
+        self.assertEqual(self.read_device('a/b', 'uptime'), ([100], [1]))
+        self.assertEqual(self.read_device('a_b', 'uptime'), ([100], [2]))
+
+if __name__ == '__main__':
+    unittest.main()
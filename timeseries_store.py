@@ -0,0 +1,408 @@
+#
+#   Copyright 2023  Oleg Kutkov <contact@olegkutkov.me>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#vim:
+#set expandtab
+#set tabstop=4
+
+''' Columnar time-series store for the repeated snapshots of the same dish
+    Every device has its own directory with one file per column, the file is
+    a raw typed array: timestamps (seconds, 'q') and one column per metric.
+    Store is append-only, timestamps of the device must grow.
+    Columns are memory-mapped on read, range queries use binary search
+    over the timestamps and return memoryview slices without copying.
+    A year of per-minute history takes about 30 MB per device.
+'''
+
+import os
+import re
+import sys
+import json
+import mmap
+import math
+import array
+import hashlib
+import bisect
+import itertools
+import argparse
+from dishy_data import DISH_KEY, DEVICE_INFO_KEY, DEVICE_INFO_ID_KEY, DEVICE_TIMESTAMP_KEY, \
+                    DEVICE_STATE_KEY, DEVICE_UPTIME_KEY, DEVICE_INFO_BOOT_COUNT_KEY, \
+                    NET_DOWNLINK_TPUT_BPS_KEY, NET_UPLINK_TPUT_BPS_KEY, \
+                    NET_POP_PING_LATENCY_MS_KEY, NET_POP_PING_DROP_RATE_KEY, \
+                    DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_FRACTION_OBSTRUCTED_KEY, \
+                    DEVICE_ALIGNMENT_STATS_KEY, DEVICE_ALIGNMENT_STATS_TILT_ANGLE_DEG_KEY, \
+                    DEVICE_BORESIGHT_AZIMUTH_DEG_KEY, DEVICE_BORESIGHT_ELEVATION_DEG_KEY
+from field_extract import FieldExtractor, PATH_SEPARATOR
+from json_loader import load_json_file
+
+STORE_VERSION = 1
+META_FILE = 'meta.json'
+TIMESTAMP_COLUMN = 'timestamp'
+TIMESTAMP_TYPE = 'q'
+
+def dish_path(*keys):
+    return PATH_SEPARATOR.join((DISH_KEY,) + keys)
+
+''' Metric columns: name, typecode, raw field path, value for missing data '''
+METRICS = (
+    ('downlink_tput_bps', 'f', dish_path(NET_DOWNLINK_TPUT_BPS_KEY), math.nan),
+    ('uplink_tput_bps', 'f', dish_path(NET_UPLINK_TPUT_BPS_KEY), math.nan),
+    ('pop_ping_latency_ms', 'f', dish_path(NET_POP_PING_LATENCY_MS_KEY), math.nan),
+    ('pop_ping_drop_rate', 'f', dish_path(NET_POP_PING_DROP_RATE_KEY), math.nan),
+    ('fraction_obstructed', 'f', dish_path(DEVICE_OBSTRUCTION_STATS_KEY, DEVICE_OBSTRUCTION_STATS_FRACTION_OBSTRUCTED_KEY), math.nan),
+    ('uptime', 'q', dish_path(DEVICE_STATE_KEY, DEVICE_UPTIME_KEY), -1),
+    ('boot_count', 'i', dish_path(DEVICE_INFO_KEY, DEVICE_INFO_BOOT_COUNT_KEY), -1),
+    ('tilt_angle_deg', 'f', dish_path(DEVICE_ALIGNMENT_STATS_KEY, DEVICE_ALIGNMENT_STATS_TILT_ANGLE_DEG_KEY), math.nan),
+    ('boresight_az_deg', 'f', dish_path(DEVICE_ALIGNMENT_STATS_KEY, DEVICE_BORESIGHT_AZIMUTH_DEG_KEY), math.nan),
+    ('boresight_el_deg', 'f', dish_path(DEVICE_ALIGNMENT_STATS_KEY, DEVICE_BORESIGHT_ELEVATION_DEG_KEY), math.nan)
+)
+
+METRIC_NAMES = tuple(metric[0] for metric in METRICS)
+
+DEVICE_ID_PATH = dish_path(DEVICE_INFO_KEY, DEVICE_INFO_ID_KEY)
+TIMESTAMP_PATH = dish_path(DEVICE_TIMESTAMP_KEY)
+
+''' Device id, timestamp, then the metrics '''
+snapshot_extractor = FieldExtractor((DEVICE_ID_PATH, TIMESTAMP_PATH) + tuple(metric[2] for metric in METRICS))
+
+''' Some values are exported as strings, like the uptime '''
+def to_number(value, typecode, missing):
+    try:
+        if typecode in 'fd':
+            return float(value)
+
+        return int(float(value))
+    except (TypeError, ValueError):
+        return missing
+
+''' Device id, timestamp and metric values of the export data, None if it has no device id or time '''
+def get_snapshot(json_data, fallback_timestamp=None):
+    raw = snapshot_extractor.extract(json_data)
+    device_id = raw[0]
+    timestamp = to_number(raw[1], TIMESTAMP_TYPE, fallback_timestamp)
+
+    if device_id is None or timestamp is None:
+        return None
+
+    values = {}
+
+    for metric, value in zip(METRICS, raw[2:]):
+        values[metric[0]] = to_number(value, metric[1], metric[3])
+
+    return str(device_id), timestamp, values
+
+''' Readable part of the id and its short hash, ids like a/b and a_b get different directories
+    Names are kept in the meta file, so stores created before keep their directories
+'''
+def device_dir_name(device_id):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', device_id) + '-' + hashlib.sha1(device_id.encode()).hexdigest()[:8]
+
+def get_file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+''' Make every column as long as the timestamps column, returns the number of rows
+    Interrupted append leaves metric values without the timestamp, new rows would be
+    appended after them and shifted. Extra values are cut off, missing ones are filled
+'''
+def align_columns(device_dir):
+    timestamps_path = os.path.join(device_dir, TIMESTAMP_COLUMN)
+    itemsize = array.array(TIMESTAMP_TYPE).itemsize
+    size = get_file_size(timestamps_path)
+    rows = size // itemsize
+
+    if size % itemsize:
+        os.truncate(timestamps_path, rows * itemsize)
+
+    for name, typecode, path, missing in METRICS:
+        column_path = os.path.join(device_dir, name)
+        itemsize = array.array(typecode).itemsize
+        size = get_file_size(column_path)
+
+        if size > rows * itemsize:
+            os.truncate(column_path, rows * itemsize)
+        elif size < rows * itemsize:
+            if size % itemsize:
+                os.truncate(column_path, size - size % itemsize)
+
+            with open(column_path, 'ab') as f:
+                (array.array(typecode, [missing]) * (rows - size // itemsize)).tofile(f)
+
+    return rows
+
+''' Columns of the device, opened for reading '''
+class DeviceSeries:
+    def __init__(self, device_dir, byteorder):
+        self.device_dir = device_dir
+        self.maps = []
+        self.columns = {}
+
+        types = [ (TIMESTAMP_COLUMN, TIMESTAMP_TYPE) ] + [ (metric[0], metric[1]) for metric in METRICS ]
+        lengths = []
+
+        for name, typecode in types:
+            self.columns[name] = self.map_column(name, typecode, byteorder)
+            lengths.append(len(self.columns[name]))
+
+        ''' Interrupted append can leave columns of different length '''
+        self.rows = min(lengths)
+
+        for name in self.columns:
+            self.columns[name] = self.columns[name][:self.rows]
+
+    def map_column(self, name, typecode, byteorder):
+        path = os.path.join(self.device_dir, name)
+        itemsize = array.array(typecode).itemsize
+
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+
+        size = size - size % itemsize
+
+        if size == 0:
+            return memoryview(array.array(typecode))
+
+        if byteorder != sys.byteorder:
+            ''' Store copied from the machine with another byte order, can't map it '''
+            column = array.array(typecode)
+
+            with open(path, 'rb') as f:
+                column.frombytes(f.read(size))
+
+            column.byteswap()
+            return memoryview(column)
+
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+        self.maps.append(mapping)
+
+        return memoryview(mapping).cast(typecode)
+
+    def get_timestamps(self):
+        return self.columns[TIMESTAMP_COLUMN]
+
+    def get_column(self, name):
+        return self.columns[name]
+
+    ''' Row range of the timestamps start <= ts < end, None means no limit '''
+    def get_range(self, start=None, end=None):
+        timestamps = self.columns[TIMESTAMP_COLUMN]
+
+        first = 0 if start is None else bisect.bisect_left(timestamps, start)
+        last = self.rows if end is None else bisect.bisect_left(timestamps, end)
+
+        return first, last
+
+    ''' Columns sliced to the time range, values are memoryviews over the mapped files '''
+    def query(self, start=None, end=None, metrics=None):
+        first, last = self.get_range(start, end)
+        names = (TIMESTAMP_COLUMN,) + tuple(METRIC_NAMES if metrics is None else metrics)
+
+        return { name: self.columns[name][first:last] for name in names }
+
+    ''' Views must be released before the mappings are closed '''
+    def close(self):
+        for name in self.columns:
+            self.columns[name].release()
+
+        self.columns = {}
+
+        for mapping in self.maps:
+            mapping.close()
+
+        self.maps = []
+
+class TimeSeriesStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.meta = { 'version': STORE_VERSION, 'byteorder': sys.byteorder, 'devices': {} }
+
+        ''' Last timestamp of every device, loaded on first append '''
+        self.last_timestamps = {}
+
+        meta_path = os.path.join(store_dir, META_FILE)
+
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                self.meta = json.load(f)
+
+            if self.meta.get('version') != STORE_VERSION:
+                raise Exception('Unsupported time-series store version: ' + str(self.meta.get('version')))
+
+    def save_meta(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        meta_path = os.path.join(self.store_dir, META_FILE)
+
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(self.meta, f)
+
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def get_devices(self):
+        return list(self.meta['devices'].keys())
+
+    def get_device_dir(self, device_id):
+        return os.path.join(self.store_dir, self.meta['devices'][device_id])
+
+    def get_last_timestamp(self, device_id):
+        if device_id not in self.last_timestamps:
+            series = self.open(device_id)
+            timestamps = series.get_timestamps()
+            self.last_timestamps[device_id] = timestamps[-1] if series.rows else None
+            series.close()
+
+        return self.last_timestamps[device_id]
+
+    ''' Append rows of (timestamp, values), rows with the old or repeated timestamps are skipped
+        Returns number of the stored rows
+    '''
+    def extend(self, device_id, rows):
+        if device_id not in self.meta['devices']:
+            self.meta['devices'][device_id] = device_dir_name(device_id)
+            os.makedirs(self.get_device_dir(device_id), exist_ok=True)
+            self.save_meta()
+            self.last_timestamps[device_id] = None
+
+        last_timestamp = self.get_last_timestamp(device_id)
+        new_rows = []
+
+        for timestamp, values in rows:
+            if last_timestamp is None or timestamp > last_timestamp:
+                new_rows.append((timestamp, values))
+                last_timestamp = timestamp
+
+        if not len(new_rows):
+            return 0
+
+        device_dir = self.get_device_dir(device_id)
+        align_columns(device_dir)
+
+        ''' Timestamps go last, so the row is complete only when all columns are written '''
+        for name, typecode, path, missing in METRICS:
+            with open(os.path.join(device_dir, name), 'ab') as f:
+                array.array(typecode, [ values.get(name, missing) for timestamp, values in new_rows ]).tofile(f)
+
+        with open(os.path.join(device_dir, TIMESTAMP_COLUMN), 'ab') as f:
+            array.array(TIMESTAMP_TYPE, [ timestamp for timestamp, values in new_rows ]).tofile(f)
+
+        self.last_timestamps[device_id] = last_timestamp
+
+        return len(new_rows)
+
+    def append(self, device_id, timestamp, values):
+        return self.extend(device_id, [ (timestamp, values) ]) == 1
+
+    ''' Append metrics of the export data, returns False when nothing was stored '''
+    def append_snapshot(self, json_data, fallback_timestamp=None):
+        snapshot = get_snapshot(json_data, fallback_timestamp)
+
+        if snapshot is None:
+            return False
+
+        return self.append(*snapshot)
+
+    def open(self, device_id):
+        if device_id not in self.meta['devices']:
+            raise KeyError('No such device in the store: ' + device_id)
+
+        return DeviceSeries(self.get_device_dir(device_id), self.meta['byteorder'])
+
+''' Files may come in any order, snapshots are sorted by time before appending '''
+def ingest_files(store, files):
+    snapshots = []
+
+    for json_file_path in files:
+        try:
+            json_data = load_json_file(json_file_path, snapshot_extractor.sections)
+        except Exception as err:
+            print(json_file_path + ': ' + str(err), file=sys.stderr)
+            continue
+
+        snapshot = get_snapshot(json_data, int(os.path.getmtime(json_file_path)))
+
+        if snapshot is not None:
+            snapshots.append(snapshot)
+
+    snapshots.sort(key=lambda snapshot: (snapshot[0], snapshot[1]))
+    stored = 0
+
+    for device_id, device_snapshots in itertools.groupby(snapshots, key=lambda snapshot: snapshot[0]):
+        stored = stored + store.extend(device_id, [ snapshot[1:] for snapshot in device_snapshots ])
+
+    return stored
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Space Debugger time-series store')
+    ''' Not required=True, it needs Python 3.7 '''
+    subparsers = parser.add_subparsers(dest='command')
+
+    ingest_parser = subparsers.add_parser('ingest', help='Append JSON exports to the store, in timestamp order')
+    ingest_parser.add_argument('store', help='Store directory')
+    ingest_parser.add_argument('files', nargs='+', help='JSON exports')
+
+    subparsers.add_parser('devices', help='List devices').add_argument('store', help='Store directory')
+
+    query_parser = subparsers.add_parser('query', help='Print metrics of the device as CSV')
+    query_parser.add_argument('store', help='Store directory')
+    query_parser.add_argument('device', help='Device id')
+    query_parser.add_argument('--start', type=int, default=None, help='First timestamp, unix time')
+    query_parser.add_argument('--end', type=int, default=None, help='Timestamp after the last one, unix time')
+    query_parser.add_argument('-m', '--metrics', default=None, help='Comma separated metrics: ' + ', '.join(METRIC_NAMES))
+
+    args = parser.parse_args()
+
+    if args.command is None:
+        parser.error('command is required: ingest, devices or query')
+
+    store = TimeSeriesStore(args.store)
+
+    if args.command == 'ingest':
+        stored = ingest_files(store, args.files)
+        print('Stored ' + str(stored) + ' of ' + str(len(args.files)) + ' snapshots', file=sys.stderr)
+    elif args.command == 'devices':
+        for device_id in store.get_devices():
+            print(device_id)
+    else:
+        metrics = METRIC_NAMES if args.metrics is None else [m.strip() for m in args.metrics.split(',')]
+
+        for metric in metrics:
+            if metric not in METRIC_NAMES:
+                print('Unknown metric: ' + metric, file=sys.stderr)
+                sys.exit(1)
+
+        try:
+            series = store.open(args.device)
+        except KeyError as err:
+            print(err.args[0], file=sys.stderr)
+            sys.exit(1)
+
+        columns = series.query(args.start, args.end, metrics)
+        names = (TIMESTAMP_COLUMN,) + tuple(metrics)
+
+        print(','.join(names))
+
+        for row in zip(*[columns[name] for name in names]):
+            print(','.join(str(value) for value in row))
+
+        for name in columns:
+            columns[name].release()
+
+        series.close()